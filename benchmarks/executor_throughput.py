@@ -0,0 +1,77 @@
+"""Measures the throughput of the asynchronous executor in rows per second, for each runtime option.
+
+    usage: python -m benchmarks.executor_throughput [rows] [repeat]
+
+    The workflow reads rows from memory, filters and transforms them then broadcasts them to two targets,
+    so that the figures measure the executor and the queues rather than I/O. uvloop is benchmarked when
+    it is installed.
+
+    The baseline runs the workflow on a loop given to the executor, as executors did before they created
+    their loop through an asyncio.Runner: the loop comes from asyncio.new_event_loop and each run goes
+    through loop.run_until_complete."""
+
+import asyncio
+import sys
+import time
+
+from src import gibbon
+
+
+def build(rows):
+    w = gibbon.Workflow('throughput')
+    w.add_source('src')
+    w.add_transformation('filter', gibbon.Filter, source='src', condition=lambda r: r[0] % 3 != 0)
+    w.add_transformation('exp', gibbon.Expression, source='filter', func=lambda r: (r[0], r[1] * 2))
+    w.add_target('tgt1', source='exp')
+    w.add_target('tgt2', source='exp')
+
+    cfg = gibbon.Configuration()
+    cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=[(i, i) for i in range(rows)])
+    cfg.add_configuration('tgt1', target=gibbon.SequenceWrapper)
+    cfg.add_configuration('tgt2', target=gibbon.SequenceWrapper)
+    w.prepare(cfg)
+    return w
+
+
+def measure(rows, repeat, options):
+    best = None
+    for _ in range(repeat):
+        w = build(rows)
+        executor = gibbon.get_async_executor(**options())
+        start = time.perf_counter()
+        try:
+            if not w.run(executor):
+                raise RuntimeError('the benchmarked workflow failed')
+        finally:
+            executor.close()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best
+
+
+def main(rows=200000, repeat=5):
+    variants = {
+        'baseline': lambda: dict(loop=asyncio.new_event_loop()),
+        'default': lambda: dict(),
+        'eager tasks': lambda: dict(eager_tasks=True),
+        'no broadcast': lambda: dict(broadcast=False),
+    }
+    try:
+        import uvloop
+        variants['uvloop'] = lambda: dict(loop_factory=uvloop.new_event_loop)
+    except ImportError:
+        pass
+
+    print(f'Python {sys.version.split()[0]}, {rows} rows, best of {repeat}')
+    baseline = None
+    for name, options in variants.items():
+        throughput = measure(rows, repeat, options)
+        if baseline is None:
+            baseline = throughput
+            print(f'{name:>14}: {throughput:12,.0f} rows/s')
+        else:
+            print(f'{name:>14}: {throughput:12,.0f} rows/s ({throughput / baseline - 1:+.1%})')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -1,4 +1,7 @@
 from .asyncexe import get_async_executor
+from .profiler import Profiler
+from .tracer import Tracer
 
 
 
+from .scheduler import WorkflowScheduler, BoundedExecutor, RunStatistics
@@ -1,57 +1,117 @@
 from .base import BaseExecutor
 import asyncio
 import logging
+import sys
 
 
-def get_async_executor(loop=None, shutdown=False):
+# asyncio objects were bound to an event loop when created before Python 3.10
+_BOUND_QUEUES = sys.version_info < (3, 10)
+
+
+def get_async_executor(loop=None, shutdown=False, broadcast=True, io_executor=None, loop_factory=None,
+                       eager_tasks=False, profiler=None, tracer=None):
     if loop is not None and shutdown:
         logging.warning(f'The provided event loop will be shut down')
 
-    if loop is None:
-        loop = asyncio.new_event_loop()
-
-    return AsyncExecutor(asyncio.Queue, loop=loop, shutdown=shutdown)
+    return AsyncExecutor(asyncio.Queue, loop=loop, shutdown=shutdown, broadcast=broadcast, io_executor=io_executor,
+                         loop_factory=loop_factory, eager_tasks=eager_tasks, profiler=profiler,
+                         tracer=tracer)
 
 
 class AsyncExecutor(BaseExecutor):
-
-    def __init__(self, queue_factory, loop, shutdown=True):
-        super().__init__(queue_factory)
+    """Runs the jobs of a workflow as tasks of an event loop. The executor may run any number of workflows,
+    or the same workflow many times, in a row: the event loop and its default thread pool are kept until
+    close() is called, or after the first run when :shutdown is set. Nothing is kept from one run to the next.
+    The endpoints run their blocking calls in :io_executor, the default executor of the loop when None.
+
+    Without a :loop, the executor runs its own, created by :loop_factory (e.g. uvloop.new_event_loop) or
+    asyncio.new_event_loop, through an asyncio.Runner where available. With :eager_tasks, the jobs start
+    running as soon as they are created, on Python 3.12 and later. The jobs of a run are structured as
+    in a task group: the first failure, or the cancellation of the run, cancels the other jobs, which are
+    awaited before the run ends. The runs may be profiled and traced, see BaseExecutor."""
+
+    def __init__(self, queue_factory, loop=None, shutdown=True, broadcast=True, io_executor=None, loop_factory=None,
+                 eager_tasks=False, profiler=None, tracer=None):
+        super().__init__(queue_factory, broadcast, profiler, tracer)
+        self.io_executor = io_executor
+        self.eager_tasks = eager_tasks and sys.version_info >= (3, 12)
         self._tasks = []
+        self._runner = None
+        if loop is None:
+            if hasattr(asyncio, 'Runner'):
+                self._runner = asyncio.Runner(loop_factory=loop_factory)
+                loop = self._runner.get_loop()
+            else:
+                loop = (loop_factory or asyncio.new_event_loop)()
         self.loop = loop
         self.shutdown = shutdown
-        assert self.loop is not None
 
-    def create_queue(self):
-        return self._queue_factory(loop=self.loop)
-
-    async def schedule(self, name):
+    def reset(self):
+        super().reset()
+        self._tasks = []
 
-        for coro_func, infos in self._jobs.items():
-            logging.info(f'job {name}, starting transformation {infos[0]} ({infos[1]})')
-            coro = coro_func()
-            self._tasks.append(coro)
+    def create_queue(self):
+        if _BOUND_QUEUES:
+            return self._queue_factory(loop=self.loop)
+        return self._queue_factory()
 
-        done, pending = await asyncio.wait(self._tasks, loop=self.loop, return_when=asyncio.FIRST_EXCEPTION)
+    def _create_task(self, coro):
+        if self.eager_tasks:
+            return asyncio.Task(coro, loop=self.loop, eager_start=True)
+        return self.loop.create_task(coro)
 
-        exec_ok = True
-        for future in done:
-            if future.exception():
-                logging.error(f'{future.exception()}')
-                exec_ok = False
-                break
-            elif future.result():
-                logging.info(f'Got result {future.result()}')
+    async def _cancel(self, tasks):
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
 
-        for future in pending:
-            future.cancel()
+    async def schedule(self, name):
 
-        return exec_ok
+        try:
+            self.instrument(name)
+            for coro_func, infos in self._jobs.items():
+                logging.info(f'job {name}, starting transformation {infos[0]} ({infos[1]})')
+                self._tasks.append(self._create_task(coro_func()))
+
+            try:
+                done, pending = await asyncio.wait(self._tasks, return_when=asyncio.FIRST_EXCEPTION)
+            except BaseException:
+                # the run itself is cancelled, so are its jobs
+                await self._cancel([task for task in self._tasks if not task.done()])
+                raise
+
+            exec_ok = True
+            for future in done:
+                if future.cancelled():
+                    continue
+                if future.exception():
+                    logging.error(f'{future.exception()}')
+                    exec_ok = False
+                    break
+                elif future.result():
+                    logging.info(f'Got result {future.result()}')
+
+            await self._cancel(pending)
+
+            return exec_ok
+        finally:
+            self.reset()
 
     def run(self, name):
 
+        if self.loop.is_closed():
+            raise RuntimeError(f'Cannot run workflow {name}, the executor has been closed')
+
         logging.info(f'Start asynchronous job execution for workflow {name}')
-        exec_ok = self.loop.run_until_complete(self.schedule(name))
+        try:
+            if self._runner is not None:
+                exec_ok = self._runner.run(self.schedule(name))
+            else:
+                exec_ok = self.loop.run_until_complete(self.schedule(name))
+        finally:
+            if self.shutdown:
+                self.close()
 
         if exec_ok:
             status = 'SUCCESS'
@@ -59,13 +119,30 @@ class AsyncExecutor(BaseExecutor):
             status = 'FAILURE'
         logging.info(f'Complete asynchronous job execution for workflow {name}, status {status}')
 
-        if self.shutdown:
-            self.loop.stop()
-            self.loop.close()
+        return exec_ok
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        self.reset()
+        if self._runner is not None:
+            # shuts down the asynchronous generators and the default executor, then closes the loop
+            self._runner.close()
+            return
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        if hasattr(self.loop, 'shutdown_default_executor'):
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+        self.loop.stop()
+        self.loop.close()
 
     def create_job_from(self, transformation):
-        coro_func = transformation.get_async_job()
+        if transformation.is_finished:
+            coro_func = transformation.get_finished_async_job()
+        elif transformation.cached_result is not None:
+            coro_func = transformation.get_replay_async_job()
+        else:
+            coro_func = transformation.get_async_job()
         self._jobs[coro_func] = (transformation.name, type(transformation).__name__)
 
     def complete_runtime_configuration(self, transformation):
-        transformation.configure(loop=self.loop, executor=None)
+        transformation.configure(loop=self.loop, executor=self.io_executor)
@@ -1,18 +1,68 @@
 from abc import abstractmethod
+from .broadcast import BroadcastQueue
 
 
 class BaseExecutor:
+    """The runs of an executor are profiled by its :profiler (see Profiler) and traced by its :tracer
+    (see Tracer) unless they are None, both of which may be changed from one run to the next"""
 
-    def __init__(self, queue_factory):
+    def __init__(self, queue_factory, broadcast=True, profiler=None, tracer=None):
+        self.profiler = profiler
+        self.tracer = tracer
         self._jobs = dict()
+        self._nodes = []
         self._queue_factory = queue_factory
+        self.broadcast = broadcast
+        self._broadcast_queues = dict()
 
     def create_queue(self):
         return self._queue_factory()
 
-    def set_queues(self, source, target):
-        queue = self.create_queue()
-        source.share_queue_with_target(target, queue)
+    def create_broadcast_queue(self):
+        return BroadcastQueue()
+
+    def reset(self):
+        self._jobs = dict()
+        self._nodes = []
+        self._broadcast_queues = dict()
+
+    def load(self, plan):
+        """Sets up the runtime configuration, the queues and the jobs of a compiled plan,
+        dropping whatever was left by a previous run"""
+        self.reset()
+        self._nodes = list(plan.nodes)
+        for node in plan.nodes:
+            node.clear_queues()
+            self.complete_runtime_configuration(node)
+
+        for source, target in plan.links:
+            self.set_queues(source, target, fan_out=plan.fan_out(source))
+
+        for node in plan.nodes:
+            self.create_job_from(node)
+
+    def wrap_jobs(self, wrapper):
+        """Replaces each loaded job by wrapper(name, job), a coroutine function as well"""
+        self._jobs = {wrapper(infos[0], coro_func): infos for coro_func, infos in self._jobs.items()}
+
+    def instrument(self, name):
+        """Hands the loaded run of the workflow :name over to the tracer and the profiler, if any"""
+        if self.tracer is not None:
+            self.tracer.attach(name, self._nodes)
+            self.wrap_jobs(self.tracer.wrap)
+        if self.profiler is not None:
+            self.profiler.attach(self._nodes)
+            self.wrap_jobs(self.profiler.wrap)
+
+    def set_queues(self, source, target, fan_out=1):
+        if self.broadcast and source.broadcast and fan_out > 1:
+            # fan-out edge: a single queue read by every target through its own cursor
+            if source.id not in self._broadcast_queues:
+                self._broadcast_queues[source.id] = self.create_broadcast_queue()
+            source.share_broadcast_with_target(target, self._broadcast_queues[source.id])
+        else:
+            queue = self.create_queue()
+            source.share_queue_with_target(target, queue)
 
     @abstractmethod
     def complete_runtime_configuration(self, transformation):
@@ -30,4 +80,13 @@ class BaseExecutor:
     def run(self, name):
         raise NotImplementedError
 
+    def close(self):
+        self.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
 
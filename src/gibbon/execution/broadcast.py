@@ -0,0 +1,123 @@
+import asyncio
+
+
+class BroadcastQueue:
+    """A single producer, multiple consumers queue. Each item is stored once in a ring buffer and every
+    consumer reads it through its own cursor (see reader()). An item is dropped as soon as the slowest
+    consumer has read it, therefore the buffer only holds the items between the slowest and the fastest
+    cursors. With a positive :maxsize the producer waits whenever the slowest consumer lags that far behind."""
+    def __init__(self, maxsize=0, capacity=64):
+        self.maxsize = maxsize
+        if maxsize > 0:
+            capacity = maxsize
+        self._buffer = [None] * capacity
+        self._head = 0
+        self._tail = 0
+        self._readers = []
+        self._putters = []
+        self.max_lag = 0
+
+    def reader(self):
+        reader = BroadcastReader(self, self._tail)
+        self._readers.append(reader)
+        return reader
+
+    @property
+    def lag(self):
+        """Number of items not yet read by the slowest consumer"""
+        return self._head - self._tail
+
+    def full(self):
+        return 0 < self.maxsize <= self.lag
+
+    def qsize(self):
+        return self.lag
+
+    def _grow(self):
+        size = len(self._buffer)
+        buffer = [None] * (2 * size)
+        for i in range(self._tail, self._head):
+            buffer[i % len(buffer)] = self._buffer[i % size]
+        self._buffer = buffer
+
+    def put_nowait(self, item):
+        if self.full():
+            raise asyncio.QueueFull
+        if not self._readers:
+            return
+        if self.lag == len(self._buffer):
+            self._grow()
+
+        self._buffer[self._head % len(self._buffer)] = item
+        self._head += 1
+        self.max_lag = max(self.max_lag, self.lag)
+
+        for reader in self._readers:
+            reader._wakeup()
+
+    async def put(self, item):
+        while self.full():
+            putter = asyncio.get_event_loop().create_future()
+            self._putters.append(putter)
+            try:
+                await putter
+            except BaseException:
+                putter.cancel()
+                if putter in self._putters:
+                    self._putters.remove(putter)
+                raise
+        self.put_nowait(item)
+
+    def _item_at(self, index):
+        return self._buffer[index % len(self._buffer)]
+
+    def _release(self):
+        tail = min(reader._cursor for reader in self._readers)
+        size = len(self._buffer)
+        while self._tail < tail:
+            self._buffer[self._tail % size] = None
+            self._tail += 1
+
+        while self._putters and not self.full():
+            putter = self._putters.pop(0)
+            if not putter.done():
+                putter.set_result(None)
+
+
+class BroadcastReader:
+    """The consumer side of a BroadcastQueue, exposing the consumer interface of asyncio.Queue"""
+    def __init__(self, queue, cursor):
+        self._queue = queue
+        self._cursor = cursor
+        self._getter = None
+
+    def _wakeup(self):
+        if self._getter is not None and not self._getter.done():
+            self._getter.set_result(None)
+
+    def qsize(self):
+        return self._queue._head - self._cursor
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def get_nowait(self):
+        if self.empty():
+            raise asyncio.QueueEmpty
+
+        queue = self._queue
+        item = queue._item_at(self._cursor)
+        at_tail = self._cursor == queue._tail
+        self._cursor += 1
+        if at_tail:
+            queue._release()
+        return item
+
+    async def get(self):
+        while self.empty():
+            self._getter = asyncio.get_event_loop().create_future()
+            try:
+                await self._getter
+            finally:
+                self._getter = None
+        return self.get_nowait()
@@ -0,0 +1,147 @@
+import cProfile
+import os
+import pstats
+import time
+
+from .stepping import StepHooks, stepped
+
+
+# the attributes of the nodes holding the callables of the users
+USER_CALLABLES = ('func', 'condition', 'key', 'accumulator', 'event_time', 'partition_key')
+# the calls of the profiling steps, left out of the collapsed stacks
+_STEP_CALLS = frozenset(("<method 'send' of 'coroutine' objects>", "<method 'throw' of 'coroutine' objects>"))
+_PROFILER_CALLS = frozenset(("<method 'disable' of '_lsprof.Profiler' objects>",))
+
+
+class _ProfiledSteps(StepHooks):
+    """Profiles each step by :profile, adding its CPU time to :cpu[name]"""
+    def __init__(self, profile, cpu, name):
+        self._profile = profile
+        self._cpu = cpu
+        self._name = name
+        self._start = None
+
+    def before_step(self):
+        self._start = time.thread_time()
+        self._profile.enable()
+
+    def after_step(self):
+        self._profile.disable()
+        self._cpu[self._name] += time.thread_time() - self._start
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        label = name
+    else:
+        label = f'{name} ({os.path.basename(filename)}:{line})'
+    return label.replace(';', ',')
+
+
+def _code_key(func):
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return None
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+# the hook ending each profiled step, left out of the collapsed stacks
+_HOOK_CALL = _code_key(_ProfiledSteps.after_step)
+
+
+class Profiler:
+    """Attributes the CPU time of the runs of an executor to each node, see AsyncExecutor. Each step of the job
+    of a node runs under the profile of that node, so that the profiles leave out the event loop and hold
+    the user callables of the node: report() gives the CPU time of each node and the time spent in each of
+    its callables. Calls run in other threads, such as the I/O executor or parallel replicas, are left out.
+    Profiles add up over the runs until reset() is called."""
+    def __init__(self):
+        self.profiles = dict()
+        self.cpu = dict()
+        self.callables = dict()
+
+    def reset(self):
+        self.profiles = dict()
+        self.cpu = dict()
+        self.callables = dict()
+
+    def attach(self, nodes):
+        """Registers the nodes of the next run"""
+        for node in nodes:
+            self.profiles.setdefault(node.name, cProfile.Profile())
+            self.cpu.setdefault(node.name, 0.0)
+            self.callables[node.name] = {attr: getattr(node, attr) for attr in USER_CALLABLES
+                                         if callable(getattr(node, attr, None))}
+
+    def wrap(self, name, coro_func):
+        """Wraps the job of the node :name, see BaseExecutor.wrap_jobs()"""
+        profile = self.profiles[name]
+
+        async def job():
+            return await stepped(coro_func(), _ProfiledSteps(profile, self.cpu, name))
+        return job
+
+    def stats(self, name=None):
+        """The pstats.Stats of the node :name, of every node when None"""
+        profiles = list(self.profiles.values()) if name is None else [self.profiles[name]]
+        stats = pstats.Stats()
+        for profile in profiles:
+            if profile.getstats():
+                stats.add(profile)
+        return stats
+
+    def report(self):
+        """The CPU time of each node in seconds, and the cumulative time of each of its user callables"""
+        report = dict()
+        for name, profile in self.profiles.items():
+            entries = self.stats(name).stats
+            callables = dict()
+            for attr, func in self.callables.get(name, {}).items():
+                entry = entries.get(_code_key(func))
+                if entry is not None:
+                    callables[attr] = entry[3]
+            report[name] = {'cpu': self.cpu[name], 'callables': callables}
+        return report
+
+    def dump_stats(self, filename, name=None):
+        """Writes the profile of the node :name, of every node when None, as a pstats file"""
+        self.stats(name).dump_stats(filename)
+
+    def collapsed_stacks(self, name=None):
+        """The profiles as collapsed stacks, one line per stack of calls prefixed by the name of the node,
+        followed by its own time in microseconds. The time of a function is split among its callees in
+        proportion of the time of each of their calls, as pstats does not record whole stacks."""
+        lines = []
+        for node in (self.profiles if name is None else [name]):
+            entries = self.stats(node).stats
+            callees = dict()
+            for func, (_, _, _, _, callers) in entries.items():
+                for caller, edge in callers.items():
+                    callees.setdefault(caller, []).append((func, edge[3]))
+            prefix = [node.replace(';', ',')]
+            for func, (_, _, _, cumulative, callers) in entries.items():
+                if callers or func == _HOOK_CALL or _label(func) in _PROFILER_CALLS:
+                    continue
+                if _label(func) in _STEP_CALLS:
+                    for child, time_in_child in callees.get(func, ()):
+                        self._collapse(child, time_in_child, prefix + [_label(child)], callees, lines)
+                else:
+                    self._collapse(func, cumulative, prefix + [_label(func)], callees, lines)
+        return lines
+
+    def _collapse(self, func, total, stack, callees, lines, depth=0):
+        children = [(f, t) for f, t in callees.get(func, ()) if _label(f) not in stack[1:]] if depth < 64 else []
+        called = sum(t for _, t in children)
+        scale = total / called if called > total else 1.0
+        own = int((total - called * scale) * 1e6)
+        if own > 0:
+            lines.append(f"{';'.join(stack)} {own}")
+        for child, time_in_child in children:
+            if time_in_child * scale > 1e-6:
+                self._collapse(child, time_in_child * scale, stack + [_label(child)], callees, lines, depth + 1)
+
+    def dump_collapsed(self, filename, name=None):
+        """Writes the collapsed stacks of the node :name, of every node when None, for flame graph tools"""
+        with open(filename, 'w') as f:
+            f.writelines(line + '\n' for line in self.collapsed_stacks(name))
@@ -0,0 +1,226 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+import asyncio
+import logging
+import threading
+import time
+
+from .asyncexe import AsyncExecutor
+from ..workflows.exceptions import NodeCycleError
+
+
+class BoundedExecutor(Executor):
+    """Submits at most :limit calls at a time to a shared :executor, the other calls wait in line.
+    Shutting it down leaves the shared executor untouched."""
+    def __init__(self, executor, limit):
+        self._executor = executor
+        self._limit = limit
+        self._running = 0
+        self._waiting = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            start = self._running < self._limit
+            if start:
+                self._running += 1
+            else:
+                self._waiting.append((future, fn, args, kwargs))
+        if start:
+            self._start(future, fn, args, kwargs)
+        return future
+
+    def _start(self, future, fn, args, kwargs):
+        if not future.set_running_or_notify_cancel():
+            self._next()
+            return
+        inner = self._executor.submit(fn, *args, **kwargs)
+        inner.add_done_callback(lambda f: self._complete(future, f))
+
+    def _complete(self, future, inner):
+        if inner.cancelled():
+            future.cancel()
+        elif inner.exception() is not None:
+            future.set_exception(inner.exception())
+        else:
+            future.set_result(inner.result())
+        self._next()
+
+    def _next(self):
+        with self._lock:
+            if self._waiting:
+                call = self._waiting.popleft()
+            else:
+                self._running -= 1
+                call = None
+        if call is not None:
+            self._start(*call)
+
+    def shutdown(self, wait=True, **kwargs):
+        pass
+
+
+class RunStatistics:
+    def __init__(self, name):
+        self.name = name
+        self.status = 'PENDING'
+        self.started = None
+        self.ended = None
+        self.error = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.ended is None:
+            return None
+        return self.ended - self.started
+
+    def __repr__(self):
+        return f'RunStatistics({self.name}, {self.status}, {self.duration})'
+
+
+def _run_in_process(workflow, parameters):
+    return workflow.run(AsyncExecutor(asyncio.Queue, asyncio.new_event_loop(), shutdown=True),
+                        parameters=parameters)
+
+
+class _Entry:
+    def __init__(self, workflow, depends_on, parameters, io_concurrency):
+        self.workflow = workflow
+        self.depends_on = tuple(depends_on)
+        self.parameters = parameters
+        self.io_concurrency = io_concurrency
+
+
+class WorkflowScheduler:
+    """Runs many prepared workflows concurrently, either on a single event loop or, with :processes,
+    each in a process of a pool (workflows and their configurations must then be picklable and the results
+    stay in the child processes). At most :max_concurrency workflows run at the same time and a workflow only
+    starts once the workflows it depends on succeeded, it is skipped if any of them failed.
+    On an event loop, the blocking calls of the endpoints go to a thread pool of :io_threads threads shared
+    by all the workflows, each workflow having at most :io_concurrency calls in flight."""
+    def __init__(self, max_concurrency=8, io_threads=None, io_concurrency=None, processes=None):
+        self.max_concurrency = max_concurrency
+        self.io_threads = io_threads
+        self.io_concurrency = io_concurrency
+        self.processes = processes
+        self._entries = dict()
+        self.results = dict()
+        self.wall_time = None
+        self.max_running = 0
+        self._running = 0
+
+    def add(self, workflow, depends_on=(), parameters=None, io_concurrency=None):
+        """Adds a workflow run, :depends_on names the workflows that must succeed before it starts"""
+        if workflow.name in self._entries:
+            raise ValueError(f'Workflow {workflow.name} is already scheduled')
+        self._entries[workflow.name] = _Entry(workflow, depends_on, parameters, io_concurrency)
+
+    def _check_dependencies(self):
+        for name, entry in self._entries.items():
+            for dependency in entry.depends_on:
+                if dependency not in self._entries:
+                    raise ValueError(f'Workflow {name} depends on unknown workflow {dependency}')
+
+        checked = set()
+
+        def check(name, path):
+            if name in path:
+                raise NodeCycleError(f"Workflows depend on each other: {' -> '.join(path + [name])}")
+            if name in checked:
+                return
+            for dependency in self._entries[name].depends_on:
+                check(dependency, path + [name])
+            checked.add(name)
+
+        for name in self._entries:
+            check(name, [])
+
+    async def _run_entry(self, entry, outcomes, semaphore, pool):
+        stats = self.results[entry.workflow.name]
+        for dependency in entry.depends_on:
+            if not await outcomes[dependency]:
+                logging.warning(f'Skipping workflow {entry.workflow.name}, workflow {dependency} did not succeed')
+                stats.status = 'SKIPPED'
+                return False
+
+        loop = asyncio.get_event_loop()
+        async with semaphore:
+            self._running += 1
+            self.max_running = max(self.max_running, self._running)
+            stats.started = time.perf_counter()
+            try:
+                if self.processes:
+                    ok = await loop.run_in_executor(pool, _run_in_process, entry.workflow, entry.parameters)
+                else:
+                    limit = entry.io_concurrency or self.io_concurrency
+                    io_executor = BoundedExecutor(pool, limit) if limit else pool
+                    executor = AsyncExecutor(asyncio.Queue, loop, shutdown=False, io_executor=io_executor)
+                    ok = await entry.workflow.schedule(executor, parameters=entry.parameters)
+            except Exception as e:
+                logging.error(f'Workflow {entry.workflow.name} raised {e!r}')
+                stats.error = e
+                ok = False
+            finally:
+                stats.ended = time.perf_counter()
+                self._running -= 1
+
+        stats.status = 'SUCCESS' if ok else 'FAILURE'
+        return ok
+
+    async def schedule(self):
+        """Runs every workflow in the running event loop, returns True if all of them succeeded"""
+        self._check_dependencies()
+        self.results = {name: RunStatistics(name) for name in self._entries}
+        self.max_running = 0
+
+        if self.processes:
+            pool = ProcessPoolExecutor(max_workers=self.processes)
+        else:
+            pool = ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix='gibbon-io')
+
+        loop = asyncio.get_event_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        outcomes = {name: loop.create_future() for name in self._entries}
+
+        async def run(name, entry):
+            try:
+                outcomes[name].set_result(await self._run_entry(entry, outcomes, semaphore, pool))
+            except BaseException:
+                outcomes[name].set_result(False)
+                raise
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(run(name, entry) for name, entry in self._entries.items()))
+        finally:
+            self.wall_time = time.perf_counter() - started
+            pool.shutdown(wait=True)
+
+        return all(future.result() for future in outcomes.values())
+
+    def run(self):
+        """Runs every workflow on a new event loop, returns True if all of them succeeded"""
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.schedule())
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    @property
+    def statistics(self):
+        """Aggregate statistics of the last run"""
+        durations = [s.duration for s in self.results.values() if s.duration is not None]
+        statuses = [s.status for s in self.results.values()]
+        return {
+            'runs': len(self.results),
+            'succeeded': statuses.count('SUCCESS'),
+            'failed': statuses.count('FAILURE'),
+            'skipped': statuses.count('SKIPPED'),
+            'wall_time': self.wall_time,
+            'busy_time': sum(durations),
+            'mean_duration': sum(durations) / len(durations) if durations else None,
+            'max_duration': max(durations, default=None),
+            'max_concurrency': self.max_running,
+        }
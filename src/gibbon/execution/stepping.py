@@ -0,0 +1,37 @@
+import types
+
+
+class StepHooks:
+    """Called around the steps of a coroutine run by stepped(), between which it waits for what it awaits"""
+    def before_step(self):
+        pass
+
+    def after_step(self):
+        pass
+
+    def after_wait(self):
+        pass
+
+
+@types.coroutine
+def stepped(coro, hooks):
+    """Runs :coro one step at a time, calling the StepHooks :hooks before and after each step, and after
+    each wait between two steps"""
+    value, error = None, None
+    while True:
+        hooks.before_step()
+        try:
+            if error is None:
+                future = coro.send(value)
+            else:
+                future = coro.throw(error)
+        except StopIteration as e:
+            return e.value
+        finally:
+            hooks.after_step()
+
+        try:
+            value, error = (yield future), None
+        except BaseException as e:
+            value, error = None, e
+        hooks.after_wait()
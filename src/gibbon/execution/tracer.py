@@ -0,0 +1,123 @@
+import json
+import time
+
+from .stepping import StepHooks, stepped
+
+
+class _TracedQueue:
+    """Lets the tracer know what a node waits for while it awaits one of its queues"""
+    def __init__(self, queue, tracer, name, counter=None):
+        self._queue = queue
+        self._tracer = tracer
+        self._name = name
+        self._counter = counter
+
+    def __getattr__(self, item):
+        return getattr(self._queue, item)
+
+    async def get(self):
+        tracer = self._tracer
+        if self._counter is not None and tracer.sampled[self._name]:
+            tracer.count(self._name, self._counter, self._queue.qsize())
+        tracer.waiting[self._name] = 'get'
+        try:
+            return await self._queue.get()
+        finally:
+            tracer.waiting[self._name] = None
+
+    async def put(self, row):
+        tracer = self._tracer
+        tracer.waiting[self._name] = 'put'
+        try:
+            await self._queue.put(row)
+        finally:
+            tracer.waiting[self._name] = None
+
+
+class Tracer:
+    """Records the timeline of the runs of an executor as Chrome trace events, to be opened in Perfetto or
+    chrome://tracing: each run is a process and each node a thread, whose steps are 'busy' spans and the time
+    between them spans named after what the node waited for: 'get' for rows, 'put' for room in an output queue,
+    'await' for anything else such as the I/O executor. The rows waiting in the input queues of a node are
+    recorded as counters. To keep the overhead low, only one step of a node in :sample is recorded, and spans
+    shorter than :min_duration seconds are dropped."""
+    def __init__(self, sample=1, min_duration=0.0):
+        self.sample = sample
+        self.min_duration = min_duration
+        self.events = []
+        self.waiting = dict()
+        self.sampled = dict()
+        self._origin = time.perf_counter()
+        self._runs = 0
+        self._threads = dict()
+
+    def reset(self):
+        self.events = []
+        self._runs = 0
+        self._origin = time.perf_counter()
+
+    def _ts(self, t):
+        return (t - self._origin) * 1e6
+
+    def attach(self, name, nodes):
+        """Registers the nodes of the next run of the workflow :name and instruments their queues"""
+        self._runs += 1
+        pid = self._runs
+        self.events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f'{name} #{pid}'}})
+        for tid, node in enumerate(nodes, 1):
+            self._threads[node.name] = (pid, tid)
+            self.waiting[node.name] = None
+            self.sampled[node.name] = True
+            self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                                'args': {'name': node.name}})
+            counter = f'{node.name} queued rows' if node.in_queues else None
+            node.in_queues = [_TracedQueue(q, self, node.name, counter) for q in node.in_queues]
+            node.out_queues = [_TracedQueue(q, self, node.name) for q in node.out_queues]
+
+    def span(self, name, label, start, end):
+        if end - start < self.min_duration:
+            return
+        pid, tid = self._threads[name]
+        self.events.append({'name': label, 'cat': 'node', 'ph': 'X', 'ts': self._ts(start),
+                            'dur': (end - start) * 1e6, 'pid': pid, 'tid': tid})
+
+    def count(self, name, counter, value):
+        pid, _ = self._threads[name]
+        self.events.append({'name': counter, 'ph': 'C', 'ts': self._ts(time.perf_counter()), 'pid': pid,
+                            'args': {'rows': value}})
+
+    def wrap(self, name, coro_func):
+        """Wraps the job of the node :name, see BaseExecutor.wrap_jobs()"""
+        async def job():
+            return await stepped(coro_func(), _TracedSteps(self, name))
+        return job
+
+    def dump(self, filename):
+        """Writes the events recorded so far as a Chrome trace file"""
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+class _TracedSteps(StepHooks):
+    """Records the steps of the node :name as 'busy' spans, and the waits between them"""
+    def __init__(self, tracer, name):
+        self._tracer = tracer
+        self._name = name
+        self._steps = 0
+        self._sampled = False
+        self._start = self._end = None
+
+    def before_step(self):
+        self._sampled = self._tracer.sampled[self._name] = self._steps % self._tracer.sample == 0
+        self._steps += 1
+        self._start = time.perf_counter()
+
+    def after_step(self):
+        self._end = time.perf_counter()
+        if self._sampled:
+            self._tracer.span(self._name, 'busy', self._start, self._end)
+
+    def after_wait(self):
+        if self._sampled:
+            label = self._tracer.waiting[self._name] or 'await'
+            self._tracer.span(self._name, label, self._end, time.perf_counter())
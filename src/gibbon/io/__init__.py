@@ -1,3 +1,10 @@
+from .columnar import *
+from .compression import *
 from .csv import *
+from .inflight import *
+from .jsonl import *
+from .multifile import *
+from .partitioned import *
+from .readahead import *
+from .sqlite import *
 from .std import *
-
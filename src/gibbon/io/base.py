@@ -1,4 +1,5 @@
 from abc import abstractmethod
+import asyncio
 
 
 class AsyncReaderInterface:
@@ -32,3 +33,96 @@ class AsyncWriterInterface:
     @abstractmethod
     async def __aexit__(self, *args):
         pass
+
+
+class BatchBuffer:
+    """Buffers the rows sent to a writer and hands them to :write, a coroutine function, by batches of
+    :batch_size rows. With :linger, a background flusher writes the buffered rows at the latest :linger
+    seconds after the first of them was buffered, which bounds the latency of rows trickling in while
+    keeping full batches under load. Writes never overlap, a failed background write is raised by the
+    next call."""
+    def __init__(self, write, batch_size, linger=None):
+        self._write = write
+        self.batch_size = batch_size
+        self.linger = linger
+        self.rows = []
+        self._lock = None
+        self._flusher = None
+        self._sleeping = False
+        self._error = None
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    async def add(self, row):
+        self._raise_error()
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            await self.flush()
+        elif self.linger is not None and self._flusher is None:
+            self._schedule()
+
+    def _schedule(self):
+        self._sleeping = True
+        self._flusher = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.linger)
+        self._sleeping = False
+        try:
+            await self._flush()
+        except Exception as e:
+            self._error = e
+        self._flusher = None
+        if self.rows and self._error is None:
+            # rows buffered during the write
+            self._schedule()
+
+    async def _cancel_flusher(self):
+        if self._flusher is not None and self._sleeping:
+            flusher, self._flusher = self._flusher, None
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+
+    def _get_lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _write_rows(self):
+        rows, self.rows = self.rows, []
+        if rows:
+            await self._write(rows)
+
+    async def _flush(self):
+        async with self._get_lock():
+            await self._write_rows()
+
+    async def flush(self):
+        """Writes the buffered rows now"""
+        await self._cancel_flusher()
+        await self._flush()
+        self._raise_error()
+
+    async def close(self, discard=False):
+        """Writes the buffered rows, or drops them with :discard. The background flusher is stopped under
+        the lock of the writes, so that none of them follows the last one"""
+        async with self._get_lock():
+            if self._flusher is not None:
+                # a flusher holds no lock while sleeping or waiting for it
+                flusher, self._flusher = self._flusher, None
+                flusher.cancel()
+                try:
+                    await flusher
+                except asyncio.CancelledError:
+                    pass
+            if discard:
+                self.rows = []
+            await self._write_rows()
+        if not discard:
+            self._raise_error()
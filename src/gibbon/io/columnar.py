@@ -0,0 +1,385 @@
+"""A compact binary columnar file format meant for intermediate files exchanged between workflows.
+
+    layout:
+        MAGIC | version (u8) | header length (u32) | header (json: schema and compression)
+        row group 0: one block per column
+        ...
+        row group N
+        footer (json: row count, offset and length of each column block of each row group)
+        footer length (u32) | MAGIC
+
+    each column block is made of a null flag (u8), an optional null mask (one byte per row) and the values;
+    fixed size values are packed little-endian, variable size values are prefixed by their lengths.
+    A block is compressed as a whole so that it can be decoded without touching any other block."""
+
+import datetime
+import itertools
+import json
+import lzma
+import mmap
+import os
+import struct
+import zlib
+
+from .base import AsyncReaderInterface, AsyncWriterInterface
+
+
+COLUMNAR_MAGIC = b'GBCF'
+COLUMNAR_VERSION = 1
+
+_PREAMBLE = struct.Struct('<4sBI')
+_POSTAMBLE = struct.Struct('<I4s')
+
+_FIXED_FORMATS = {
+    'int': 'q',
+    'float': 'd',
+    'bool': '?',
+}
+
+_ISO_TYPES = {
+    'datetime': datetime.datetime,
+    'date': datetime.date,
+    'time': datetime.time,
+}
+
+COLUMNAR_TYPES = tuple(_FIXED_FORMATS) + ('str', 'bytes') + tuple(_ISO_TYPES)
+
+
+def _compress(payload, compression, level):
+    if compression is None:
+        return payload
+    elif compression == 'zlib':
+        return zlib.compress(payload, -1 if level is None else level)
+    elif compression == 'lzma':
+        return lzma.compress(payload, preset=level)
+    raise ValueError(f'Unsupported compression: {compression}')
+
+
+def _decompress(payload, compression):
+    if compression is None:
+        return payload
+    elif compression == 'zlib':
+        return zlib.decompress(payload)
+    elif compression == 'lzma':
+        return lzma.decompress(payload)
+    raise ValueError(f'Unsupported compression: {compression}')
+
+
+def encode_column(values, col_type):
+    n = len(values)
+    mask = bytes(v is None for v in values)
+    has_nulls = any(mask)
+    chunks = [struct.pack('<B', has_nulls)]
+    if has_nulls:
+        chunks.append(mask)
+
+    if col_type in _FIXED_FORMATS:
+        default = False if col_type == 'bool' else 0
+        values = [default if v is None else v for v in values]
+        chunks.append(struct.pack(f'<{n}{_FIXED_FORMATS[col_type]}', *values))
+    else:
+        if col_type == 'str':
+            values = [b'' if v is None else v.encode('utf-8') for v in values]
+        elif col_type in _ISO_TYPES:
+            values = [b'' if v is None else v.isoformat().encode('ascii') for v in values]
+        elif col_type == 'bytes':
+            values = [b'' if v is None else bytes(v) for v in values]
+        else:
+            raise ValueError(f'Unsupported column type: {col_type}')
+        chunks.append(struct.pack(f'<{n}I', *map(len, values)))
+        chunks.extend(values)
+
+    return b''.join(chunks)
+
+
+def decode_column(buffer, n, col_type):
+    has_nulls, = struct.unpack_from('<B', buffer, 0)
+    offset = 1
+    mask = None
+    if has_nulls:
+        mask = bytes(buffer[offset:offset+n])
+        offset += n
+
+    if col_type in _FIXED_FORMATS:
+        values = list(struct.unpack_from(f'<{n}{_FIXED_FORMATS[col_type]}', buffer, offset))
+    else:
+        lengths = struct.unpack_from(f'<{n}I', buffer, offset)
+        offset += 4 * n
+        values = []
+        for length in lengths:
+            values.append(bytes(buffer[offset:offset+length]))
+            offset += length
+
+        if col_type == 'str':
+            values = [v.decode('utf-8') for v in values]
+        elif col_type in _ISO_TYPES:
+            from_iso = _ISO_TYPES[col_type].fromisoformat
+            values = [from_iso(v.decode('ascii')) if v else None for v in values]
+        elif col_type != 'bytes':
+            raise ValueError(f'Unsupported column type: {col_type}')
+
+    if mask is not None:
+        values = [None if null else v for v, null in zip(values, mask)]
+
+    return values
+
+
+class ColumnarSourceFile(AsyncReaderInterface):
+    """Reads a columnar file through a memory map. Only the blocks of the requested columns and row groups
+    are decompressed and decoded, a whole row group being decoded at once in the executor. With a :predicate,
+    the columns it depends on are decoded first and the other columns only for the rows it accepts,
+    a row group without any such row being skipped. The blocks of the columns left out of a :projection, a sequence
+    of indices in the rows read, are not decoded and these columns are None"""
+    supports_predicates = True
+    supports_projection = True
+
+    def __init__(self, filename, loop, executor=None, columns=None, row_groups=None, predicate=None, projection=None,
+                 **kwargs):
+        self._filename = filename
+        self._loop = loop
+        self._executor = executor
+        self._columns = columns
+        self._projection = None if projection is None else set(projection)
+        self._row_groups = row_groups
+        self._predicate = predicate
+        self._predicate_columns = None
+        self._file_obj = None
+        self._map = None
+        self.schema = None
+        self.compression = None
+        self._footer = None
+        self._selected = None
+        self._pending = None
+        self._buffer = iter(())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                return next(self._buffer)
+            except StopIteration:
+                pass
+
+            try:
+                group_index = next(self._pending)
+            except StopIteration:
+                raise StopAsyncIteration
+
+            rows = await self._loop.run_in_executor(self._executor, self.read_row_group, group_index)
+            self._buffer = iter(rows)
+
+    def _open(self):
+        self._file_obj = open(self._filename, 'rb')
+        self._map = mmap.mmap(self._file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = _PREAMBLE.unpack_from(self._map, 0)
+        footer_len, end_magic = _POSTAMBLE.unpack_from(self._map, len(self._map) - _POSTAMBLE.size)
+        if magic != COLUMNAR_MAGIC or end_magic != COLUMNAR_MAGIC:
+            raise ValueError(f'{self._filename} is not a columnar file')
+        if version != COLUMNAR_VERSION:
+            raise ValueError(f'{self._filename}: unsupported columnar format version {version}')
+
+        header = json.loads(self._map[_PREAMBLE.size:_PREAMBLE.size+header_len])
+        self.schema = [tuple(c) for c in header['schema']]
+        self.compression = header['compression']
+
+        footer_end = len(self._map) - _POSTAMBLE.size
+        self._footer = json.loads(self._map[footer_end-footer_len:footer_end])
+
+        names = [name for name, _ in self.schema]
+        if self._columns is None:
+            self._selected = list(range(len(self.schema)))
+        else:
+            self._selected = [c if isinstance(c, int) else names.index(c) for c in self._columns]
+
+        if self._predicate is not None:
+            # the predicate refers to the columns of the rows read, it is evaluated on the columns it depends on
+            predicate = self._predicate.bind([names[c] for c in self._selected])
+            self._predicate_columns = sorted(predicate.columns())
+            self._predicate = predicate.remap({c: i for i, c in enumerate(self._predicate_columns)})
+
+        if self._row_groups is None:
+            self._pending = iter(range(len(self._footer['row_groups'])))
+        else:
+            self._pending = iter(self._row_groups)
+
+    @property
+    def row_group_count(self):
+        return len(self._footer['row_groups'])
+
+    def read_column(self, group_index, column_index):
+        group = self._footer['row_groups'][group_index]
+        offset, length = group['columns'][column_index]
+        view = memoryview(self._map)[offset:offset+length]
+        try:
+            block = _decompress(view, self.compression)
+            return decode_column(block, group['rows'], self.schema[column_index][1])
+        finally:
+            view.release()
+
+    def _is_projected(self, index):
+        return self._projection is None or index in self._projection
+
+    def read_row_group(self, group_index):
+        if self._predicate is not None:
+            return self._read_filtered_row_group(group_index)
+
+        n = self._footer['row_groups'][group_index]['rows']
+        columns = [self.read_column(group_index, c) if self._is_projected(i) else itertools.repeat(None, n)
+                   for i, c in enumerate(self._selected)]
+        if not columns:
+            return [()] * n
+        return list(zip(*columns))
+
+    def _read_filtered_row_group(self, group_index):
+        decoded = {i: self.read_column(group_index, self._selected[i]) for i in self._predicate_columns}
+        if decoded:
+            predicate = self._predicate
+            keep = [n for n, values in enumerate(zip(*decoded.values())) if predicate(values)]
+        else:
+            keep = list(range(self._footer['row_groups'][group_index]['rows'])) if self._predicate(()) else []
+        if not keep:
+            return []
+
+        columns = []
+        for i, c in enumerate(self._selected):
+            if not self._is_projected(i):
+                columns.append(itertools.repeat(None, len(keep)))
+                continue
+            values = decoded[i] if i in decoded else self.read_column(group_index, c)
+            columns.append([values[n] for n in keep])
+        if not columns:
+            return [()] * len(keep)
+        return list(zip(*columns))
+
+    async def __aenter__(self):
+        try:
+            await self._loop.run_in_executor(self._executor, self._open)
+            return self
+        except BaseException:
+            await self._safe_close()
+            raise
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self._safe_close()
+        return exc_type is None
+
+    def _close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file_obj is not None:
+            self._file_obj.close()
+
+    async def _safe_close(self):
+        self._buffer = iter(())
+        await self._loop.run_in_executor(self._executor, self._close)
+
+
+class ColumnarTargetFile(AsyncWriterInterface):
+    """Writes rows as a columnar file. The schema is a sequence of (name, type) couples, rows are buffered
+    and written as a row group of per-column blocks every :row_group_size rows. With :append, row groups
+    are added to an existing file of the same schema, its footer being rewritten after them. Should an append
+    fail, the file is restored as it was before it was opened"""
+    def __init__(self, filename, loop, schema, executor=None, compression=None, compression_level=None,
+                 row_group_size=65536, append=False, **kwargs):
+        self._filename = filename
+        self._loop = loop
+        self._executor = executor
+        self.schema = [tuple(c) for c in schema]
+        for name, col_type in self.schema:
+            if col_type not in COLUMNAR_TYPES:
+                raise ValueError(f'Unsupported type {col_type} for column {name}')
+        if compression not in (None, 'zlib', 'lzma'):
+            raise ValueError(f'Unsupported compression: {compression}')
+        self.compression = compression
+        self._level = compression_level
+        self._row_group_size = row_group_size
+        self._append = append
+        self._file_obj = None
+        self._rows = []
+        self._row_groups = []
+        self._footer_start = None
+        self._former_footer = None
+
+    async def send(self, data):
+        self._rows.append(data)
+        if len(self._rows) >= self._row_group_size:
+            rows, self._rows = self._rows, []
+            await self._loop.run_in_executor(self._executor, self._write_row_group, rows)
+
+    def _open(self):
+        if self._append and os.path.exists(self._filename):
+            self._open_append()
+            return
+
+        self._file_obj = open(self._filename, 'wb')
+        header = json.dumps({'schema': self.schema, 'compression': self.compression}).encode('utf-8')
+        self._file_obj.write(_PREAMBLE.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(header)))
+        self._file_obj.write(header)
+
+    def _open_append(self):
+        self._file_obj = open(self._filename, 'r+b')
+        magic, version, header_len = _PREAMBLE.unpack(self._file_obj.read(_PREAMBLE.size))
+        header = json.loads(self._file_obj.read(header_len))
+        self._file_obj.seek(-_POSTAMBLE.size, os.SEEK_END)
+        footer_len, end_magic = _POSTAMBLE.unpack(self._file_obj.read(_POSTAMBLE.size))
+        if magic != COLUMNAR_MAGIC or end_magic != COLUMNAR_MAGIC or version != COLUMNAR_VERSION:
+            raise ValueError(f'{self._filename} is not a columnar file that can be appended to')
+        if [tuple(c) for c in header['schema']] != self.schema or header['compression'] != self.compression:
+            raise ValueError(f'{self._filename}: cannot append rows of a different schema or compression')
+
+        footer_start = self._file_obj.seek(-_POSTAMBLE.size - footer_len, os.SEEK_END)
+        self._former_footer = self._file_obj.read(footer_len + _POSTAMBLE.size)
+        self._row_groups = json.loads(self._former_footer[:footer_len])['row_groups']
+        # the new row groups overwrite the former footer, which is kept until the file is finalized
+        self._footer_start = footer_start
+        self._file_obj.seek(footer_start)
+        self._file_obj.truncate()
+
+    def _write_row_group(self, rows):
+        blocks = []
+        for index, (_, col_type) in enumerate(self.schema):
+            values = [row[index] for row in rows]
+            payload = _compress(encode_column(values, col_type), self.compression, self._level)
+            blocks.append([self._file_obj.tell(), len(payload)])
+            self._file_obj.write(payload)
+        self._row_groups.append({'rows': len(rows), 'columns': blocks})
+
+    def _finalize(self):
+        if self._rows:
+            self._write_row_group(self._rows)
+            self._rows = []
+        footer = json.dumps({'row_groups': self._row_groups}).encode('utf-8')
+        self._file_obj.write(footer)
+        self._file_obj.write(_POSTAMBLE.pack(len(footer), COLUMNAR_MAGIC))
+
+    def _restore(self):
+        self._file_obj.seek(self._footer_start)
+        self._file_obj.truncate()
+        self._file_obj.write(self._former_footer)
+
+    async def __aenter__(self):
+        try:
+            await self._loop.run_in_executor(self._executor, self._open)
+            return self
+        except BaseException:
+            await self._safe_close()
+            raise
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        try:
+            if exc_type is None and self._file_obj is not None:
+                await self._loop.run_in_executor(self._executor, self._finalize)
+            elif self._former_footer is not None:
+                # drops the row groups of the failed append
+                await self._loop.run_in_executor(self._executor, self._restore)
+        finally:
+            await self._safe_close()
+        return exc_type is None
+
+    async def _safe_close(self):
+        if self._file_obj is not None:
+            await self._loop.run_in_executor(self._executor, self._file_obj.close)
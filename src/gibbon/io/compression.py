@@ -0,0 +1,210 @@
+import bz2
+import codecs
+import gzip
+import locale
+import lzma
+import os
+import queue
+import threading
+
+
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.lzma': 'xz',
+}
+
+_OPENERS = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+}
+
+_EOF = object()
+
+
+def infer_compression(filename, compression='infer'):
+    """Returns the compression scheme of a file, either given explicitly or guessed from its extension"""
+    if compression == 'infer':
+        _, ext = os.path.splitext(str(filename))
+        return COMPRESSION_EXTENSIONS.get(ext.lower())
+
+    if compression is not None and compression not in _OPENERS:
+        raise ValueError(f'Unsupported compression: {compression}')
+
+    return compression
+
+
+def open_compressed_file(filename, mode='r', compression='infer', encoding=None, chunk_size=1 << 16,
+                         buffers=8):
+    """Opens a text file for reading or writing. Compressed files are (de)compressed by a background thread
+    that stays up to :buffers chunks of :chunk_size bytes ahead of the reader or behind the writer.
+    Uncompressed files are opened as usual."""
+    compression = infer_compression(filename, compression)
+    if compression is None:
+        return open(filename, mode, encoding=encoding)
+
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+
+    if mode in ('r', 'rt'):
+        return ThreadedDecompressingReader(filename, compression, encoding, chunk_size, buffers)
+    elif mode in ('w', 'wt', 'a', 'at'):
+        return ThreadedCompressingWriter(filename, compression, encoding, chunk_size, buffers, mode[0])
+
+    raise ValueError(f'Unsupported mode for a compressed file: {mode}')
+
+
+class ThreadedDecompressingReader:
+    """A text file reader whose decompression runs in a background thread, the decompressed chunks
+    being handed over through a bounded queue"""
+    def __init__(self, filename, compression, encoding, chunk_size, buffers):
+        self._compressed = _OPENERS[compression](filename, 'rb')
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._chunk_size = chunk_size
+        self._chunks = queue.Queue(maxsize=buffers)
+        self._stop = threading.Event()
+        self._lines = []
+        self._pending = ''
+        self._eof = False
+        self.closed = False
+        self._thread = threading.Thread(target=self._read_ahead, daemon=True)
+        self._thread.start()
+
+    def _read_ahead(self):
+        try:
+            while not self._stop.is_set():
+                chunk = self._compressed.read(self._chunk_size)
+                if not chunk:
+                    break
+                self._put(chunk)
+        except BaseException as exc:
+            self._put(exc)
+        self._put(_EOF)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _fill(self):
+        while not self._lines and not self._eof:
+            chunk = self._chunks.get()
+            if chunk is _EOF:
+                text = self._pending + self._decoder.decode(b'', final=True)
+                self._pending = ''
+                self._eof = True
+                if text:
+                    self._lines.append(text)
+            elif isinstance(chunk, BaseException):
+                raise chunk
+            else:
+                parts = (self._pending + self._decoder.decode(chunk)).split('\n')
+                self._pending = parts.pop()
+                self._lines = [p + '\n' for p in parts]
+                self._lines.reverse()
+
+    def readline(self):
+        self._fill()
+        if self._lines:
+            return self._lines.pop()
+        return ''
+
+    def read(self):
+        text = ''.join(reversed(self._lines))
+        self._lines = []
+        while not self._eof:
+            self._fill()
+            text += ''.join(reversed(self._lines))
+            self._lines = []
+        return text
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def close(self):
+        if self.closed:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._compressed.close()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ThreadedCompressingWriter:
+    """A text file writer whose compression runs in a background thread. Written strings are gathered into
+    chunks that are handed over to the thread through a bounded queue"""
+    def __init__(self, filename, compression, encoding, chunk_size, buffers, mode='w'):
+        self._compressed = _OPENERS[compression](filename, mode + 'b')
+        self._encoding = encoding
+        self._chunk_size = chunk_size
+        self._chunks = queue.Queue(maxsize=buffers)
+        self._buffer = []
+        self._buffered = 0
+        self._error = None
+        self.closed = False
+        self._thread = threading.Thread(target=self._write_behind, daemon=True)
+        self._thread.start()
+
+    def _write_behind(self):
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _EOF:
+                break
+            if self._error is None:
+                try:
+                    self._compressed.write(chunk)
+                except BaseException as exc:
+                    self._error = exc
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, s):
+        self._check()
+        self._buffer.append(s)
+        self._buffered += len(s)
+        if self._buffered >= self._chunk_size:
+            self.flush()
+        return len(s)
+
+    def flush(self):
+        if self._buffer:
+            self._chunks.put(''.join(self._buffer).encode(self._encoding))
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._chunks.put(_EOF)
+            self._thread.join()
+            self._compressed.close()
+            self.closed = True
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,6 +1,10 @@
 import csv
+import itertools
+import os
+from operator import itemgetter
 
-from .base import AsyncReaderInterface, AsyncWriterInterface
+from .base import AsyncReaderInterface, AsyncWriterInterface, BatchBuffer
+from .compression import open_compressed_file, infer_compression
 
 
 def naive_tuple_maker(it):
@@ -8,35 +12,90 @@ def naive_tuple_maker(it):
 
 
 class CSVSourceFile(AsyncReaderInterface):
-    def __init__(self, filename, loop, executor=None, tuple_maker=naive_tuple_maker, **fmtopts):
+    """Reads a CSV file, each line being made a tuple by :tuple_maker. Rows rejected by :predicate
+    are skipped in the executor while parsing. With a :projection, a sequence of column indices, the other
+    fields are replaced by None, so that they are released right away: before the tuple is made by default,
+    after :tuple_maker made it otherwise, since it may convert any field. Every field is still parsed: the
+    projection saves the memory of the rows downstream, not the parsing time, and costs about as much as
+    making the whole tuple"""
+    supports_predicates = True
+    supports_projection = True
+
+    def __init__(self, filename, loop, executor=None, tuple_maker=naive_tuple_maker, compression='infer',
+                 predicate=None, projection=None, **fmtopts):
         self._filename = filename
+        self._predicate = predicate
+        self._projection = None if projection is None else sorted(projection)
+        self._projectors = dict()
+        self._compression = compression
         self._fmt_options = fmtopts
         self._reader = None
         self._file_obj = None
         self._loop = loop
         self._executor = executor
         self._to_tuple = tuple_maker
+        self._skipped_lines = 0
 
     def __aiter__(self):
         return self
 
+    def _projector(self, width):
+        # picks the projected fields and, for the others, the None appended to the fields
+        projection = set(self._projection)
+        positions = [i if i in projection else width for i in range(width)]
+        if width > 1:
+            return itemgetter(*positions)
+        return lambda fields: tuple(fields[i] for i in positions)
+
+    def _project(self, fields):
+        width = len(fields)
+        projector = self._projectors.get(width)
+        if projector is None:
+            projector = self._projectors[width] = self._projector(width)
+        fields.append(None)
+        return projector(fields)
+
     async def __anext__(self):
+        def _next_row(sync_iter):
+            if self._projection is None:
+                return self._to_tuple(next(sync_iter))
+            if self._to_tuple is naive_tuple_maker:
+                return self._project(next(sync_iter))
+            return self._project(list(self._to_tuple(next(sync_iter))))
+
         def _wrap_next(sync_iter):
             try:
-                row = next(sync_iter)
-                return self._to_tuple(row)
+                row = _next_row(sync_iter)
+                if self._predicate is not None:
+                    while not self._predicate(row):
+                        row = _next_row(sync_iter)
+                return row
             except StopIteration:
                 raise StopAsyncIteration
 
         return await self._loop.run_in_executor(self._executor, _wrap_next, self._reader)
 
+    def tell(self):
+        """Number of lines read so far, rows may span several lines"""
+        return self._skipped_lines + self._reader.line_num
+
+    async def seek(self, position):
+        def _skip_lines(n):
+            for _ in itertools.islice(self._file_obj, n):
+                pass
+
+        await self._loop.run_in_executor(self._executor, _skip_lines, position - self.tell())
+        self._skipped_lines = position - self._reader.line_num
+
     async def __aenter__(self):
         try:
-            self._file_obj = await self._loop.run_in_executor(self._executor, open, self._filename, 'r')
+            self._file_obj = await self._loop.run_in_executor(self._executor, open_compressed_file,
+                                                              self._filename, 'r', self._compression)
             self._reader = await self._loop.run_in_executor(self._executor, csv.reader, self._file_obj, **self._fmt_options)
             return self
         except BaseException as exc:
             await self.__aexit__(type(exc), str(exc), exc.__traceback__)
+            raise
 
     async def __aexit__(self, exc_type, exc_value, exc_traceback):
         self._reader = None
@@ -45,12 +104,20 @@ class CSVSourceFile(AsyncReaderInterface):
                 await self._loop.run_in_executor(self._executor, self._file_obj.close)
             finally:
                 pass
-        return exc_type is not None
+        return False
 
 
 class CSVTargetFile(AsyncWriterInterface):
-    def __init__(self, filename, loop, executor=None, **fmtopts):
+    """Writes rows to a CSV file by batches of :batch_size rows, each batch being written in the executor.
+    With :linger, rows are written and flushed at the latest :linger seconds after they were sent"""
+    def __init__(self, filename, loop, executor=None, compression='infer', append=False, resume=None,
+                 batch_size=1000, linger=None, **fmtopts):
         self._filename = filename
+        self._linger = linger
+        self._buffer = BatchBuffer(self._write_batch, batch_size, linger)
+        self._compression = compression
+        self._append = append
+        self._resume = resume
         self._fmt_options = fmtopts
         self._writer = None
         self._file_obj = None
@@ -58,11 +125,39 @@ class CSVTargetFile(AsyncWriterInterface):
         self._executor = executor
 
     async def send(self, data):
-        await self._loop.run_in_executor(self._executor, self._writer.writerow, data)
+        await self._buffer.add(data)
+
+    def _write_rows(self, rows):
+        self._writer.writerows(rows)
+        if self._linger is not None:
+            self._file_obj.flush()
+
+    async def _write_batch(self, rows):
+        await self._loop.run_in_executor(self._executor, self._write_rows, rows)
+
+    async def checkpoint(self):
+        """Flushes the file and returns its size, None when the file is compressed since
+        a compressed stream cannot be resumed at an arbitrary position"""
+        def _flush():
+            self._file_obj.flush()
+            os.fsync(self._file_obj.fileno())
+            return self._file_obj.tell()
+
+        if infer_compression(self._filename, self._compression) is not None:
+            return None
+        await self._buffer.flush()
+        return await self._loop.run_in_executor(self._executor, _flush)
+
+    def _open(self):
+        if self._resume is not None:
+            # resume after the last row written at the checkpoint
+            os.truncate(self._filename, self._resume)
+            return open_compressed_file(self._filename, 'a', self._compression)
+        return open_compressed_file(self._filename, 'a' if self._append else 'w', self._compression)
 
     async def __aenter__(self):
         try:
-            self._file_obj = await self._loop.run_in_executor(self._executor, open, self._filename, 'w')
+            self._file_obj = await self._loop.run_in_executor(self._executor, self._open)
             self._writer = await self._loop.run_in_executor(self._executor, csv.writer, self._file_obj,
                                                             **self._fmt_options)
             return self
@@ -71,7 +166,10 @@ class CSVTargetFile(AsyncWriterInterface):
             raise
 
     async def __aexit__(self, exc_type, exc_value, exc_traceback):
-        await self._safe_close()
+        try:
+            await self._buffer.close(discard=exc_type is not None)
+        finally:
+            await self._safe_close()
         return exc_type is None
 
     async def _safe_close(self):
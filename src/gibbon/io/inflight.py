@@ -0,0 +1,93 @@
+import asyncio
+
+from .base import AsyncWriterInterface
+
+
+class InFlight(AsyncWriterInterface):
+    """Wraps an actual target so that up to :window calls to its send() method run concurrently, which hides
+    the latency of targets waiting on each write. The actual target must accept concurrent sends.
+    Rows are written in no particular order unless a :key is given, the rows of a same key being written
+    one after the other in the order they were sent. The first failed write is raised by the next call.
+    The wrapper enters and exits the context of the target, whose checkpoint() waits for the pending writes."""
+    def __init__(self, target, window=8, key=None):
+        self._target = target
+        self._window = window
+        self._key = key
+        self._slots = None
+        self._pending = set()
+        self._tails = dict()
+        self._failure = None
+
+    def _raise(self):
+        if self._failure is not None:
+            raise self._failure
+
+    async def send(self, data):
+        self._raise()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._window)
+        await self._slots.acquire()
+        if self._failure is not None:
+            self._slots.release()
+            self._raise()
+
+        key = None if self._key is None else self._key(data)
+        task = asyncio.ensure_future(self._send(data, self._tails.get(key)))
+        self._pending.add(task)
+        task.add_done_callback(lambda t: self._done(t, key))
+        if self._key is not None:
+            self._tails[key] = task
+
+    async def _send(self, data, previous):
+        try:
+            if previous is not None:
+                await asyncio.wait((previous,))
+            if self._failure is None:
+                await self._target.send(data)
+        finally:
+            self._slots.release()
+
+    def _done(self, task, key):
+        self._pending.discard(task)
+        if self._tails.get(key) is task:
+            del self._tails[key]
+        if not task.cancelled() and task.exception() is not None and self._failure is None:
+            self._failure = task.exception()
+
+    async def drain(self):
+        """Waits for the pending writes"""
+        if self._pending:
+            await asyncio.wait(set(self._pending))
+        self._raise()
+
+    async def _cancel(self):
+        for task in self._pending:
+            task.cancel()
+        if self._pending:
+            await asyncio.wait(set(self._pending))
+
+    def __getattr__(self, item):
+        if item == 'checkpoint':
+            # the optional capability of the target is that of the wrapper
+            getattr(self._target, item)
+            return self._checkpoint
+        raise AttributeError(item)
+
+    async def _checkpoint(self):
+        await self.drain()
+        return await self._target.checkpoint()
+
+    async def __aenter__(self):
+        await self._target.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        if exc_type is None:
+            try:
+                await self.drain()
+            except Exception as e:
+                await self._target.__aexit__(type(e), e, e.__traceback__)
+                raise
+        else:
+            await self._cancel()
+        return await self._target.__aexit__(exc_type, exc_value, exc_traceback)
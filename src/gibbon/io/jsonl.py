@@ -0,0 +1,175 @@
+import itertools
+import json
+import os
+
+from .base import AsyncReaderInterface, AsyncWriterInterface, BatchBuffer
+from .compression import open_compressed_file, infer_compression
+
+
+class JSONLinesSourceFile(AsyncReaderInterface):
+    """Reads a newline-delimited JSON file. Each object is projected to a tuple made of the values
+    of :fields (:default when missing), lines being read and decoded by chunks of :chunk_size in the executor.
+    Rows rejected by :predicate are dropped while decoding, column names of the predicate refer to :fields"""
+    supports_predicates = True
+
+    def __init__(self, filename, loop, fields, executor=None, chunk_size=1000, default=None, compression='infer',
+                 encoding='utf-8', predicate=None, **kwargs):
+        self._filename = filename
+        self._loop = loop
+        self._executor = executor
+        self._fields = tuple(fields)
+        self._predicate = None if predicate is None else predicate.bind(self._fields)
+        self._chunk_size = chunk_size
+        self._default = default
+        self._compression = compression
+        self._encoding = encoding
+        self._file_obj = None
+        self._rows = []
+        self._ends = []
+        self._index = 0
+        self._start = 0
+        self._lines = 0
+        self._exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            if self._index < len(self._rows):
+                self._index += 1
+                return self._rows[self._index - 1]
+
+            if self._exhausted:
+                raise StopAsyncIteration
+
+            self._start = self._lines
+            self._rows, self._ends = await self._loop.run_in_executor(self._executor, self._read_chunk)
+            self._index = 0
+
+    def _read_chunk(self):
+        lines = list(itertools.islice(self._file_obj, self._chunk_size))
+        if len(lines) < self._chunk_size:
+            self._exhausted = True
+
+        decode = json.loads
+        fields = self._fields
+        default = self._default
+        predicate = self._predicate
+        rows = []
+        ends = []
+        for n, line in enumerate(lines, self._lines + 1):
+            if line.isspace():
+                continue
+            obj = decode(line)
+            row = tuple([obj.get(f, default) for f in fields])
+            if predicate is None or predicate(row):
+                rows.append(row)
+                ends.append(n)
+        self._lines += len(lines)
+        return rows, ends
+
+    def tell(self):
+        """Number of lines up to the last row returned"""
+        if self._index == 0:
+            return self._start
+        return self._ends[self._index - 1]
+
+    async def seek(self, position):
+        def _skip_lines(n):
+            for _ in itertools.islice(self._file_obj, n):
+                pass
+
+        # rows already decoded in the current chunk are dropped, lines are counted from its start
+        await self._loop.run_in_executor(self._executor, _skip_lines, position - self._lines)
+        self._rows, self._ends, self._index = [], [], 0
+        self._start = self._lines = position
+
+    async def __aenter__(self):
+        try:
+            self._file_obj = await self._loop.run_in_executor(self._executor, open_compressed_file,
+                                                              self._filename, 'r', self._compression,
+                                                              self._encoding)
+            return self
+        except BaseException:
+            await self._safe_close()
+            raise
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self._safe_close()
+        return exc_type is None
+
+    async def _safe_close(self):
+        self._rows, self._ends, self._index = [], [], 0
+        if self._file_obj is not None:
+            await self._loop.run_in_executor(self._executor, self._file_obj.close)
+
+
+class JSONLinesTargetFile(AsyncWriterInterface):
+    """Writes rows as newline-delimited JSON objects whose keys are :fields. Rows are buffered and
+    encoded by chunks of :chunk_size in the executor, extra keyword arguments are passed to json.dumps.
+    With :linger, rows are written and flushed at the latest :linger seconds after they were sent"""
+    def __init__(self, filename, loop, fields, executor=None, chunk_size=1000, compression='infer',
+                 encoding='utf-8', append=False, resume=None, linger=None, **dumpopts):
+        self._filename = filename
+        self._loop = loop
+        self._executor = executor
+        self._fields = tuple(fields)
+        self._linger = linger
+        self._buffer = BatchBuffer(self._write_batch, chunk_size, linger)
+        self._compression = compression
+        self._encoding = encoding
+        self._encoder = json.JSONEncoder(**dumpopts)
+        self._append = append
+        self._resume = resume
+        self._file_obj = None
+
+    async def send(self, data):
+        await self._buffer.add(data)
+
+    def _write_chunk(self, rows):
+        encode = self._encoder.encode
+        fields = self._fields
+        self._file_obj.write(''.join([encode(dict(zip(fields, row))) + '\n' for row in rows]))
+        if self._linger is not None:
+            self._file_obj.flush()
+
+    async def _write_batch(self, rows):
+        await self._loop.run_in_executor(self._executor, self._write_chunk, rows)
+
+    def _checkpoint(self):
+        self._file_obj.flush()
+        os.fsync(self._file_obj.fileno())
+        return self._file_obj.tell()
+
+    async def checkpoint(self):
+        """Writes the buffered rows and returns the file size, None when the file is compressed"""
+        if infer_compression(self._filename, self._compression) is not None:
+            return None
+        await self._buffer.flush()
+        return await self._loop.run_in_executor(self._executor, self._checkpoint)
+
+    def _open(self):
+        if self._resume is not None:
+            os.truncate(self._filename, self._resume)
+            return open_compressed_file(self._filename, 'a', self._compression, self._encoding)
+        return open_compressed_file(self._filename, 'a' if self._append else 'w', self._compression, self._encoding)
+
+    async def __aenter__(self):
+        try:
+            self._file_obj = await self._loop.run_in_executor(self._executor, self._open)
+            return self
+        except BaseException:
+            await self._safe_close()
+            raise
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        try:
+            await self._buffer.close(discard=exc_type is not None)
+        finally:
+            await self._safe_close()
+        return exc_type is None
+
+    async def _safe_close(self):
+        if self._file_obj is not None:
+            await self._loop.run_in_executor(self._executor, self._file_obj.close)
@@ -0,0 +1,115 @@
+import asyncio
+import glob
+import os
+
+from .base import AsyncReaderInterface
+from .csv import CSVSourceFile
+from .readahead import _Failure
+
+
+_DONE = object()
+
+
+class MultiFileSource(AsyncReaderInterface):
+    """Reads several files as one source, :filenames being a glob pattern or a sequence of file names, each file
+    being read by a :reader source (CSVSourceFile by default) configured with the other arguments.
+    Up to :concurrency files are read at once, each one keeping up to :buffer_size rows ahead. Rows are output
+    as they come unless :ordered, the rows of a file coming then after those of the files before it, files
+    matching a pattern being sorted by name. With :with_filename, each row ends with the name of its file.
+    The position of the source is the number of rows output from each file, which a new source seeks by
+    skipping those rows in each file, whatever the order of the rows is, and reading the files unknown to it."""
+    def __init__(self, filenames, loop, reader=CSVSourceFile, executor=None, concurrency=4, ordered=False,
+                 with_filename=False, buffer_size=1000, **kwargs):
+        if concurrency < 1:
+            raise ValueError('At least one file must be read at once')
+        if isinstance(filenames, (str, os.PathLike)):
+            filenames = sorted(glob.glob(os.fspath(filenames), recursive=True))
+        self.files = [os.fspath(filename) for filename in filenames]
+        self._reader = reader
+        self._loop = loop
+        self._executor = executor
+        self._concurrency = concurrency
+        self._ordered = ordered
+        self._with_filename = with_filename
+        self._buffer_size = buffer_size
+        self._reader_options = kwargs
+        self._queues = None
+        self._tasks = None
+        self._running = 0
+        self._current = 0
+        self._positions = dict()
+        self._skipped = dict()
+
+    def __aiter__(self):
+        return self
+
+    def _start(self):
+        files = iter(enumerate(self.files))
+        if self._ordered:
+            self._queues = [asyncio.Queue(maxsize=self._buffer_size) for _ in self.files]
+        else:
+            self._queues = [asyncio.Queue(maxsize=self._buffer_size)]
+        workers = min(self._concurrency, len(self.files))
+        self._tasks = [asyncio.ensure_future(self._read(files)) for _ in range(workers)]
+        self._running = workers
+
+    async def _read(self, files):
+        for index, filename in files:
+            queue = self._queues[index if self._ordered else 0]
+            try:
+                source = self._reader(filename, self._loop, executor=self._executor, **self._reader_options)
+                async with source as src:
+                    skipped = self._skipped.get(filename, 0)
+                    async for row in src:
+                        if skipped:
+                            skipped -= 1
+                            continue
+                        await queue.put((filename, row))
+            except Exception as e:
+                await queue.put(_Failure(e))
+                return
+            if self._ordered:
+                await queue.put(_DONE)
+        if not self._ordered:
+            await self._queues[0].put(_DONE)
+
+    async def __anext__(self):
+        if self._tasks is None:
+            self._start()
+
+        # ordered readings go through the queue of each file in turn, the others wait for every worker
+        while self._current < len(self._queues) and self._running:
+            item = await self._queues[self._current].get()
+            if item is _DONE:
+                if self._ordered:
+                    self._queues[self._current] = None
+                    self._current += 1
+                else:
+                    self._running -= 1
+                continue
+            elif type(item) is _Failure:
+                raise item.exc
+            filename, row = item
+            self._positions[filename] = self._positions.get(filename, 0) + 1
+            return (*row, filename) if self._with_filename else row
+        raise StopAsyncIteration
+
+    def tell(self):
+        """The number of rows output from each file"""
+        return dict(self._positions)
+
+    async def seek(self, position):
+        if self._tasks is not None:
+            raise RuntimeError('Cannot seek a source once it is being read')
+        self._positions = dict(position)
+        self._skipped = dict(position)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        if self._tasks is not None:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        return False
@@ -0,0 +1,130 @@
+import os
+from collections import OrderedDict
+from operator import itemgetter
+
+from .base import AsyncWriterInterface
+from .compression import infer_compression
+from .csv import CSVTargetFile
+
+
+class PartitionedTarget(AsyncWriterInterface):
+    """Writes rows to one file per partition, the partition of a row being the value of :partition_by (a column
+    index or a callable on rows) and its file :filename formatted with that value, e.g. 'out/{}.csv'.
+    Each file is written by a :writer target (CSVTargetFile by default) configured with the other arguments.
+    Rows are buffered by partition and written :buffer_size rows at a time, at most :max_open files
+    being open at once: the least recently written one is closed to open another one, then appended to
+    when written again. At most :max_buffered rows are buffered overall, the largest buffer being written
+    beyond that."""
+    def __init__(self, filename, loop, partition_by, writer=CSVTargetFile, executor=None, max_open=16,
+                 buffer_size=1000, max_buffered=None, append=False, resume=None, **kwargs):
+        if max_open < 1:
+            raise ValueError('At least one file must be open at once')
+        self._filename = filename
+        self._key = itemgetter(partition_by) if isinstance(partition_by, int) else partition_by
+        self._writer = writer
+        self._loop = loop
+        self._executor = executor
+        self._max_open = max_open
+        self._buffer_size = buffer_size
+        self._max_buffered = buffer_size * max_open if max_buffered is None else max_buffered
+        self._append = append
+        self._resume = resume or dict()
+        self._writer_options = kwargs
+        self._buffers = dict()
+        self._buffered = 0
+        self._open = OrderedDict()
+        self._written = set()
+
+    def path(self, value):
+        """The file of the partition :value"""
+        return self._filename.format(*value) if isinstance(value, tuple) else self._filename.format(value)
+
+    @property
+    def partitions(self):
+        """The files written so far"""
+        return sorted(self._written)
+
+    async def send(self, data):
+        path = self.path(self._key(data))
+        buffer = self._buffers.setdefault(path, [])
+        buffer.append(data)
+        self._buffered += 1
+        if len(buffer) >= self._buffer_size:
+            await self._write(path)
+        elif self._buffered > self._max_buffered:
+            await self._write(max(self._buffers, key=lambda p: len(self._buffers[p])))
+
+    async def _write(self, path):
+        rows = self._buffers.pop(path)
+        self._buffered -= len(rows)
+        writer = await self._get_writer(path)
+        for row in rows:
+            await writer.send(row)
+
+    async def _get_writer(self, path):
+        if path in self._open:
+            self._open.move_to_end(path)
+            return self._open[path]
+
+        if len(self._open) >= self._max_open:
+            _, evicted = self._open.popitem(last=False)
+            await evicted.__aexit__(None, None, None)
+
+        options = dict(self._writer_options)
+        if path in self._written:
+            options['append'] = True
+        elif path in self._resume:
+            # go back to the size of the file at the checkpoint
+            options['resume'] = self._resume[path]
+        else:
+            options['append'] = self._append
+            dirname = os.path.dirname(path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+
+        writer = self._writer(path, self._loop, executor=self._executor, **options)
+        await writer.__aenter__()
+        self._open[path] = writer
+        self._written.add(path)
+        return writer
+
+    async def flush(self):
+        """Writes every buffered row"""
+        for path in list(self._buffers):
+            await self._write(path)
+
+    async def checkpoint(self):
+        """Writes every buffered row and returns the size of each file written so far, None when
+        a file cannot be resumed"""
+        await self.flush()
+        token = dict()
+        for path in self._written:
+            writer = self._open.get(path)
+            if writer is not None:
+                size = await writer.checkpoint()
+            elif infer_compression(path, self._writer_options.get('compression', 'infer')) is None:
+                size = os.path.getsize(path)
+            else:
+                size = None
+            if size is None:
+                return None
+            token[path] = size
+        return token
+
+    async def __aenter__(self):
+        return self
+
+    async def _close(self, exc_type, exc_value, exc_traceback):
+        while self._open:
+            _, writer = self._open.popitem(last=False)
+            await writer.__aexit__(exc_type, exc_value, exc_traceback)
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        if exc_type is None:
+            try:
+                await self.flush()
+            except Exception as e:
+                await self._close(type(e), e, e.__traceback__)
+                raise
+        await self._close(exc_type, exc_value, exc_traceback)
+        return exc_type is None
@@ -0,0 +1,79 @@
+import asyncio
+
+from .base import AsyncReaderInterface
+
+
+class _Failure:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class ReadAhead(AsyncReaderInterface):
+    """Wraps an actual source so that a task keeps up to :depth rows prefetched from it, the source waiting
+    on its executor while the event loop runs the transformations. The wrapper enters and exits the context
+    of the source, whose tell() and seek() remain available: tell() is the position after the last row read
+    from the wrapper, not from the source."""
+    def __init__(self, source, depth=1000):
+        self._source = source
+        self._depth = depth
+        self._queue = None
+        self._task = None
+        self._position = None
+
+    def __aiter__(self):
+        return self
+
+    async def _prefetch(self):
+        src = self._source
+        tell = getattr(src, 'tell', None)
+        try:
+            async for row in src:
+                await self._queue.put((row, None if tell is None else tell()))
+        except Exception as e:
+            await self._queue.put(_Failure(e))
+        else:
+            await self._queue.put(None)
+
+    async def __anext__(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self._depth)
+            self._task = asyncio.ensure_future(self._prefetch())
+
+        item = await self._queue.get()
+        if item is None:
+            # the end of the stream is put back for later calls
+            self._queue.put_nowait(None)
+            raise StopAsyncIteration
+        elif type(item) is _Failure:
+            raise item.exc
+
+        row, self._position = item
+        return row
+
+    def __getattr__(self, item):
+        if item in ('tell', 'seek'):
+            # the optional capabilities of the source are those of the wrapper
+            getattr(self._source, item)
+            return object.__getattribute__(self, f'_{item}')
+        raise AttributeError(item)
+
+    def _tell(self):
+        return self._source.tell() if self._position is None else self._position
+
+    async def _seek(self, position):
+        if self._task is not None:
+            raise RuntimeError('Cannot seek a source once it is being read ahead')
+        await self._source.seek(position)
+
+    async def __aenter__(self):
+        await self._source.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        return await self._source.__aexit__(exc_type, exc_value, exc_traceback)
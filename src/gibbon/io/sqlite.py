@@ -0,0 +1,357 @@
+import asyncio
+import collections
+import queue
+import re
+import sqlite3
+import threading
+
+from .base import AsyncReaderInterface, AsyncWriterInterface, BatchBuffer
+
+
+_PRAGMA_NAME = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def apply_pragmas(connection, pragmas):
+    """Applies a mapping of PRAGMA statements, e.g. {'journal_mode': 'WAL', 'synchronous': 'OFF'}"""
+    for name, value in (pragmas or {}).items():
+        if not _PRAGMA_NAME.match(name):
+            raise ValueError(f'Invalid pragma name: {name}')
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+def sqlite_connect(database, pragmas=None, on_connect=None, **kwargs):
+    """Opens a connection usable from any thread of an executor, then applies the tuning hooks"""
+    kwargs.setdefault('check_same_thread', False)
+    connection = sqlite3.connect(database, **kwargs)
+    try:
+        apply_pragmas(connection, pragmas)
+        if on_connect is not None:
+            on_connect(connection)
+    except BaseException:
+        connection.close()
+        raise
+    return connection
+
+
+class SQLiteConnectionPool:
+    """A pool of at most :size connections to the same database. It may be shared between endpoints
+    of a workflow by giving it as the 'pool' argument of their configurations. Connections are created
+    on demand and a connection is never used by two endpoints at the same time. Endpoints waiting for
+    a connection wait on their event loop, leaving the threads of the executor to the others."""
+    def __init__(self, database, size=4, pragmas=None, on_connect=None, **connect_kwargs):
+        self.database = database
+        self.size = size
+        self._pragmas = pragmas
+        self._on_connect = on_connect
+        self._connect_kwargs = connect_kwargs
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._waiters = collections.deque()
+        self._in_use = 0
+        self._created = 0
+        self._connections = []
+
+    def _checkout(self):
+        """Returns an idle connection or a new one, the caller holding one of the :size slots"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            self._created += 1
+        try:
+            connection = sqlite_connect(self.database, self._pragmas, self._on_connect, **self._connect_kwargs)
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def _release_slot(self):
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if not waiter.done() and not loop.is_closed():
+                    # the slot goes to the waiter as is
+                    loop.call_soon_threadsafe(self._hand_over, waiter)
+                    return
+            self._in_use -= 1
+            self._released.notify()
+
+    def _hand_over(self, waiter):
+        if waiter.done():
+            # cancelled meanwhile
+            self._release_slot()
+        else:
+            waiter.set_result(None)
+
+    def acquire(self):
+        """Waits for a connection, blocking the calling thread"""
+        with self._lock:
+            while self._in_use >= self.size:
+                self._released.wait()
+            self._in_use += 1
+        try:
+            return self._checkout()
+        except BaseException:
+            self._release_slot()
+            raise
+
+    async def acquire_async(self, loop, executor=None):
+        """Waits for a connection on :loop, the connection being opened in :executor"""
+        with self._lock:
+            if self._in_use < self.size:
+                self._in_use += 1
+                waiter = None
+            else:
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+        if waiter is not None:
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # handed the slot just before being cancelled
+                    self._release_slot()
+                raise
+        try:
+            return await loop.run_in_executor(executor, self._checkout)
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def release(self, connection):
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            self._idle.put(connection)
+        finally:
+            self._release_slot()
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+            self._created = 0
+            self._idle = queue.LifoQueue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _SQLiteEndPoint:
+    def __init__(self, loop, database, executor, pool, pragmas, on_connect):
+        if database is None and pool is None:
+            raise ValueError("Either 'database' or 'pool' is required")
+        self._loop = loop
+        self._database = database
+        self._executor = executor
+        self._pool = pool
+        self._pragmas = pragmas
+        self._on_connect = on_connect
+        self._connection = None
+
+    def _acquire(self):
+        if self._pool is not None:
+            self._connection = self._pool.acquire()
+        else:
+            self._connection = sqlite_connect(self._database, self._pragmas, self._on_connect)
+
+    async def _acquire_async(self):
+        if self._pool is not None:
+            self._connection = await self._pool.acquire_async(self._loop, self._executor)
+        else:
+            await self._run(self._acquire)
+
+    def _release(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if self._pool is not None:
+            self._pool.release(connection)
+        else:
+            connection.close()
+
+    async def _run(self, func, *args):
+        return await self._loop.run_in_executor(self._executor, func, *args)
+
+
+class SQLiteSource(_SQLiteEndPoint, AsyncReaderInterface):
+    """Streams the result of a query by batches of :batch_size rows, each batch being fetched
+    in the executor. A :predicate becomes the WHERE clause of a query wrapping :query, which selects
+    NULL instead of the columns left out of a :projection, a sequence of column indices"""
+    supports_predicates = True
+    supports_projection = True
+
+    def __init__(self, loop, query, database=None, parameters=(), executor=None, batch_size=1000, pool=None,
+                 pragmas=None, on_connect=None, predicate=None, projection=None, **kwargs):
+        super().__init__(loop, database, executor, pool, pragmas, on_connect)
+        self._query = query
+        self._parameters = parameters
+        self._predicate = predicate
+        self._projection = None if projection is None else set(projection)
+        self._batch_size = batch_size
+        self._cursor = None
+        self._buffer = iter(())
+        self._exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                return next(self._buffer)
+            except StopIteration:
+                pass
+
+            if self._exhausted:
+                raise StopAsyncIteration
+
+            rows = await self._run(self._cursor.fetchmany, self._batch_size)
+            if len(rows) < self._batch_size:
+                self._exhausted = True
+            self._buffer = iter(rows)
+
+    def _wrapped_query(self):
+        query = self._query.strip().rstrip(';')
+        description = self._connection.execute(f'SELECT * FROM ({query}) LIMIT 0', self._parameters).description
+        names = [column[0] for column in description]
+        if isinstance(self._parameters, dict):
+            parameters = dict(self._parameters)
+        else:
+            parameters = list(self._parameters)
+
+        if self._projection is None:
+            columns = '*'
+        else:
+            columns = ', '.join(_quote(name) if i in self._projection else 'NULL' for i, name in enumerate(names))
+        statement = f'SELECT {columns} FROM ({query})'
+        if self._predicate is not None:
+            statement += f' WHERE {self._predicate.to_sql(names, parameters)}'
+        return statement, parameters
+
+    def _open(self):
+        if self._predicate is None and self._projection is None:
+            self._cursor = self._connection.execute(self._query, self._parameters)
+        else:
+            self._cursor = self._connection.execute(*self._wrapped_query())
+
+    def _close(self):
+        try:
+            if self._cursor is not None:
+                self._cursor.close()
+                self._cursor = None
+        finally:
+            self._release()
+
+    async def __aenter__(self):
+        try:
+            await self._acquire_async()
+            await self._run(self._open)
+            return self
+        except BaseException:
+            await self._run(self._close)
+            raise
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self._run(self._close)
+        return exc_type is None
+
+
+class SQLiteTarget(_SQLiteEndPoint, AsyncWriterInterface):
+    """Inserts rows with executemany by batches of :batch_size rows, a transaction being committed every
+    :transaction_size rows and at the end of the stream. Either a :table (and optionally its :columns) or
+    a complete parametrized :statement must be given. With :linger, rows are inserted and committed at the
+    latest :linger seconds after they were sent (see BatchBuffer)."""
+    def __init__(self, loop, table=None, database=None, columns=None, statement=None, executor=None,
+                 batch_size=1000, transaction_size=10000, pool=None, pragmas=None, on_connect=None, resume=None,
+                 linger=None, **kwargs):
+        super().__init__(loop, database, executor, pool, pragmas, on_connect)
+        if table is None and statement is None:
+            raise ValueError("Either 'table' or 'statement' is required")
+        self._resume = resume
+        self._table = table
+        self._columns = columns
+        self._statement = statement
+        self._transaction_size = transaction_size
+        self._linger = linger
+        self._buffer = BatchBuffer(self._write_batch, batch_size, linger)
+        self._uncommitted = 0
+
+    def _get_statement(self, row):
+        if self._statement is None:
+            if self._columns is None:
+                names = ''
+            else:
+                names = ' (' + ', '.join(self._columns) + ')'
+            placeholders = ', '.join('?' * len(row))
+            self._statement = f'INSERT INTO {self._table}{names} VALUES ({placeholders})'
+        return self._statement
+
+    def _write(self, rows):
+        self._connection.executemany(self._get_statement(rows[0]), rows)
+        self._uncommitted += len(rows)
+        # with a linger, rows must be visible as soon as they are written
+        if self._linger is not None or self._uncommitted >= self._transaction_size:
+            self._connection.commit()
+            self._uncommitted = 0
+
+    async def _write_batch(self, rows):
+        await self._run(self._write, rows)
+
+    def _finalize(self):
+        self._connection.commit()
+        self._uncommitted = 0
+
+    def _checkpoint(self):
+        self._finalize()
+        if self._statement is not None and self._table is None:
+            return None
+        rowid, = self._connection.execute(f'SELECT max(rowid) FROM {self._table}').fetchone()
+        return {'rowid': rowid or 0}
+
+    def _open(self):
+        if self._resume is not None:
+            # rows inserted after the checkpoint are deleted before being inserted again
+            self._connection.execute(f'DELETE FROM {self._table} WHERE rowid > ?', (self._resume['rowid'],))
+            self._connection.commit()
+
+    async def send(self, data):
+        await self._buffer.add(data)
+
+    async def checkpoint(self):
+        """Commits the rows sent so far and returns the last rowid of the table, None when
+        rows are inserted by a custom statement"""
+        await self._buffer.flush()
+        return await self._run(self._checkpoint)
+
+    async def __aenter__(self):
+        try:
+            await self._acquire_async()
+            await self._run(self._open)
+            return self
+        except BaseException:
+            await self._run(self._release)
+            raise
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        try:
+            await self._buffer.close(discard=exc_type is not None)
+            if exc_type is None:
+                await self._run(self._finalize)
+        finally:
+            await self._run(self._release)
+        return exc_type is None
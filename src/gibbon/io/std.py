@@ -1,10 +1,17 @@
+import itertools
+
 from .base import AsyncReaderInterface, AsyncWriterInterface
 
 
 class SequenceWrapper(AsyncReaderInterface, AsyncWriterInterface):
-    def __init__(self, iterable=(), container=None, **kwargs):
-        self._iter = iter(iterable)
+    supports_predicates = True
+
+    def __init__(self, iterable=(), container=None, resume=None, predicate=None, **kwargs):
+        self._iter = iter(iterable) if predicate is None else filter(predicate, iterable)
         self._container = container
+        self._position = 0
+        if resume is not None and container is not None:
+            del container[resume:]
 
     def __aiter__(self):
         return self
@@ -12,10 +19,19 @@ class SequenceWrapper(AsyncReaderInterface, AsyncWriterInterface):
     async def __anext__(self):
         try:
             item = self._iter.__next__()
+            self._position += 1
             return item
         except StopIteration:
             raise StopAsyncIteration
 
+    def tell(self):
+        return self._position
+
+    async def seek(self, position):
+        for _ in itertools.islice(self._iter, position - self._position):
+            pass
+        self._position = position
+
     async def __aenter__(self):
         return self
 
@@ -26,6 +42,10 @@ class SequenceWrapper(AsyncReaderInterface, AsyncWriterInterface):
         if self._container is not None:
             self._container.append(data)
 
+    async def checkpoint(self):
+        if self._container is not None:
+            return len(self._container)
+
 
 class StdOut(AsyncWriterInterface):
     def __init__(self, stdout, **kwargs):
@@ -2,3 +2,9 @@ from .base import *
 from .exceptions import *
 from .transformations import *
 from .configuration import *
+from .checkpoint import *
+from .plan import *
+from .cache import *
+from .predicates import *
+from .explain import *
+from .memory import *
@@ -1,6 +1,15 @@
 from .transformations.endpoints import Source, Target
 from .transformations.endpoints import is_source, is_target
 from .exceptions import *
+from .plan import ExecutionPlan
+from .checkpoint import CheckpointCoordinator
+from .cache import fingerprint
+from .predicates import is_predicate
+from .explain import RunAnalyzer, explain_plan
+from .memory import MemoryGovernor
+from .transformations.filter import Filter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import re
 
@@ -48,7 +57,14 @@ class DirectedAcyclicGraph:
 
     def check_reachability(self, callback):
 
+        # visited nodes are checked once, which also stops the recursion on cyclic graphs
+        to_source_visited = set()
+        to_target_visited = set()
+
         def _check_path_to_source(node):
+            if node in to_source_visited:
+                return
+            to_source_visited.add(node)
 
             if node.has_source:
                 for source in node.sources:
@@ -59,6 +75,10 @@ class DirectedAcyclicGraph:
                 pass
 
         def _check_path_to_target(node):
+            if node in to_target_visited:
+                return
+            to_target_visited.add(node)
+
             if node.has_target:
                 for child in node.targets:
                     _check_path_to_target(child)
@@ -72,12 +92,10 @@ class DirectedAcyclicGraph:
             _check_path_to_target(node)
 
     def bfs_traverse_links(self, callback):
-        queue = []
+        queue = deque(self.roots)
         visited = set()
-        for n in self.roots:
-            queue.append(n)
         while len(queue):
-            node = queue.pop(0)
+            node = queue.popleft()
             if node in visited:
                 continue
             else:
@@ -88,12 +106,10 @@ class DirectedAcyclicGraph:
                         queue.append(c)
 
     def bfs_traverse(self, callback):
-        queue = []
+        queue = deque(self.roots)
         visited = set()
-        for n in self.roots:
-            queue.append(n)
         while len(queue):
-            node = queue.pop(0)
+            node = queue.popleft()
             if node in visited:
                 continue
             else:
@@ -115,6 +131,21 @@ class Workflow:
         self.name = name
         self.check_valid_name(self.name)
         self._invalid_config = None
+        self._plan = None
+        self._checkpoint_store = None
+        self._checkpoint_interval = None
+        self._watermark_store = None
+        self._result_cache = None
+        self._cache_keys = dict()
+        self._recorders = []
+        self._analyzer = None
+        self._io_executor = None
+        self._owns_io_executor = False
+        self._memory_governor = None
+
+    def _invalidate(self):
+        self._checked = False
+        self._plan = None
 
     def check_valid_name(self, name):
         if not name:
@@ -145,7 +176,7 @@ class Workflow:
             self._warnings.append(warn(msg))
 
     def add_source(self, name):
-        self._checked = False
+        self._invalidate()
         self.check_valid_name(name)
 
         try:
@@ -156,7 +187,7 @@ class Workflow:
             self._add_error(e)
 
     def add_target(self, name, source=None):
-        self._checked = False
+        self._invalidate()
         self.check_valid_name(name)
 
         try:
@@ -172,7 +203,7 @@ class Workflow:
 
     def add_transformation(self, name, cls, *args, source=None, targets=(), **kwargs):
 
-        self._checked = False
+        self._invalidate()
         self.check_valid_name(name)
 
         parent = None
@@ -195,7 +226,7 @@ class Workflow:
             self._add_error(e)
 
     def add_complex_transformation(self, name, cls, *args, sources=(), targets=(), **kwargs):
-        self._checked = False
+        self._invalidate()
         self.check_valid_name(name)
 
         parents = []
@@ -219,6 +250,7 @@ class Workflow:
             self._add_error(e)
 
     def connect(self, source, *targets):
+        self._invalidate()
         if source:
             source = self.get_node_by_name(source)
 
@@ -286,12 +318,32 @@ class Workflow:
         if len(self._errors):
             raise self._errors.pop()
 
-    def prepare(self, cfg_visitor):
+    def compile(self):
+        """Returns the execution plan of the workflow. The plan is built once and kept until
+        the workflow is modified"""
+        if self._plan is not None:
+            return self._plan
+
         if not self.is_valid:
+            logging.error(f"{self.name}: invalid workflow cannot be compiled")
+            return None
+
+        try:
+            self._plan = ExecutionPlan.compile(self.name, self._dag.nodes)
+        except NodeCycleError as e:
+            self._add_error(e)
+            logging.error(str(e))
+            self._valid = False
+
+        return self._plan
+
+    def prepare(self, cfg_visitor):
+        plan = self.compile()
+        if plan is None:
             logging.error(f"{self.name}: invalid workflow cannot be configured")
         else:
             try:
-                self._dag.bfs_traverse(cfg_visitor.set_configuration)
+                plan.configure(cfg_visitor)
                 self._invalid_config = False
             except ConfigurationError as e:
                 self._add_error(e)
@@ -299,24 +351,299 @@ class Workflow:
                 self._invalid_config = True
 
     def reset(self, cfg_visitor):
-        self._dag.bfs_traverse(cfg_visitor.reset_configuration)
+        if self._plan is not None:
+            self._plan.reset(cfg_visitor)
+        else:
+            self._dag.bfs_traverse(cfg_visitor.reset_configuration)
+
+    def set_io_executor(self, executor):
+        """Sets the executor where the endpoints of the workflow run their blocking calls unless their configuration
+        gives one, a number of threads making it a thread pool dedicated to the workflow. None restores the I/O
+        executor of the executor of the run."""
+        if self._owns_io_executor:
+            self._io_executor.shutdown(wait=False)
+        self._owns_io_executor = isinstance(executor, int)
+        if self._owns_io_executor:
+            executor = ThreadPoolExecutor(max_workers=executor, thread_name_prefix=f'gibbon-{self.name}')
+        self._io_executor = executor
+
+    def _set_io_executors(self, plan):
+        for node in plan.nodes:
+            if is_source(node) or is_target(node):
+                node.default_io_executor = self._io_executor
+
+    def set_memory_budget(self, budget, spill_dir=None):
+        """Keeps the estimated memory of the runs under :budget bytes (see MemoryGovernor): above it the largest
+        Sorter or Aggregator spills its state to files of :spill_dir, the temporary directory by default,
+        and sources pause while rows wait in the queues. Passing None as :budget disables the governor."""
+        self._memory_governor = None if budget is None else MemoryGovernor(budget, spill_dir)
+
+    def _set_memory_governor(self, plan):
+        for node in plan.nodes:
+            node.memory = None
+        if self._memory_governor is not None:
+            self._memory_governor.attach(plan)
+
+    def memory_report(self):
+        """The estimated peak memory in bytes of each node during the last run, empty without a memory budget"""
+        return dict() if self._memory_governor is None else self._memory_governor.report()
+
+    def set_checkpointing(self, store, interval=10000):
+        """Enables checkpoints: sources emit a barrier every :interval rows, each node then saves its state
+        to the CheckpointStore :store. A run following a failed one resumes from its last checkpoint,
+        a successful run clears it. Passing None as :store disables checkpoints."""
+        self._checkpoint_store = store
+        self._checkpoint_interval = interval
+
+    def _set_checkpointing(self, plan):
+        if self._checkpoint_store is None:
+            for node in plan.nodes:
+                node.set_checkpointing(None)
+            return
+
+        coordinator = CheckpointCoordinator(self.name, self._checkpoint_store, [n.name for n in plan.nodes],
+                                            self._checkpoint_interval)
+        states = coordinator.restore()
+        for node in plan.nodes:
+            node.set_checkpointing(coordinator, states.get(node.name))
 
-    def _prepare_execution(self, exec_visitor):
+    def set_incremental(self, store):
+        """Enables incremental runs: the watermark each node reached at the end of a successful run is saved
+        to the CheckpointStore :store and the next run starts from it. Sources only read new rows, stateful
+        transformations merge them into their former state and targets append their rows. Passing None
+        as :store disables incremental runs."""
+        self._watermark_store = store
+
+    @property
+    def _watermark_key(self):
+        return f'{self.name}.watermarks'
+
+    def _set_incremental(self, plan):
+        if self._watermark_store is None:
+            for node in plan.nodes:
+                node.set_incremental(False)
+            return
+
+        watermarks = self._watermark_store.load(self._watermark_key) or dict()
+        for node in plan.nodes:
+            node.set_incremental(True, watermarks.get(node.name))
+
+    def reset_watermarks(self):
+        """Forgets the watermarks, the next incremental run processes all the rows again"""
+        if self._watermark_store is not None:
+            self._watermark_store.clear(self._watermark_key)
+
+    def set_result_cache(self, cache):
+        """Sets the ResultCache where the output of the cacheable nodes is materialized, None disables it"""
+        self._result_cache = cache
+
+    def set_cacheable(self, name, cacheable=True):
+        """Marks a node whose output stream is materialized in the result cache. Later runs, of this workflow
+        or of any workflow sharing the same upstream sub-DAG, replay it instead of running that sub-DAG
+        as long as its configuration and the files it reads are unchanged."""
+        node = self.get_node_by_name(name)
+        if node is None:
+            return
+        if cacheable and not node.broadcast:
+            self._add_error(FeatureNotSupportedError, f"{name}: a node routing rows to its targets cannot be cached")
+            return
+        node.cacheable = cacheable
+
+    def invalidate_cache(self, name=None):
+        """Removes the cached result of the node :name, or of every cacheable node when :name is None"""
+        plan = self.compile()
+        if self._result_cache is None or plan is None:
+            return
+        for node in plan.nodes:
+            if node.cacheable and (name is None or node.name == name):
+                self._result_cache.invalidate(fingerprint(plan, node))
+
+    @staticmethod
+    def _push_down_predicates(plan):
+        """Moves the conditions of the chains of Filter right after a source into the source, when they are
+        predicates and the actual source can evaluate them. The filters then let every row go through."""
+        for node in plan.nodes:
+            if is_source(node):
+                node.pushed_predicate = None
+            elif isinstance(node, Filter):
+                node.pushed_down = False
+
+        for source in plan.roots:
+            if not is_source(source) or not source.supports_predicates:
+                continue
+            node = source
+            while len(plan.targets[node]) == 1:
+                target = plan.targets[node][0]
+                if not isinstance(target, Filter) or not is_predicate(target.condition):
+                    break
+                logging.info(f'{source.name}: condition of {target.name} pushed down')
+                target.pushed_down = True
+                if source.pushed_predicate is None:
+                    source.pushed_predicate = target.condition
+                else:
+                    source.pushed_predicate = source.pushed_predicate & target.condition
+                node = target
+
+    @staticmethod
+    def _push_down_projections(plan):
+        """Gives the sources that can leave out columns the indices of the columns read downstream, as far as the
+        transformations tell which columns they read (see Transformation.used_columns). Other columns are None."""
+        needed = dict()
+        for node in reversed(plan.nodes):
+            downstream = set()
+            for target in plan.targets[node]:
+                columns = needed[target]
+                if columns is None:
+                    downstream = None
+                    break
+                downstream |= columns
+            if is_source(node):
+                node.pushed_projection = None
+                if downstream is not None and node.supports_projection:
+                    logging.info(f'{node.name}: columns {sorted(downstream)} are read downstream')
+                    node.pushed_projection = sorted(downstream)
+            else:
+                needed[node] = node.used_columns(downstream)
+
+    def _apply_cache(self, plan):
+        """Looks up the results of the cacheable nodes, returns the plan of the run"""
+        self._cache_keys = dict()
+        if self._result_cache is None or not any(n.cacheable for n in plan.nodes):
+            return plan
+        if self._watermark_store is not None:
+            logging.warning(f'{self.name}: the result cache is not used by incremental runs')
+            return plan
+        # a run resuming from a checkpoint restores every node as it was
+        restoring = self._checkpoint_store is not None and self._checkpoint_store.load(self.name) is not None
+
+        replayed = set()
+        for node in plan.nodes:
+            if not node.cacheable:
+                continue
+            key = self._cache_keys[node] = fingerprint(plan, node)
+            path = None if restoring else self._result_cache.lookup(key)
+            if path is not None:
+                logging.info(f'{self.name}: replaying the cached result of {node.name}')
+                node.cached_result = path
+                replayed.add(node)
+
+        if not replayed:
+            return plan
+        return plan.prune(replayed)
+
+    def _attach_recorders(self, plan):
+        for node in plan.nodes:
+            if node in self._cache_keys and node.cached_result is None and node.restored_state is None:
+                recorder = self._result_cache.recorder(self._cache_keys[node])
+                node.out_queues.append(recorder)
+                self._recorders.append(recorder)
+
+    def _release_cache(self, plan):
+        for recorder in self._recorders:
+            recorder.discard()
+        self._recorders = []
+        self._cache_keys = dict()
+        for node in plan.nodes:
+            node.cached_result = None
+
+    def _complete_run(self, exec_ok):
+        plan = self.compile()
+        self._release_cache(plan)
+        if exec_ok and self._watermark_store is not None:
+            watermarks = {n.name: n.next_watermark for n in plan.nodes if n.next_watermark is not None}
+            self._watermark_store.save(self._watermark_key, watermarks)
+
+        for node in plan.nodes:
+            node.set_checkpointing(None)
+            node.set_incremental(False)
+        if exec_ok and self._checkpoint_store is not None:
+            self._checkpoint_store.clear(self.name)
+        return exec_ok
+
+    def _prepare_execution(self, exec_visitor, parameters=None):
         if not self.is_valid:
             logging.error(f"{self.name}: invalid workflow cannot be run")
         elif self._invalid_config is None or self._invalid_config:
             logging.error(f"{self.name}: configuration is either missing or incomplete, workflow cannot be run")
             self._invalid_config = True
         else:
-            self._dag.bfs_traverse(exec_visitor.complete_runtime_configuration)
-            self._dag.bfs_traverse_links(exec_visitor.set_queues)
-            self._dag.bfs_traverse(exec_visitor.create_job_from)
+            plan = self.compile()
+            try:
+                self._set_run_parameters(plan, parameters or {})
+                self._push_down_predicates(plan)
+                self._push_down_projections(plan)
+                run_plan = self._apply_cache(plan)
+                self._set_checkpointing(run_plan)
+                self._set_incremental(run_plan)
+                self._set_io_executors(run_plan)
+                exec_visitor.load(run_plan)
+                self._set_memory_governor(run_plan)
+                if self._analyzer is not None:
+                    self._analyzer.attach(run_plan, exec_visitor)
+                self._attach_recorders(run_plan)
+            except ConfigurationError as e:
+                logging.error(str(e))
+                self._release_cache(plan)
+                return False
+            finally:
+                for node in plan.nodes:
+                    node.clear_run_parameters()
         return self.is_valid and not self._invalid_config
 
-    async def schedule(self, exec_visitor, *args, **kwargs):
-        if self._prepare_execution(exec_visitor):
-            await exec_visitor.schedule(self.name, *args, **kwargs)
-
-    def run(self, exec_visitor, *args, **kwargs):
-        if self._prepare_execution(exec_visitor):
-            exec_visitor.run(self.name, *args, **kwargs)
+    def explain(self, exec_visitor=None, analyze=False, parameters=None):
+        """Describes the compiled workflow as it would run: the nodes in topological order, the predicates
+        and projections pushed down into the sources, the parallelism, routing, caching and queues of the nodes.
+        With :analyze, the workflow is run with :exec_visitor and each node is annotated with the rows it read
+        and emitted, its time, the time it waited for its queues and the rows buffered for it."""
+        plan = self.compile()
+        if plan is None:
+            return f'Workflow {self.name} (invalid)'
+
+        broadcast = exec_visitor is None or exec_visitor.broadcast
+        if not analyze:
+            if not self._invalid_config:
+                self._push_down_predicates(plan)
+                self._push_down_projections(plan)
+            return explain_plan(plan, broadcast)
+
+        analyzer = self._analyzer = RunAnalyzer()
+        try:
+            exec_ok = self.run(exec_visitor, parameters=parameters)
+        finally:
+            self._analyzer = None
+        if analyzer.plan is None:
+            return f'Workflow {self.name} (not run)'
+        analyzer.status = 'SUCCESS' if exec_ok else 'FAILURE'
+        return explain_plan(analyzer.plan, broadcast, analyzer)
+
+    @staticmethod
+    def _set_run_parameters(plan, parameters):
+        nodes = {node.name: node for node in plan.nodes}
+        for name, kwargs in parameters.items():
+            if name not in nodes:
+                raise ConfigurationError(f"Run parameters given for unknown node {name}")
+            nodes[name].set_run_parameters(**kwargs)
+
+    async def schedule(self, exec_visitor, *args, parameters=None, **kwargs):
+        """Runs the workflow in the running event loop. :parameters maps node names to keyword arguments
+        that supersede the configuration of these nodes for this run only"""
+        if self._prepare_execution(exec_visitor, parameters):
+            try:
+                exec_ok = await exec_visitor.schedule(self.name, *args, **kwargs)
+            except BaseException:
+                self._complete_run(False)
+                raise
+            return self._complete_run(exec_ok)
+        return False
+
+    def run(self, exec_visitor, *args, parameters=None, **kwargs):
+        """Runs the workflow. A prepared workflow may be run many times with the same executor, :parameters
+        maps node names to keyword arguments that supersede the configuration of these nodes for this run only"""
+        if self._prepare_execution(exec_visitor, parameters):
+            try:
+                exec_ok = exec_visitor.run(self.name, *args, **kwargs)
+            except BaseException:
+                self._complete_run(False)
+                raise
+            return self._complete_run(exec_ok)
+        return False
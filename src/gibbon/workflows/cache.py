@@ -0,0 +1,255 @@
+import asyncio
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import types
+
+from .checkpoint import is_barrier
+
+
+CACHE_FORMAT_VERSION = 1
+
+# attributes describing the runtime state of a node rather than what it computes
+_RUNTIME_ATTRIBUTES = frozenset(('name', 'in_ports', 'out_ports', 'in_queues', 'out_queues', 'checkpoints',
+                                 'restored_state', 'incremental', 'watermark', 'next_watermark', 'cacheable',
+                                 'cached_result', 'io_executor', 'default_io_executor', 'read_ahead',
+                                 'in_flight', 'ordered_by', 'late_rows', 'gap_rows',
+                                 'memory'))
+# arguments completed by the executor in the configuration of the endpoints
+_RUNTIME_ARGUMENTS = frozenset(('loop', 'executor'))
+
+
+def _global_names(code):
+    """The names a code object and the functions it defines may read as globals"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _is_constant(value):
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return True
+    return isinstance(value, (tuple, frozenset)) and all(_is_constant(v) for v in value)
+
+
+def _describe_globals(func, depth, functions):
+    """Describes the functions, classes, modules and constants :func reads as globals. Other globals are
+    left out, being state such as a counter or a list of calls rather than what the function computes"""
+    namespace = getattr(func, '__globals__', {})
+    described = []
+    for name in sorted(_global_names(func.__code__)):
+        if name not in namespace:
+            continue
+        value = namespace[name]
+        if hasattr(value, '__code__') and value.__module__ != func.__module__:
+            # the functions of other modules, libraries included, are only named
+            described.append(f'{name}={value.__module__}.{value.__qualname__}')
+        elif hasattr(value, '__code__') or isinstance(value, (type, types.ModuleType)) or _is_constant(value):
+            described.append(f'{name}={_describe(value, depth + 1, functions)}')
+    return ', '.join(described)
+
+
+def _describe(value, depth=0, functions=()):
+    """A stable description of a configuration value. Values without a stable representation
+    are described by their default repr, which holds their address, and never match. Functions are
+    described by their code and the functions of their module, classes and constants it reads"""
+    if depth > 8:
+        return repr(value)
+
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        return repr(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_describe(v, depth + 1, functions) for v in value]
+        if isinstance(value, (set, frozenset)):
+            items.sort()
+        return f"{type(value).__name__}({', '.join(items)})"
+    if isinstance(value, dict):
+        items = sorted(f'{_describe(k, depth + 1, functions)}: {_describe(v, depth + 1, functions)}'
+                       for k, v in value.items())
+        return '{' + ', '.join(items) + '}'
+    if isinstance(value, type):
+        return f'{value.__module__}.{value.__qualname__}'
+    if isinstance(value, types.ModuleType):
+        return f'module {value.__name__}'
+    if isinstance(value, types.CodeType):
+        return f'code({value.co_code.hex()}:{_describe(value.co_consts, depth + 1, functions)})'
+
+    code = getattr(value, '__code__', None)
+    if code is not None:
+        name = f'{value.__module__}.{value.__qualname__}'
+        if value in functions:
+            # a recursive function
+            return name
+        functions = functions + (value,)
+        closure = [c.cell_contents for c in (value.__closure__ or ())]
+        return (f'{name}:{code.co_code.hex()}:'
+                f'{_describe(code.co_consts, depth + 1, functions)}:{_describe(closure, depth + 1, functions)}:'
+                f'{_describe(value.__defaults__, depth + 1, functions)}:'
+                f'{{{_describe_globals(value, depth, functions)}}}')
+    if hasattr(value, 'func') and hasattr(value, 'args') and hasattr(value, 'keywords'):
+        # functools.partial
+        return f'partial({_describe((value.func, value.args, value.keywords), depth + 1, functions)})'
+
+    return repr(value)
+
+
+def _file_stats(value):
+    """The size and modification time of the file :value names, of every file it matches when it is
+    a glob pattern, or of the files of a list of paths"""
+    if isinstance(value, (list, tuple)):
+        return ','.join(_file_stats(v) for v in value)
+    if not isinstance(value, (str, os.PathLike)):
+        return ''
+    if os.path.isfile(value):
+        stat = os.stat(value)
+        return f'{stat.st_size}:{stat.st_mtime_ns}'
+    if glob.has_magic(os.fspath(value)):
+        paths = sorted(glob.glob(os.fspath(value), recursive=True))
+        return '[' + ','.join(f'{path}={_file_stats(path)}' for path in paths if os.path.isfile(path)) + ']'
+    return ''
+
+
+def fingerprint(plan, node):
+    """Hashes what the output of :node depends on: the type and attributes of each node of its upstream
+    sub-DAG, how they are linked and the size and modification time of the files they read. Node names
+    are left out so that workflows sharing the same prefix share the same results. The data held by
+    mutable globals, such as a lookup table, is not hashed: a result depending on it must be invalidated
+    when it changes, see Workflow.invalidate_cache()."""
+    ancestors = {node}
+    for n in reversed(plan.nodes):
+        if n in ancestors:
+            ancestors.update(plan.sources[n])
+    ordered = [n for n in plan.nodes if n in ancestors]
+    index = {n: i for i, n in enumerate(ordered)}
+
+    digest = hashlib.sha256(f'gibbon-cache-{CACHE_FORMAT_VERSION}'.encode())
+    for n in ordered:
+        attributes = dict()
+        for k, v in vars(n).items():
+            if k in _RUNTIME_ATTRIBUTES or k.startswith('_'):
+                continue
+            if isinstance(v, dict):
+                v = {a: b for a, b in v.items() if a not in _RUNTIME_ARGUMENTS}
+            attributes[k] = v
+        inputs = [index[s] for s in plan.sources[n]]
+        read = dict(getattr(n, 'source_cfg', None) or {}, **(getattr(n, 'run_parameters', None) or {}))
+        stats = [_file_stats(v) for k, v in sorted(read.items()) if k not in _RUNTIME_ARGUMENTS]
+        digest.update(f'{_describe(type(n))}|{inputs}|{_describe(attributes)}|{stats}\n'.encode())
+    return digest.hexdigest()
+
+
+def read_batch(file_obj):
+    try:
+        return pickle.load(file_obj)
+    except EOFError:
+        return None
+
+
+class ResultCache:
+    """Materialized outputs of cacheable nodes, stored as files of a local directory named after the
+    fingerprint of each node. Reading a result makes it the most recently used one, the least recently
+    used results are evicted once the files exceed :max_size bytes."""
+    def __init__(self, directory, max_size=1 << 30):
+        self.directory = str(directory)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.rows')
+
+    def _entries(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.rows'):
+                yield entry
+
+    @property
+    def size(self):
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def lookup(self, key):
+        """Returns the path of the result of :key, None if it is not cached"""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def recorder(self, key, batch_size=1000):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f'.{key}.')
+        return CacheRecorder(self, key, os.fdopen(fd, 'wb'), tmp_path, batch_size)
+
+    def commit(self, key, tmp_path):
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime_ns)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_size:
+                break
+            total -= entry.stat().st_size
+            logging.info(f'Result cache: evicting {entry.name}')
+            os.remove(entry.path)
+
+    def invalidate(self, key=None):
+        """Removes the result of :key, or every result when :key is None"""
+        if key is not None:
+            paths = [self._path(key)]
+        else:
+            paths = [entry.path for entry in self._entries()]
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class CacheRecorder:
+    """Stands for an extra output queue of a cacheable node: the rows put in it are pickled by batches
+    to a temporary file, which becomes the cached result once the end of the stream is put"""
+    def __init__(self, cache, key, file_obj, tmp_path, batch_size):
+        self._cache = cache
+        self.key = key
+        self._file_obj = file_obj
+        self._tmp_path = tmp_path
+        self._batch_size = batch_size
+        self._rows = []
+        self.committed = False
+
+    def _write(self, rows, last=False):
+        if rows:
+            pickle.dump(rows, self._file_obj, protocol=pickle.HIGHEST_PROTOCOL)
+        if last:
+            self._file_obj.close()
+            self._cache.commit(self.key, self._tmp_path)
+            self.committed = True
+
+    async def put(self, row):
+        if is_barrier(row):
+            return
+
+        loop = asyncio.get_event_loop()
+        if row is None:
+            rows, self._rows = self._rows, []
+            await loop.run_in_executor(None, self._write, rows, True)
+        else:
+            self._rows.append(row)
+            if len(self._rows) >= self._batch_size:
+                rows, self._rows = self._rows, []
+                await loop.run_in_executor(None, self._write, rows)
+
+    def discard(self):
+        """Drops an incomplete result"""
+        if self.committed:
+            return
+        self._file_obj.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
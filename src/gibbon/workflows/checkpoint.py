@@ -0,0 +1,136 @@
+import logging
+import os
+import pickle
+import tempfile
+
+
+class Finished:
+    """State of a node that completed its stream before a checkpoint, it has nothing left to do on resume
+    but to hand over the watermark it had reached (see Workflow.set_incremental())"""
+    def __init__(self, watermark=None):
+        self.watermark = watermark
+
+    def __repr__(self):
+        return 'FINISHED'
+
+
+FINISHED = Finished()
+
+NOT_RESTORABLE = object()
+
+
+class Barrier:
+    """A checkpoint marker flowing through the queues along with the rows. Every node acknowledges it
+    with a snapshot of its state before forwarding it, nodes with several inputs wait for the barrier
+    on each of them. Rows before a barrier are all included in the checkpoint, rows after are not."""
+    __slots__ = ('id', 'coordinator')
+
+    def __init__(self, checkpoint_id, coordinator):
+        self.id = checkpoint_id
+        self.coordinator = coordinator
+
+    def acknowledge(self, node, state=None):
+        self.coordinator.acknowledge(self.id, node.name, state)
+
+    def __repr__(self):
+        return f'Barrier({self.id})'
+
+
+def is_barrier(o):
+    return type(o) is Barrier
+
+
+class CheckpointStore:
+    """Persists pickled snapshots to files of a local directory, one file per key. Files are replaced
+    atomically, a store holds the last complete checkpoint of each workflow."""
+    def __init__(self, directory):
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.pickle')
+
+    def save(self, key, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f'.{key}.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def clear(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class CheckpointCoordinator:
+    """Collects the snapshots of the nodes of a workflow run. A checkpoint is complete once every node
+    acknowledged its barrier or finished its stream, it is then saved to the store and supersedes
+    the previous one. Snapshots are pickled when acknowledged so that nodes may go on mutating their state."""
+    def __init__(self, name, store, node_names, interval, last_id=0):
+        self.name = name
+        self.store = store
+        self.interval = interval
+        self.last_id = last_id
+        self._expected = frozenset(node_names)
+        self._pending = dict()
+        self._finished = dict()
+        self._discarded = set()
+
+    def barrier(self, checkpoint_id):
+        return Barrier(checkpoint_id, self)
+
+    def acknowledge(self, checkpoint_id, name, state=None):
+        if checkpoint_id <= self.last_id or checkpoint_id in self._discarded:
+            return
+
+        if state is NOT_RESTORABLE:
+            logging.warning(f'{self.name}: checkpoint {checkpoint_id} discarded, {name} cannot be restored')
+            self._discarded.add(checkpoint_id)
+            self._pending.pop(checkpoint_id, None)
+            return
+
+        self._pending.setdefault(checkpoint_id, dict())[name] = pickle.dumps(state)
+        self._try_complete()
+
+    def finish(self, name, state=FINISHED):
+        if not isinstance(state, Finished):
+            state = Finished(state)
+        self._finished[name] = pickle.dumps(state)
+        self._try_complete()
+
+    def _try_complete(self):
+        for checkpoint_id in sorted(self._pending):
+            states = self._pending[checkpoint_id]
+            if not all(n in states or n in self._finished for n in self._expected):
+                continue
+
+            snapshot = {n: pickle.loads(states.get(n, self._finished.get(n))) for n in self._expected}
+            self.store.save(self.name, {'id': checkpoint_id, 'states': snapshot})
+            logging.info(f'{self.name}: checkpoint {checkpoint_id} saved')
+            self.last_id = checkpoint_id
+            for older in [i for i in self._pending if i <= checkpoint_id]:
+                del self._pending[older]
+
+    def restore(self):
+        """Returns the node states of the last saved checkpoint, if any"""
+        snapshot = self.store.load(self.name)
+        if snapshot is None:
+            return dict()
+        self.last_id = snapshot['id']
+        logging.info(f'{self.name}: resuming from checkpoint {self.last_id}')
+        return snapshot['states']
@@ -10,6 +10,9 @@ class Configuration:
             logging.warning(f'Attempting to supersede configuration of {name}')
         self._cfg[name] = (args, kwargs)
 
+    def get_configuration(self, name):
+        return self._cfg.get(name)
+
     def set_configuration(self, transformation):
         try:
             if transformation.name in self._cfg:
@@ -18,6 +18,10 @@ class NodeNotFound(BaseBuildError):
     pass
 
 
+class NodeCycleError(BaseBuildError):
+    pass
+
+
 class FeatureNotSupportedError(BaseBuildError):
     pass
 
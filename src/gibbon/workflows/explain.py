@@ -0,0 +1,190 @@
+import time
+
+from .checkpoint import is_barrier
+from .memory import estimate_size
+from ..execution.stepping import StepHooks, stepped
+
+
+class NodeStatistics:
+    """What a node did during an analyzed run. :busy is the time its job ran on the event loop, :input_wait and
+    :output_wait the time it waited for rows and for room in its output queues, so that the rest of :elapsed was
+    spent awaiting something else, typically the I/O executor. :peak_buffered is the highest number of rows
+    waiting in its input queues, :row_size an estimate of the size of a row in bytes."""
+    def __init__(self):
+        self.rows_in = 0
+        self.puts = []
+        self.elapsed = 0.0
+        self.busy = 0.0
+        self.input_wait = 0.0
+        self.output_wait = 0.0
+        self.peak_buffered = 0
+        self.row_size = None
+
+    def rows_out(self, broadcast):
+        # a broadcasting node puts each row in every output queue, other nodes share rows among them
+        if not self.puts:
+            return 0
+        return max(self.puts) if broadcast else sum(self.puts)
+
+    @property
+    def peak_memory(self):
+        """Estimated peak size in bytes of the rows buffered in the input queues"""
+        return self.peak_buffered * (self.row_size or 0)
+
+
+class _InputQueue:
+    """Consumer side of a queue of an analyzed run"""
+    def __init__(self, queue, stats):
+        self._queue = queue
+        self._stats = stats
+
+    def __getattr__(self, item):
+        return getattr(self._queue, item)
+
+    async def get(self):
+        stats = self._stats
+        stats.peak_buffered = max(stats.peak_buffered, self._queue.qsize())
+        start = time.perf_counter()
+        row = await self._queue.get()
+        stats.input_wait += time.perf_counter() - start
+        if row is not None and not is_barrier(row):
+            stats.rows_in += 1
+            if stats.row_size is None and isinstance(row, tuple):
+                stats.row_size = estimate_size(row)
+        return row
+
+
+class _OutputQueue:
+    """Producer side of a queue of an analyzed run"""
+    def __init__(self, queue, stats, index):
+        self._queue = queue
+        self._stats = stats
+        self._index = index
+
+    def __getattr__(self, item):
+        return getattr(self._queue, item)
+
+    async def put(self, row):
+        start = time.perf_counter()
+        await self._queue.put(row)
+        self._stats.output_wait += time.perf_counter() - start
+        if row is not None and not is_barrier(row):
+            self._stats.puts[self._index] += 1
+
+
+class _BusyTime(StepHooks):
+    """Adds the time of each step to the busy time of :stats"""
+    def __init__(self, stats):
+        self._stats = stats
+        self._start = None
+
+    def before_step(self):
+        self._start = time.perf_counter()
+
+    def after_step(self):
+        self._stats.busy += time.perf_counter() - self._start
+
+
+class RunAnalyzer:
+    """Collects the NodeStatistics of a run, see Workflow.explain()"""
+    def __init__(self):
+        self.plan = None
+        self.replayed = set()
+        self.statistics = dict()
+        self.status = None
+
+    def attach(self, plan, exec_visitor):
+        """Instruments the queues and the jobs of :plan once loaded by :exec_visitor"""
+        self.plan = plan
+        self.replayed = {node for node in plan.nodes if node.cached_result is not None}
+        self.statistics = {node.name: NodeStatistics() for node in plan.nodes}
+        for node in plan.nodes:
+            stats = self.statistics[node.name]
+            node.in_queues = [_InputQueue(q, stats) for q in node.in_queues]
+            stats.puts = [0] * len(node.out_queues)
+            node.out_queues = [_OutputQueue(q, stats, i) for i, q in enumerate(node.out_queues)]
+        exec_visitor.wrap_jobs(self._wrap)
+
+    def _wrap(self, name, coro_func):
+        stats = self.statistics[name]
+
+        async def job():
+            start = time.perf_counter()
+            try:
+                return await stepped(coro_func(), _BusyTime(stats))
+            finally:
+                stats.elapsed = time.perf_counter() - start
+        return job
+
+
+def _details(node, plan, replayed):
+    details = []
+    if getattr(node, 'pushed_predicate', None) is not None:
+        details.append(f'predicate: {node.pushed_predicate!r}')
+    if getattr(node, 'pushed_projection', None) is not None:
+        details.append(f'projection: {node.pushed_projection}')
+    if getattr(node, 'pushed_down', False):
+        details.append('condition pushed down')
+    if getattr(node, 'parallelism', 1) > 1:
+        runner = 'processes' if node.processes else 'threads'
+        key = 'round-robin' if node.partition_key is None else 'hash'
+        detail = f'parallelism: {node.parallelism} {runner}, {key}, batches of {node.batch_size}'
+        if node.linger is not None:
+            detail += f' or {node.linger}s'
+        details.append(detail)
+    if not node.broadcast:
+        detail = f'routes rows to {len(plan.targets[node])} targets'
+        if hasattr(node, 'key'):
+            detail += ' by hash' if node.key is not None else ' round-robin'
+        details.append(detail)
+    if node in replayed:
+        details.append('replayed from the result cache')
+    elif node.cacheable:
+        details.append('cacheable')
+    return details
+
+
+def _queue(node, plan, broadcast):
+    targets = plan.targets[node]
+    if not targets:
+        return None
+    if broadcast and node.broadcast and len(targets) > 1:
+        return f'queue: 1 unbounded broadcast queue read by {len(targets)} targets'
+    return f'queue: {len(targets)} unbounded fifo queue' + ('s' if len(targets) > 1 else '')
+
+
+def _format_time(seconds):
+    return f'{seconds * 1000:.1f}ms'
+
+
+def _format_statistics(node, stats):
+    line = f'actual: rows in={stats.rows_in} out={stats.rows_out(node.broadcast)}'
+    line += f', time={_format_time(stats.elapsed)} busy={_format_time(stats.busy)}'
+    line += f', waits input={_format_time(stats.input_wait)} output={_format_time(stats.output_wait)}'
+    if stats.peak_buffered:
+        line += f', peak buffered={stats.peak_buffered} rows (~{stats.peak_memory / 1024:.1f}KiB)'
+    return line
+
+
+def explain_plan(plan, broadcast=True, analyzer=None):
+    """Describes each node of :plan in topological order, with the statistics collected by :analyzer if any"""
+    lines = [f'Workflow {plan.name}']
+    if analyzer is not None:
+        lines[0] += f' ({analyzer.status})'
+
+    for node in plan.nodes:
+        header = f'  {node.name} ({type(node).__name__})'
+        sources = plan.sources[node]
+        if sources:
+            header += ' <- ' + ', '.join(s.name for s in sources)
+        lines.append(header)
+
+        details = _details(node, plan, set() if analyzer is None else analyzer.replayed)
+        queue = _queue(node, plan, broadcast)
+        if queue is not None:
+            details.append(queue)
+        lines.extend(f'      {detail}' for detail in details)
+
+        if analyzer is not None and node.name in analyzer.statistics:
+            lines.append(f'      {_format_statistics(node, analyzer.statistics[node.name])}')
+    return '\n'.join(lines)
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import pickle
+import sys
+import tempfile
+
+from .cache import read_batch
+
+
+def estimate_size(row):
+    """Estimated size in bytes of a row and of its values"""
+    if isinstance(row, (tuple, list)):
+        return sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+    return sys.getsizeof(row)
+
+
+def spill(rows, directory=None, batch_size=1000):
+    """Writes :rows to a temporary file of :directory by pickled batches and returns its path"""
+    fd, path = tempfile.mkstemp(dir=directory, prefix='gibbon-spill-')
+    with os.fdopen(fd, 'wb') as f:
+        for i in range(0, len(rows), batch_size):
+            pickle.dump(rows[i:i+batch_size], f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def read_spilled(path):
+    """Iterates over the rows of a spilled file, which is removed once read"""
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                rows = read_batch(f)
+                if rows is None:
+                    break
+                yield from rows
+    finally:
+        os.remove(path)
+
+
+class _GovernedQueue:
+    """Consumer side of a queue of a run under a memory budget, waking the paused sources at each row read"""
+    def __init__(self, queue, governor):
+        self._queue = queue
+        self._governor = governor
+
+    def __getattr__(self, item):
+        return getattr(self._queue, item)
+
+    async def get(self):
+        row = await self._queue.get()
+        self._governor.wake()
+        return row
+
+
+class MemoryAccount:
+    """The estimated memory of a node: the rows or the state it keeps, and the rows waiting in its input queues.
+    Nodes add what they keep and release it once spilled, add() telling them when the governor wants them
+    to spill. A node that spills what it does not already keep freezes its state, which no longer counts in
+    the pressure the governor relieves."""
+    def __init__(self, governor, node):
+        self.governor = governor
+        self.node = node
+        self.state = 0
+        self.peak = 0
+        self.spills = 0
+        self.spilled_rows = 0
+        self.spill_requested = False
+        self.frozen = False
+        self._added = 0
+
+    @property
+    def spill_dir(self):
+        return self.governor.spill_dir
+
+    @property
+    def queued(self):
+        rows = sum(q.qsize() for q in self.node.in_queues)
+        return rows * self.governor.row_size
+
+    @property
+    def usage(self):
+        return self.state + self.queued
+
+    @property
+    def pressure(self):
+        """The usage that spilling or pausing the sources may lower"""
+        return self.queued if self.frozen else self.usage
+
+    def add(self, item, size=None):
+        """Accounts for an :item kept by the node, returns whether the node should spill"""
+        self._added += 1
+        if size is None:
+            if (self._added - 1) % self.governor.sample == 0:
+                self.governor.sample_row(item)
+            size = self.governor.row_size
+        self.state += size
+        if self._added % self.governor.sample == 0:
+            self.governor.check()
+        return self.spill_requested
+
+    def spilled(self, rows):
+        """Releases the state of a node that wrote :rows to disk"""
+        self.peak = max(self.peak, self.usage)
+        self.state = 0
+        self.spills += 1
+        self.spilled_rows += rows
+        self.spill_requested = False
+        self.governor.wake()
+
+    def freeze(self):
+        """The state of the node no longer grows, the rows it does not keep being written to disk"""
+        self.peak = max(self.peak, self.usage)
+        self.frozen = True
+        self.spill_requested = False
+        self.governor.wake()
+
+    def release(self):
+        """Releases the state of a node at the end of its stream"""
+        self.peak = max(self.peak, self.usage)
+        self.state = 0
+        self.frozen = False
+        self.governor.wake()
+
+
+class MemoryGovernor:
+    """Keeps the estimated memory of the nodes of a run under a :budget in bytes. Every :sample rows, sources
+    and stateful nodes have the governor check the usage: above the budget, the largest node able to spill
+    its state to :spill_dir is asked to, and sources pause while rows wait in the queues, at most :max_pause
+    seconds at a time so that a run waiting for a source to go on never stalls, pauses counting these waits.
+    Paused sources are woken up whenever a node reads a row or releases its state.
+    Row sizes are estimated from one row every :sample rows."""
+    def __init__(self, budget, spill_dir=None, sample=100, max_pause=0.1):
+        self.budget = budget
+        self.spill_dir = spill_dir
+        self.sample = sample
+        self.max_pause = max_pause
+        self.accounts = dict()
+        self.row_size = 0
+        self.pauses = 0
+        self._sampled = 0
+        self._source_rows = 0
+        self._released = None
+
+    def attach(self, plan):
+        """Accounts for the nodes of a run plan, whose queues are already created"""
+        self.accounts = dict()
+        self.row_size = 0
+        self.pauses = 0
+        self._sampled = 0
+        self._source_rows = 0
+        self._released = None
+        for node in plan.nodes:
+            node.memory = self.accounts[node.name] = MemoryAccount(self, node)
+            node.in_queues = [_GovernedQueue(q, self) for q in node.in_queues]
+
+    def wake(self):
+        """Wakes up the paused sources so that they check the pressure again"""
+        if self._released is not None:
+            self._released.set()
+            self._released = None
+
+    def sample_row(self, row):
+        self._sampled += 1
+        self.row_size += (estimate_size(row) - self.row_size) / self._sampled
+
+    @property
+    def usage(self):
+        return sum(account.usage for account in self.accounts.values())
+
+    @property
+    def queued(self):
+        return sum(account.queued for account in self.accounts.values())
+
+    @property
+    def pressure(self):
+        return sum(account.pressure for account in self.accounts.values())
+
+    def check(self):
+        """Updates the peak usage of the nodes and asks the largest one able to spill to do so when
+        the pressure exceeds the budget"""
+        pressure = 0
+        for account in self.accounts.values():
+            account.peak = max(account.peak, account.usage)
+            pressure += account.pressure
+        if pressure <= self.budget:
+            return False
+
+        candidates = [a for a in self.accounts.values()
+                      if a.node.spillable and a.state > 0 and not a.spill_requested and not a.frozen]
+        if candidates:
+            max(candidates, key=lambda a: a.state).spill_requested = True
+        return True
+
+    async def throttle(self, row):
+        """Called by sources for each row they output"""
+        self._source_rows += 1
+        if (self._source_rows - 1) % self.sample != 0:
+            return
+        self.sample_row(row)
+        if not self.check():
+            return
+
+        if self.queued == 0:
+            return
+        self.pauses += 1
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.max_pause
+        while self.queued > 0 and self.pressure > self.budget:
+            if self._released is None:
+                self._released = asyncio.Event()
+            try:
+                await asyncio.wait_for(self._released.wait(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                break
+
+    def report(self):
+        """The estimated peak memory in bytes of each node of the last run"""
+        return {name: account.peak for name, account in self.accounts.items()}
@@ -0,0 +1,85 @@
+from collections import deque
+from .exceptions import NodeCycleError
+
+
+class ExecutionPlan:
+    """A compiled workflow: its nodes in topological order, their precomputed adjacency and, once
+    the workflow is prepared, the configuration resolved for each node. A plan is built once by
+    Workflow.compile() and may be loaded by any executor, as many times as needed."""
+    def __init__(self, name, nodes, sources, targets):
+        self.name = name
+        self.nodes = tuple(nodes)
+        self.sources = sources
+        self.targets = targets
+        self.roots = tuple(n for n in self.nodes if not self.sources[n])
+        self.links = tuple((s, t) for s in self.nodes for t in self.targets[s])
+        self.configuration = dict()
+
+    @classmethod
+    def compile(cls, name, nodes):
+        # nodes linked after a build warning may be connected without being registered, collect them too
+        sources = dict()
+        targets = dict()
+        discovered = deque(nodes)
+        nodes = []
+        while discovered:
+            node = discovered.popleft()
+            if node in sources:
+                continue
+            nodes.append(node)
+            sources[node] = tuple(node.sources)
+            targets[node] = tuple(node.targets)
+            discovered.extend(n for n in sources[node] + targets[node] if n not in sources)
+
+        in_degrees = {n: len(sources[n]) for n in nodes}
+        ready = deque(n for n in nodes if in_degrees[n] == 0)
+        ordered = []
+        while ready:
+            node = ready.popleft()
+            ordered.append(node)
+            for target in targets[node]:
+                in_degrees[target] -= 1
+                if in_degrees[target] == 0:
+                    ready.append(target)
+
+        if len(ordered) != len(nodes):
+            cyclic = ', '.join(n.name for n in nodes if in_degrees[n] > 0)
+            raise NodeCycleError(f'Workflow {name} has a cycle through {cyclic}')
+
+        return cls(name, ordered, sources, targets)
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def fan_out(self, node):
+        return len(self.targets[node])
+
+    def prune(self, replayed):
+        """Returns the plan of a run where the nodes of :replayed output a cached result: they lose their
+        sources, as well as the upstream nodes that feed nothing else"""
+        pruned = set()
+        for node in reversed(self.nodes):
+            if node not in replayed and self.targets[node] and \
+                    all(t in pruned or t in replayed for t in self.targets[node]):
+                pruned.add(node)
+
+        sources = {n: () if n in replayed else self.sources[n] for n in self.nodes if n not in pruned}
+        targets = {n: tuple(t for t in self.targets[n] if t not in pruned and t not in replayed)
+                   for n in sources}
+        plan = ExecutionPlan(self.name, [n for n in self.nodes if n not in pruned], sources, targets)
+        plan.configuration = self.configuration
+        return plan
+
+    def configure(self, cfg_visitor):
+        self.configuration.clear()
+        for node in self.nodes:
+            cfg_visitor.set_configuration(node)
+            self.configuration[node.name] = cfg_visitor.get_configuration(node.name)
+
+    def reset(self, cfg_visitor):
+        for node in self.nodes:
+            cfg_visitor.reset_configuration(node)
+        self.configuration.clear()
@@ -0,0 +1,242 @@
+import operator
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _placeholder(params, value):
+    if isinstance(params, dict):
+        key = f'_p{len(params)}'
+        params[key] = value
+        return f':{key}'
+    params.append(value)
+    return '?'
+
+
+class Predicate:
+    """A condition on rows expressed declaratively with col(), so that it can be evaluated by a source
+    instead of a Filter (see Workflow._push_down_predicates). A predicate is a callable and can be used as
+    the condition of a Filter as is. Column references are either indices in the row or column names, the
+    latter being only known to sources with a schema. Comparisons with None are false, and so are they
+    in the SQL conditions."""
+    def __call__(self, row):
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def columns(self):
+        """The column references the predicate depends on"""
+        raise NotImplementedError
+
+    def remap(self, mapping):
+        """Returns the same predicate where the column references found in :mapping are replaced"""
+        raise NotImplementedError
+
+    def bind(self, names):
+        """Returns the same predicate where column names are replaced by their indices in :names"""
+        return self.remap({name: i for i, name in enumerate(names)})
+
+    def to_sql(self, names, params):
+        """Returns a SQL condition where column indices refer to :names, appending the values
+        to :params (a list for '?' placeholders, a dict for named ones)"""
+        raise NotImplementedError
+
+
+class Column:
+    def __init__(self, ref):
+        self.ref = ref
+
+    def _compare(self, op, value):
+        return Comparison(self.ref, op, value)
+
+    def __eq__(self, value):
+        return self._compare('==', value)
+
+    def __ne__(self, value):
+        return self._compare('!=', value)
+
+    def __lt__(self, value):
+        return self._compare('<', value)
+
+    def __le__(self, value):
+        return self._compare('<=', value)
+
+    def __gt__(self, value):
+        return self._compare('>', value)
+
+    def __ge__(self, value):
+        return self._compare('>=', value)
+
+    def is_in(self, values):
+        return IsIn(self.ref, values)
+
+    def is_null(self):
+        return IsNull(self.ref)
+
+    def not_null(self):
+        return Not(IsNull(self.ref))
+
+    __hash__ = None
+
+
+def col(ref):
+    """References a column by its index in the row or by its name"""
+    return Column(ref)
+
+
+class _ColumnPredicate(Predicate):
+    def __init__(self, ref):
+        self.ref = ref
+        self._index = ref if isinstance(ref, int) else None
+
+    def _value(self, row):
+        if self._index is None:
+            raise ValueError(f'Column {self.ref!r} is referenced by name, it cannot be evaluated on a tuple')
+        return row[self._index]
+
+    def columns(self):
+        return {self.ref}
+
+    def _column_sql(self, names):
+        return _quote(names[self.ref] if isinstance(self.ref, int) else self.ref)
+
+
+class Comparison(_ColumnPredicate):
+    _OPERATORS = {
+        '==': (operator.eq, '='),
+        '!=': (operator.ne, '<>'),
+        '<': (operator.lt, '<'),
+        '<=': (operator.le, '<='),
+        '>': (operator.gt, '>'),
+        '>=': (operator.ge, '>='),
+    }
+
+    def __init__(self, ref, op, value):
+        super().__init__(ref)
+        if op not in self._OPERATORS:
+            raise ValueError(f'Unsupported comparison operator {op}')
+        self.op = op
+        self.value = value
+        self._func = self._OPERATORS[op][0]
+
+    def __call__(self, row):
+        v = self._value(row)
+        return v is not None and self.value is not None and self._func(v, self.value)
+
+    def remap(self, mapping):
+        return Comparison(mapping.get(self.ref, self.ref), self.op, self.value)
+
+    def to_sql(self, names, params):
+        if self.value is None:
+            return '0'
+        column = self._column_sql(names)
+        op = self._OPERATORS[self.op][1]
+        return f'({column} IS NOT NULL AND {column} {op} {_placeholder(params, self.value)})'
+
+    def __repr__(self):
+        return f'col({self.ref!r}) {self.op} {self.value!r}'
+
+
+class IsIn(_ColumnPredicate):
+    def __init__(self, ref, values):
+        super().__init__(ref)
+        self.values = tuple(values)
+        self._set = frozenset(self.values)
+
+    def __call__(self, row):
+        v = self._value(row)
+        return v is not None and v in self._set
+
+    def remap(self, mapping):
+        return IsIn(mapping.get(self.ref, self.ref), self.values)
+
+    def to_sql(self, names, params):
+        if not self.values:
+            return '0'
+        column = self._column_sql(names)
+        placeholders = ', '.join(_placeholder(params, v) for v in self.values)
+        return f'({column} IS NOT NULL AND {column} IN ({placeholders}))'
+
+    def __repr__(self):
+        return f'col({self.ref!r}).is_in({self.values!r})'
+
+
+class IsNull(_ColumnPredicate):
+    def __call__(self, row):
+        return self._value(row) is None
+
+    def remap(self, mapping):
+        return IsNull(mapping.get(self.ref, self.ref))
+
+    def to_sql(self, names, params):
+        return f'{self._column_sql(names)} IS NULL'
+
+    def __repr__(self):
+        return f'col({self.ref!r}).is_null()'
+
+
+class And(Predicate):
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def __call__(self, row):
+        return all(p(row) for p in self.predicates)
+
+    def columns(self):
+        return set().union(*(p.columns() for p in self.predicates))
+
+    def remap(self, mapping):
+        return And(*(p.remap(mapping) for p in self.predicates))
+
+    def to_sql(self, names, params):
+        return '(' + ' AND '.join(p.to_sql(names, params) for p in self.predicates) + ')'
+
+    def __repr__(self):
+        return '(' + ' & '.join(repr(p) for p in self.predicates) + ')'
+
+
+class Or(And):
+    def __call__(self, row):
+        return any(p(row) for p in self.predicates)
+
+    def remap(self, mapping):
+        return Or(*(p.remap(mapping) for p in self.predicates))
+
+    def to_sql(self, names, params):
+        return '(' + ' OR '.join(p.to_sql(names, params) for p in self.predicates) + ')'
+
+    def __repr__(self):
+        return '(' + ' | '.join(repr(p) for p in self.predicates) + ')'
+
+
+class Not(Predicate):
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def __call__(self, row):
+        return not self.predicate(row)
+
+    def columns(self):
+        return self.predicate.columns()
+
+    def remap(self, mapping):
+        return Not(self.predicate.remap(mapping))
+
+    def to_sql(self, names, params):
+        # comparisons are never NULL in SQL either, see above
+        return f'NOT ({self.predicate.to_sql(names, params)})'
+
+    def __repr__(self):
+        return f'~{self.predicate!r}'
+
+
+def is_predicate(o):
+    return isinstance(o, Predicate)
@@ -3,9 +3,11 @@ from .endpoints import *
 from .enumerator import *
 from .expression import *
 from .filter import *
+from .partition import *
 from .projector import *
 from .selector import *
 from .sorter import *
 from .union import *
+from .windows import *
 
 
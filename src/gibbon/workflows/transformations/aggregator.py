@@ -1,4 +1,13 @@
 from .base import OneToMany
+from .windows import WindowState
+from ..checkpoint import Barrier
+from ..memory import read_spilled
+import asyncio
+import itertools
+import os
+import pickle
+import tempfile
+import time
 
 
 def row_count():
@@ -13,37 +22,221 @@ def simple_sum(field_index):
     return _sum_on
 
 
+class _SpilledRows:
+    """The rows of the keys an Aggregator no longer keeps in memory, written by hash of their key
+    to :partitions files so that each file can be aggregated on its own"""
+    def __init__(self, directory, partitions=16, batch_size=1000):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.files = [None] * partitions
+        self.paths = [None] * partitions
+        self.batches = [[] for _ in range(partitions)]
+        self.rows = 0
+
+    def _dump(self, i, rows):
+        if self.files[i] is None:
+            fd, self.paths[i] = tempfile.mkstemp(dir=self.directory, prefix='gibbon-spill-')
+            self.files[i] = os.fdopen(fd, 'wb')
+        pickle.dump(rows, self.files[i], protocol=pickle.HIGHEST_PROTOCOL)
+
+    async def _write(self, i):
+        rows, self.batches[i] = self.batches[i], []
+        await asyncio.get_event_loop().run_in_executor(None, self._dump, i, rows)
+
+    async def add(self, key, row):
+        i = hash(key) % len(self.batches)
+        self.batches[i].append(row)
+        self.rows += 1
+        if len(self.batches[i]) >= self.batch_size:
+            await self._write(i)
+
+    async def partitions(self):
+        """Writes the last rows and returns the files"""
+        for i, batch in enumerate(self.batches):
+            if batch:
+                await self._write(i)
+        self.close()
+        return [path for path in self.paths if path is not None]
+
+    def close(self):
+        for f in self.files:
+            if f is not None:
+                f.close()
+
+    def discard(self):
+        self.close()
+        for path in self.paths:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+
 class Aggregator(OneToMany):
     '''This transformation accepts a stream of rows and compute some accumulators through a function
     the parameter :key accepts a row and return row that is a subset of the fields of the row
     the parameter :accumulator is a callable that accepts an input row and somme accumulator. It must output a row containing
     the values of each of the accumulator.
-    the parameter :initializer is used to set the starting value of the accumulators as a tuple'''
-    def __init__(self, name, key, accumulator, initializer, out_ports=1):
+    the parameter :initializer is used to set the starting value of the accumulators as a tuple
+    In incremental runs the accumulators are merged into those of the previous runs and only the updated
+    ones are output.
+    With a :window (TumblingWindow, SlidingWindow or SessionWindow) the stream may be unbounded: the accumulators
+    are computed per window and output as (*key, start, end, value) as soon as the window closes, its state being
+    evicted. Windows are based on the time :event_time returns for each row, or on the processing time (:clock)
+    when it is None. In event time, a window closes once rows :allowed_lateness later than its end have been read,
+    rows coming after their windows closed are dropped and counted in late_rows, rows between two sliding windows
+    in gap_rows. In processing time, windows close on time even when no row comes.
+    When the memory governor asks for it, the accumulators kept in memory are still updated but the rows of the
+    other keys are spilled to files, each of them being aggregated once the accumulators in memory are output.'''
+    def __init__(self, name, key, accumulator, initializer, out_ports=1, window=None, event_time=None,
+                 allowed_lateness=0, clock=time.time):
         super().__init__(name, out_ports)
         self.key = key
         self.func = accumulator
         self.initializer = initializer
+        self.window = window
+        self.event_time = event_time
+        self.allowed_lateness = allowed_lateness
+        self.clock = clock
+        self.late_rows = 0
+        self.gap_rows = 0
 
-    def get_async_job(self):
-        async def job():
+    @property
+    def spillable(self):
+        # the state of windows, incremental runs and checkpoints is the accumulators
+        return self.window is None and not self.incremental and self.checkpoints is None
+
+    async def _aggregate_spilled(self, path):
+        loop = asyncio.get_event_loop()
+        rows = read_spilled(path)
+        try:
             buffer = dict()
             while True:
-                row = await self.in_queues[0].get()
+                batch = await loop.run_in_executor(None, list, itertools.islice(rows, 1000))
+                if not batch:
+                    break
+                for row in batch:
+                    key = self.key(row)
+                    buffer[key] = self.func(row, *buffer.get(key, self.initializer))
+        finally:
+            rows.close()
+        for key, value in buffer.items():
+            for q in self.out_queues:
+                await q.put((*key, value[0]))
+
+    async def _emit_all(self, rows):
+        for row in rows:
+            for q in self.out_queues:
+                await q.put(row)
+
+    async def _next_row(self, state):
+        """The next row, or the end of the stream, or a None timestamp when a window closes in processing time"""
+        queue = self.in_queues[0]
+        deadline = state.next_deadline() if self.event_time is None else None
+        if deadline is None:
+            return await queue.get(), None
+        timeout = max(deadline - self.clock(), 0)
+        try:
+            return await asyncio.wait_for(queue.get(), timeout), None
+        except asyncio.TimeoutError:
+            return None, deadline
+
+    def get_windowed_async_job(self):
+        async def job():
+            state = WindowState(self.window, self.key, self.func, self.initializer)
+            if self.restored_state is not None:
+                state.set_state(self.restored_state)
+            max_time = None
+
+            while True:
+                row, deadline = await self._next_row(state)
+                if deadline is not None:
+                    await self._emit_all(state.advance(deadline))
+                    continue
                 if row is None:
                     break
+                elif type(row) is Barrier:
+                    row.acknowledge(self, state.get_state())
+                    for q in self.out_queues:
+                        await q.put(row)
+                    continue
 
-                if self.key(row) in buffer:
-                    buffer[self.key(row)] = self.func(row, *buffer[self.key(row)])
+                if self.event_time is None:
+                    t = self.clock()
+                    state.add(row, t)
+                    await self._emit_all(state.advance(t))
                 else:
-                    buffer[self.key(row)] = self.func(row, *self.initializer)
+                    t = self.event_time(row)
+                    state.add(row, t)
+                    if max_time is None or t > max_time:
+                        max_time = t
+                        await self._emit_all(state.advance(max_time - self.allowed_lateness))
+
+            await self._emit_all(state.flush())
+            self.late_rows = state.late_rows
+            self.gap_rows = state.gap_rows
+            for q in self.out_queues:
+                await q.put(None)
+            self.finish()
+
+        return job
+
+    def get_async_job(self):
+        if self.window is not None:
+            return self.get_windowed_async_job()
+
+        async def job():
+            memory = self.memory
+            spilled = None
+            if self.restored_state is not None:
+                buffer, updated = self.restored_state
+            else:
+                buffer = dict(self.watermark or {}) if self.incremental else dict()
+                updated = set()
+
+            try:
+                while True:
+                    row = await self.in_queues[0].get()
+                    if row is None:
+                        break
+                    elif type(row) is Barrier:
+                        row.acknowledge(self, (buffer, updated))
+                        for q in self.out_queues:
+                            await q.put(row)
+                        continue
+
+                    key = self.key(row)
+                    if key in buffer:
+                        buffer[key] = self.func(row, *buffer[key])
+                    elif spilled is not None:
+                        await spilled.add(key, row)
+                        continue
+                    else:
+                        buffer[key] = self.func(row, *self.initializer)
+                        if memory is not None and memory.add(row) and self.spillable:
+                            # the accumulators in memory are kept, the rows of the other keys go to disk
+                            spilled = _SpilledRows(memory.spill_dir)
+                            memory.freeze()
+                    updated.add(key)
 
-            for key, value in buffer.items():
-                for q in self.out_queues:
-                    await q.put((*key, value[0]))
+                for key, value in buffer.items():
+                    if key in updated:
+                        for q in self.out_queues:
+                            await q.put((*key, value[0]))
+                if spilled is not None:
+                    for path in await spilled.partitions():
+                        await self._aggregate_spilled(path)
+            finally:
+                if spilled is not None:
+                    spilled.discard()
+            if memory is not None:
+                if spilled is not None:
+                    memory.spilled(spilled.rows)
+                memory.release()
 
             for q in self.out_queues:
                 await q.put(None)
+            if self.incremental:
+                self.next_watermark = buffer
+            self.finish()
 
         return job
 
@@ -1,8 +1,14 @@
 from abc import abstractmethod
-from ..exceptions import TargetAssignmentError
+import asyncio
+from ..exceptions import TargetAssignmentError, ConfigurationError
+from ..checkpoint import Finished
+from ..cache import read_batch
 
 
 class Transformation:
+    # every target receives the same rows, so that fan-out edges may share a single broadcast queue
+    broadcast = True
+
     def __init__(self, name, in_ports, out_ports):
         self.name = name
         self.in_ports = dict()
@@ -10,6 +16,14 @@ class Transformation:
         self._initialize_ports(in_ports, out_ports)
         self.in_queues = []
         self.out_queues = []
+        self.checkpoints = None
+        self.restored_state = None
+        self.incremental = False
+        self.watermark = None
+        self.next_watermark = None
+        self.cacheable = False
+        self.cached_result = None
+        self.memory = None
 
     @property
     def id(self):
@@ -74,12 +88,87 @@ class Transformation:
         self.out_queues.append(queue)
         target.in_queues.append(queue)
 
+    def share_broadcast_with_target(self, target, broadcast_queue):
+        assert self.broadcast and target in self.out_ports.values()
+        if broadcast_queue not in self.out_queues:
+            self.out_queues.append(broadcast_queue)
+        target.in_queues.append(broadcast_queue.reader())
+
+    def clear_queues(self):
+        self.in_queues = []
+        self.out_queues = []
+
     def configure(self, *args, **kwargs):
         pass
 
     def reset(self):
         pass
 
+    def set_checkpointing(self, coordinator, state=None):
+        """Sets the checkpoint coordinator of the next run and the state to resume from"""
+        self.checkpoints = coordinator
+        self.restored_state = state
+
+    @property
+    def spillable(self):
+        """Whether the node can write its state to disk when the memory governor asks it to"""
+        return False
+
+    @property
+    def is_finished(self):
+        return isinstance(self.restored_state, Finished)
+
+    def finish(self):
+        if self.checkpoints is not None:
+            self.checkpoints.finish(self.name, self.next_watermark)
+
+    def set_incremental(self, enabled, watermark=None):
+        """Enables incremental runs, :watermark being the state the node reached at the end of the previous run.
+        A node of an incremental run sets next_watermark to the state the next run starts from."""
+        self.incremental = enabled
+        self.watermark = watermark
+        self.next_watermark = None
+
+    def get_finished_async_job(self):
+        """The job of a node that had completed its stream when the checkpoint it resumes from was taken"""
+        async def job():
+            for q in self.in_queues:
+                while await q.get() is not None:
+                    pass
+            for q in self.out_queues:
+                await q.put(None)
+            self.next_watermark = self.restored_state.watermark
+            self.finish()
+        return job
+
+    def get_replay_async_job(self):
+        """The job of a cacheable node whose output is replayed from its cached result"""
+        async def job():
+            loop = asyncio.get_event_loop()
+            with open(self.cached_result, 'rb') as f:
+                while True:
+                    rows = await loop.run_in_executor(None, read_batch, f)
+                    if rows is None:
+                        break
+                    for row in rows:
+                        for q in self.out_queues:
+                            await q.put(row)
+            for q in self.out_queues:
+                await q.put(None)
+            self.finish()
+        return job
+
+    def used_columns(self, downstream):
+        """The indices of the columns of the input rows this transformation reads, given the columns :downstream
+        its targets read. None means whole rows, which is what a transformation reads unless it tells otherwise."""
+        return None
+
+    def set_run_parameters(self, **kwargs):
+        raise ConfigurationError(f'{self.name}: transformation does not accept run parameters')
+
+    def clear_run_parameters(self):
+        pass
+
     @abstractmethod
     def get_async_job(self):
         raise NotImplementedError
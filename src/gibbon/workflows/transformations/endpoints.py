@@ -1,21 +1,61 @@
 from .base import Transformation
 from ..exceptions import TargetAssignmentError, MissingArgumentError
+from ..checkpoint import Barrier, NOT_RESTORABLE
+from ...io.inflight import InFlight
+from ...io.readahead import ReadAhead
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 
 
 class AbstractEndPoint:
+    """The actual endpoints run their blocking calls in the executor given as the 'executor' argument of their
+    configuration, a number of threads making it a thread pool dedicated to the endpoint. Otherwise they use
+    the I/O executor of the workflow (see Workflow.set_io_executor) or else the one of the executor of the run."""
+    io_executor = None
+    default_io_executor = None
+    _owns_io_executor = False
+
     @abstractmethod
     def configure(self, *args, **kwargs):
         raise NotImplementedError
 
+    def _set_io_executor(self, executor):
+        self._shutdown_io_executor()
+        if isinstance(executor, int):
+            self.io_executor = ThreadPoolExecutor(max_workers=executor, thread_name_prefix=f'gibbon-{self.name}')
+            self._owns_io_executor = True
+        else:
+            self.io_executor = executor
+
+    def _shutdown_io_executor(self):
+        if self._owns_io_executor:
+            self.io_executor.shutdown(wait=False)
+            self._owns_io_executor = False
+        self.io_executor = None
+
+    def _complete_executor(self, cfg):
+        executor = self.io_executor or self.default_io_executor
+        if executor is not None:
+            cfg['executor'] = executor
+
 
 class Source(Transformation, AbstractEndPoint):
     """A near abstract source of data. THe actual stream generator is provided at runtime by the Configuration feature
-    the actual source must expose a asynchronous interface for async iter and async context management"""
+    the actual source must expose a asynchronous interface for async iter and async context management.
+    In incremental runs, a 'watermark' configuration argument (a column index or a callable on rows) makes the source
+    skip the rows whose watermark value is not above the highest value of the previous run, otherwise the source
+    skips the rows read by the previous run, which suits append-only sources.
+    A 'read_ahead' configuration argument makes the source keep that many rows prefetched (see ReadAhead)."""
     def __init__(self, name, ports=1):
         super().__init__(name, in_ports=0, out_ports=ports)
         self.actual_source = None
         self.source_cfg = None
+        self.watermark_key = None
+        self.pushed_predicate = None
+        self.pushed_projection = None
+        self.read_ahead = None
+        self.run_parameters = dict()
 
     @property
     def has_source(self):
@@ -29,8 +69,15 @@ class Source(Transformation, AbstractEndPoint):
         raise AttributeError(f"{self.name}: cannot set the source of a Source transformation")
 
     def configure(self, *args, **kwargs):
+        if 'watermark' in kwargs:
+            key = kwargs.pop('watermark')
+            self.watermark_key = itemgetter(key) if isinstance(key, int) else key
+        if 'read_ahead' in kwargs:
+            self.read_ahead = kwargs.pop('read_ahead')
+
         if 'source' in kwargs:
             self.actual_source = kwargs.pop('source')
+            self._set_io_executor(kwargs.pop('executor', None))
             self.source_cfg = kwargs
         else:
             if self.actual_source is None:
@@ -41,28 +88,138 @@ class Source(Transformation, AbstractEndPoint):
     def reset(self):
         self.actual_source = None
         self.source_cfg = None
+        self.watermark_key = None
+        self.read_ahead = None
+        self._shutdown_io_executor()
+
+    def set_run_parameters(self, **kwargs):
+        self.run_parameters = kwargs
+
+    def clear_run_parameters(self):
+        self.run_parameters = dict()
+
+    @property
+    def supports_predicates(self):
+        """Whether the actual source can evaluate a predicate given as its 'predicate' argument"""
+        return getattr(self.actual_source, 'supports_predicates', False)
+
+    @property
+    def supports_projection(self):
+        """Whether the actual source can leave out the columns not listed in its 'projection' argument"""
+        return getattr(self.actual_source, 'supports_projection', False)
 
     def get_async_job(self):
+        source_cfg = dict(self.source_cfg, **self.run_parameters)
+        self._complete_executor(source_cfg)
+        if self.pushed_predicate is not None:
+            predicate = source_cfg.get('predicate')
+            source_cfg['predicate'] = self.pushed_predicate if predicate is None else predicate & self.pushed_predicate
+        if self.pushed_projection is not None and not (self.incremental and self.watermark_key is not None):
+            # the watermark key may read any column, the rows of incremental runs are whole
+            projection = source_cfg.get('projection')
+            if projection is not None:
+                projection = sorted(set(projection) & set(self.pushed_projection))
+            source_cfg['projection'] = self.pushed_projection if projection is None else projection
+
         async def job():
-            async with self.actual_source(**self.source_cfg) as src:
+            checkpoints = self.checkpoints
+            memory = self.memory
+            key = self.watermark_key if self.incremental else None
+            actual_source = self.actual_source(**source_cfg)
+            if self.read_ahead:
+                actual_source = ReadAhead(actual_source, self.read_ahead)
+            async with actual_source as src:
+                low, mark = await self._restore_watermark(src, key)
+                rows = await self._restore_position(src, mark)
                 async for row in src:
-                    for q in self.out_queues:
-                        await q.put(row)
+                    rows += 1
+                    if key is None:
+                        for q in self.out_queues:
+                            await q.put(row)
+                        if memory is not None:
+                            await memory.governor.throttle(row)
+                    else:
+                        value = key(row)
+                        if low is None or value > low:
+                            if mark['value'] is None or value > mark['value']:
+                                mark['value'] = value
+                            for q in self.out_queues:
+                                await q.put(row)
+                            if memory is not None:
+                                await memory.governor.throttle(row)
+
+                    if checkpoints is not None and rows % checkpoints.interval == 0:
+                        await self._emit_barrier(src, rows, mark)
 
                 for q in self.out_queues:
                     await q.put(None)  # EOF
+
+                if self.incremental:
+                    self.next_watermark = {'rows': mark['rows'] + rows, 'position': self._tell(src),
+                                           'value': mark['value']}
+            self.finish()
         return job
 
+    @staticmethod
+    def _tell(src):
+        return src.tell() if hasattr(src, 'tell') else None
+
+    @staticmethod
+    async def _skip(src, position, rows):
+        """Moves the actual source forward through its seek() method when it records its position,
+        by reading :rows rows otherwise"""
+        if position is not None and hasattr(src, 'seek'):
+            await src.seek(position)
+        else:
+            for _ in range(rows):
+                try:
+                    await src.__anext__()
+                except StopAsyncIteration:
+                    break
+
+    async def _restore_watermark(self, src, key):
+        """Returns the watermark value below which rows were processed by the previous run and the
+        watermark of this run, skipping the rows read by the previous run when there is no watermark key"""
+        mark = {'rows': 0, 'position': None, 'value': None}
+        if not self.incremental or self.watermark is None:
+            return None, mark
+
+        mark.update(self.watermark)
+        if key is None:
+            await self._skip(src, mark['position'], mark['rows'])
+        return mark['value'], mark
+
+    async def _restore_position(self, src, mark):
+        """Moves the actual source past the rows read before the checkpoint to resume from"""
+        state = self.restored_state
+        if state is None:
+            return 0
+
+        await self._skip(src, state['position'], state['rows'])
+        mark['value'] = state['value']
+        return state['rows']
+
+    async def _emit_barrier(self, src, rows, mark):
+        barrier = self.checkpoints.barrier(rows // self.checkpoints.interval)
+        barrier.acknowledge(self, {'rows': rows, 'position': self._tell(src), 'value': mark['value']})
+        for q in self.out_queues:
+            await q.put(barrier)
+
 
 class Target(Transformation, AbstractEndPoint):
     """A near abstract model of a downstream target whether a file or a database.
     The actual target is specified at runtime with the Configuration.
     The target will perform blocking operations unless it is defined as non-blocking.
-    Therefore we have an implementation mismatch here :/"""
+    Therefore we have an implementation mismatch here :/
+    An 'in_flight' configuration argument lets that many writes run concurrently, an 'ordered_by' argument
+    (a column index or a callable on rows) keeping the rows of a same key in order (see InFlight)."""
     def __init__(self, name):
         super().__init__(name, in_ports=1, out_ports=0)
         self.actual_target = None
         self.target_cfg = None
+        self.in_flight = None
+        self.ordered_by = None
+        self.run_parameters = dict()
 
     def set_source(self, parent_transfo):
         assert self.in_ports[0] is None
@@ -81,8 +238,15 @@ class Target(Transformation, AbstractEndPoint):
         raise TargetAssignmentError(f"{self.name}: cannot assign a target to a Target")
 
     def configure(self, *args, **kwargs):
+        if 'in_flight' in kwargs:
+            self.in_flight = kwargs.pop('in_flight')
+        if 'ordered_by' in kwargs:
+            key = kwargs.pop('ordered_by')
+            self.ordered_by = itemgetter(key) if isinstance(key, int) else key
+
         if 'target' in kwargs:
             self.actual_target = kwargs.pop('target')
+            self._set_io_executor(kwargs.pop('executor', None))
             self.target_cfg = kwargs
         else:
             if self.actual_target is None:
@@ -93,15 +257,43 @@ class Target(Transformation, AbstractEndPoint):
     def reset(self):
         self.actual_target = None
         self.target_cfg = None
+        self.in_flight = None
+        self.ordered_by = None
+        self._shutdown_io_executor()
+
+    def set_run_parameters(self, **kwargs):
+        self.run_parameters = kwargs
+
+    def clear_run_parameters(self):
+        self.run_parameters = dict()
 
     def get_async_job(self):
+        target_cfg = dict(self.target_cfg, **self.run_parameters)
+        self._complete_executor(target_cfg)
+        if self.restored_state is not None:
+            # the actual target goes back to the position committed at the checkpoint
+            target_cfg['resume'] = self.restored_state
+        if self.incremental and self.watermark is not None:
+            # rows of an incremental run are appended to the rows written by the previous runs
+            target_cfg['append'] = True
+
         async def job():
-            async with self.actual_target(**self.target_cfg) as tgt:
+            actual_target = self.actual_target(**target_cfg)
+            if self.in_flight:
+                actual_target = InFlight(actual_target, self.in_flight, self.ordered_by)
+            async with actual_target as tgt:
                 while True:
                     row = await self.in_queues[0].get()
                     if row is None:
                         break
+                    elif type(row) is Barrier:
+                        token = await tgt.checkpoint() if hasattr(tgt, 'checkpoint') else None
+                        row.acknowledge(self, NOT_RESTORABLE if token is None else token)
+                        continue
                     await tgt.send(row)
+            if self.incremental:
+                self.next_watermark = True
+            self.finish()
         return job
 
 
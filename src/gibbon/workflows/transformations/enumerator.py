@@ -1,4 +1,5 @@
 from .base import OneToMany
+from ..checkpoint import Barrier
 
 
 class Enumerator(OneToMany):
@@ -11,7 +12,13 @@ class Enumerator(OneToMany):
 
     def get_async_job(self):
         async def job():
-            self._index = self.start_with
+            if self.restored_state is not None:
+                self._index = self.restored_state
+            elif self.incremental and self.watermark is not None:
+                self._index = self.watermark
+            else:
+                self._index = self.start_with
+
             while True:
                 row = await self.in_queues[0].get()
 
@@ -20,6 +27,11 @@ class Enumerator(OneToMany):
                         await oq.put(None)
                     break
 
+                elif type(row) is Barrier:
+                    row.acknowledge(self, self._index)
+                    for oq in self.out_queues:
+                        await oq.put(row)
+
                 else:
                     row = tuple([self._index] + [f for f in row])
                     for oq in self.out_queues:
@@ -27,6 +39,9 @@ class Enumerator(OneToMany):
                     self._index += 1
                     if self._index > self.reset_after > 0:
                         self._index = self.start_with
+            if self.incremental:
+                self.next_watermark = self._index
+            self.finish()
 
         return job
 
@@ -1,13 +1,30 @@
 from .base import OneToMany
+from .partition import Parallelizable
+from ..checkpoint import Barrier
 
 
-class Expression(OneToMany):
+class Expression(OneToMany, Parallelizable):
     # TODO: add doc string
-    def __init__(self, name, out_ports=1, func=lambda r: r):
+    def __init__(self, name, out_ports=1, func=lambda r: r, parallelism=1, partition_key=None, processes=False,
+                 batch_size=1000, uses=None, linger=None):
         super().__init__(name, out_ports)
         self.func = func
+        self.uses = uses
+        self._set_parallelism(parallelism, partition_key, processes, batch_size, linger)
+
+    def used_columns(self, downstream):
+        # the output rows are built by the function, which reads the declared columns only
+        return None if self.uses is None else set(self.uses)
+
+    async def _emit(self, rows, results):
+        for row in results:
+            for q in self.out_queues:
+                await q.put(row)
 
     def get_async_job(self):
+        if self.parallelism > 1:
+            return self.get_parallel_async_job(self.func)
+
         async def job():
             while True:
                 row = await self.in_queues[0].get()
@@ -15,9 +32,15 @@ class Expression(OneToMany):
                     for q in self.out_queues:
                         await q.put(row)
                     break
+                elif type(row) is Barrier:
+                    row.acknowledge(self)
+                    for q in self.out_queues:
+                        await q.put(row)
+                    continue
 
                 row = self.func(row)
 
                 for q in self.out_queues:
                     await q.put(row)
+            self.finish()
         return job
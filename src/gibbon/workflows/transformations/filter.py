@@ -1,13 +1,46 @@
 from .base import OneToMany
+from .partition import Parallelizable
+from ..checkpoint import Barrier
+from ..predicates import is_predicate
 
 
-class Filter(OneToMany):
+class Filter(OneToMany, Parallelizable):
     # TODO: add doc string
-    def __init__(self, name, condition=lambda r: True, out_ports=1):
+    def __init__(self, name, condition=lambda r: True, out_ports=1, parallelism=1, partition_key=None,
+                 processes=False, batch_size=1000, uses=None, linger=None):
         super().__init__(name, out_ports)
         self.condition = condition
+        self.uses = uses
+        self.pushed_down = False
+        self._set_parallelism(parallelism, partition_key, processes, batch_size, linger)
+
+    def used_columns(self, downstream):
+        # rows go through unchanged, the condition reads the declared columns or the columns of its predicate
+        if downstream is None:
+            return None
+        if self.uses is not None:
+            return downstream | set(self.uses)
+        if is_predicate(self.condition):
+            columns = self.condition.columns()
+            if all(isinstance(c, int) for c in columns):
+                return downstream | columns
+        return None
+
+    async def _emit(self, rows, results):
+        for row, keep in zip(rows, results):
+            if keep:
+                for q in self.out_queues:
+                    await q.put(row)
 
     def get_async_job(self):
+        if self.pushed_down:
+            # the source evaluates the condition, rows just go through
+            condition = lambda r: True
+        elif self.parallelism > 1:
+            return self.get_parallel_async_job(self.condition)
+        else:
+            condition = self.condition
+
         async def job():
             while True:
                 row = await self.in_queues[0].get()
@@ -15,8 +48,12 @@ class Filter(OneToMany):
                     for q in self.out_queues:
                         await q.put(row)
                     break
-
-                if self.condition(row):
+                elif type(row) is Barrier:
+                    row.acknowledge(self)
+                    for q in self.out_queues:
+                        await q.put(row)
+                elif condition(row):
                     for q in self.out_queues:
                         await q.put(row)
+            self.finish()
         return job
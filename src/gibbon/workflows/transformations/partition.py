@@ -0,0 +1,210 @@
+from .base import OneToMany
+from .union import Union
+from ..checkpoint import Barrier
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import cycle
+import asyncio
+
+
+# the end of a batch that has lingered long enough
+_LINGER = object()
+
+
+def _apply(func, rows):
+    return [func(row) for row in rows]
+
+
+class ParallelRunner:
+    """Applies a function to batches of rows split into :parallelism partitions, either round-robin or
+    by the hash of :key, each partition running in a worker thread, or a worker process with :processes
+    (the function must then be picklable). Results are put back in the order of the rows."""
+    def __init__(self, func, parallelism, key=None, processes=False):
+        self.func = func
+        self.parallelism = parallelism
+        self.key = key
+        if processes:
+            self._pool = ProcessPoolExecutor(max_workers=parallelism)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='gibbon-replica')
+
+    def _partition(self, rows):
+        n = self.parallelism
+        if self.key is None:
+            return [list(range(i, len(rows), n)) for i in range(n)]
+        indexes = [[] for _ in range(n)]
+        for i, row in enumerate(rows):
+            indexes[hash(self.key(row)) % n].append(i)
+        return indexes
+
+    async def map(self, rows):
+        if not rows:
+            return []
+        loop = asyncio.get_event_loop()
+        indexes = [p for p in self._partition(rows) if p]
+        chunks = await asyncio.gather(*(loop.run_in_executor(self._pool, _apply, self.func, [rows[i] for i in p])
+                                        for p in indexes))
+        results = [None] * len(rows)
+        for p, chunk in zip(indexes, chunks):
+            for i, result in zip(p, chunk):
+                results[i] = result
+        return results
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Parallelizable:
+    """A stateless transformation applying a function to each row. With a :parallelism greater than one,
+    rows are read by batches of :batch_size and the function runs in that many replicas (see ParallelRunner)
+    while the next batch is being read, the output keeping the order of the input. With :linger, a batch
+    is processed at the latest :linger seconds after its first row was read, even when it is not full."""
+    def _set_parallelism(self, parallelism=1, partition_key=None, processes=False, batch_size=1000, linger=None):
+        self.parallelism = parallelism
+        self.partition_key = partition_key
+        self.processes = processes
+        self.batch_size = batch_size
+        self.linger = linger
+
+    async def _next_row(self, batch, deadline):
+        """The next row, or _LINGER once the batch has lingered long enough"""
+        if not batch or self.linger is None:
+            return await self.in_queues[0].get()
+        try:
+            timeout = max(deadline - asyncio.get_event_loop().time(), 0)
+            return await asyncio.wait_for(self.in_queues[0].get(), timeout)
+        except asyncio.TimeoutError:
+            return _LINGER
+
+    async def _emit(self, rows, results):
+        raise NotImplementedError
+
+    def get_parallel_async_job(self, func):
+        async def job():
+            with ParallelRunner(func, self.parallelism, self.partition_key, self.processes) as runner:
+                batch = []
+                pending = None
+                deadline = None
+                while True:
+                    row = await self._next_row(batch, deadline)
+                    if row is not None and row is not _LINGER and type(row) is not Barrier:
+                        if not batch and self.linger is not None:
+                            deadline = asyncio.get_event_loop().time() + self.linger
+                        batch.append(row)
+                        if len(batch) < self.batch_size:
+                            continue
+
+                    # the batch in flight is emitted before the next one starts
+                    if pending is not None:
+                        await self._emit(*await pending)
+                    pending = asyncio.ensure_future(self._run(runner, batch))
+                    batch = []
+
+                    if row is None or row is _LINGER or type(row) is Barrier:
+                        await self._emit(*await pending)
+                        pending = None
+                        if row is None:
+                            break
+                        elif row is _LINGER:
+                            continue
+                        row.acknowledge(self)
+                        for q in self.out_queues:
+                            await q.put(row)
+
+                for q in self.out_queues:
+                    await q.put(None)
+            self.finish()
+        return job
+
+    @staticmethod
+    async def _run(runner, rows):
+        return rows, await runner.map(rows)
+
+
+class Partition(OneToMany):
+    """Distributes rows among its targets, by the hash of :key or round-robin when :key is None,
+    so that each target gets a share of the stream. See Gather to merge the shares back."""
+    broadcast = False
+
+    def __init__(self, name, key=None, out_ports=2):
+        super().__init__(name, out_ports)
+        self.key = key
+
+    def get_async_job(self):
+        async def job():
+            queues = self.out_queues
+            targets = cycle(queues)
+            while True:
+                row = await self.in_queues[0].get()
+                if row is None:
+                    for q in queues:
+                        await q.put(None)
+                    break
+                elif type(row) is Barrier:
+                    row.acknowledge(self)
+                    for q in queues:
+                        await q.put(row)
+                    # an ordered Gather reads from its first input again after a barrier
+                    targets = cycle(queues)
+                elif self.key is None:
+                    await next(targets).put(row)
+                else:
+                    await queues[hash(self.key(row)) % len(queues)].put(row)
+            self.finish()
+
+        return job
+
+
+class Gather(Union):
+    """Merges the shares of a stream distributed by a Partition. When :ordered, inputs are read in turn,
+    which restores the order of a round-robin partition followed by one-row-in, one-row-out transformations.
+    Otherwise rows go on as soon as any input has some."""
+    def __init__(self, name, in_ports=2, out_ports=1, ordered=False):
+        super().__init__(name, in_ports, out_ports)
+        self.ordered = ordered
+
+    def get_async_job(self):
+        if self.ordered:
+            return super().get_async_job()
+
+        async def job():
+            getters = {asyncio.ensure_future(q.get()): q for q in self.in_queues}
+            barriers = dict()
+            try:
+                while getters or barriers:
+                    if barriers and not getters:
+                        # the barrier was met on every input still open, it may go on
+                        barrier = next(iter(barriers.values()))
+                        barrier.acknowledge(self)
+                        for oq in self.out_queues:
+                            await oq.put(barrier)
+                        getters = {asyncio.ensure_future(q.get()): q for q in barriers}
+                        barriers.clear()
+                        continue
+
+                    done, _ = await asyncio.wait(getters, return_when=asyncio.FIRST_COMPLETED)
+                    for getter in done:
+                        iq = getters.pop(getter)
+                        row = getter.result()
+                        if row is None:
+                            continue
+                        elif type(row) is Barrier:
+                            barriers[iq] = row
+                        else:
+                            for oq in self.out_queues:
+                                await oq.put(row)
+                            getters[asyncio.ensure_future(iq.get())] = iq
+            finally:
+                for getter in getters:
+                    getter.cancel()
+
+            for oq in self.out_queues:
+                await oq.put(None)
+            self.finish()
+
+        return job
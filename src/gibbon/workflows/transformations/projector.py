@@ -1,5 +1,7 @@
+from collections import deque
 from .base import ManyToMany
 from .base import OneToMany
+from ..checkpoint import Barrier
 
 
 class Concat(ManyToMany):
@@ -9,33 +11,59 @@ class Concat(ManyToMany):
 
     def get_async_job(self):
         async def job():
-            eof_signals = {q: False for q in self.in_queues}
+            n_inputs = len(self.in_queues)
+            # rows read but not emitted yet, they belong to the state when a barrier is met
+            pending = [deque(rows) for rows in (self.restored_state or [()] * n_inputs)]
+            eof_signals = [False] * n_inputs
+            barriers = [None] * n_inputs
+
+            async def read(i):
+                row = await self.in_queues[i].get()
+                if row is None:
+                    eof_signals[i] = True
+                elif type(row) is Barrier:
+                    barriers[i] = row
+                else:
+                    pending[i].append(row)
+
             while True:
-                buffer = []
-                for iq in [iq for iq, sig in eof_signals.items() if not sig]:
-                    row = await iq.get()
-                    if row is None:
-                        eof_signals[iq] = True
+                for i in range(n_inputs):
+                    while not pending[i] and not eof_signals[i] and barriers[i] is None:
+                        await read(i)
+
+                if all(pending[i] or eof_signals[i] for i in range(n_inputs)):
+                    if any(pending):
+                        # we can emit
+                        concat_row = []
+                        for rows in pending:
+                            if rows:
+                                concat_row += list(rows.popleft())
+                        concat_row = tuple(concat_row)
+                        for oq in self.out_queues:
+                            await oq.put(concat_row)
                     else:
-                        buffer.append(row)
-
-                if len(buffer):
-                    # we can emit
-                    concat_row = []
-                    for row in buffer:
-                        concat_row += list(row)
-                    concat_row = tuple(concat_row)
-                    for oq in self.out_queues:
-                        await oq.put(concat_row)
+                        for oq in self.out_queues:
+                            await oq.put(None)
+                        break
                 else:
+                    # an input met a barrier, wait for it on the other inputs
+                    for i in range(n_inputs):
+                        while not eof_signals[i] and barriers[i] is None:
+                            await read(i)
+
+                    barrier = next(b for b in barriers if b is not None)
+                    barrier.acknowledge(self, [list(rows) for rows in pending])
                     for oq in self.out_queues:
-                        await oq.put(None)
-                    break
+                        await oq.put(barrier)
+                    barriers = [None] * n_inputs
+            self.finish()
 
         return job
 
 
 class Split(OneToMany):
+    broadcast = False
+
     def __init__(self, name, func, out_ports=2):
         super().__init__(name, out_ports)
         self.func = func
@@ -49,11 +77,15 @@ class Split(OneToMany):
                     for oq in self.out_queues:
                         await oq.put(None)
                     break
+                elif type(row) is Barrier:
+                    row.acknowledge(self)
+                    for oq in self.out_queues:
+                        await oq.put(row)
                 else:
                     rows = self.func(row)
                     for row, oq in zip(rows, self.out_queues):
                         await oq.put(row)
+            self.finish()
 
         return job
 
-
@@ -1,4 +1,5 @@
 from .base import OneToMany
+from ..checkpoint import Barrier
 from ..exceptions import BaseBuildWarning
 
 
@@ -8,6 +9,8 @@ class SelectorHasTooManyTargets(BaseBuildWarning):
 
 class Selector(OneToMany):
     # TODO: add doc string
+    broadcast = False
+
     def __init__(self, name, conditions):
         self.conditions = conditions
         out_ports = len(self.conditions)
@@ -27,6 +30,11 @@ class Selector(OneToMany):
                     for q in self.out_queues:
                         await q.put(row)
                     break
+                elif type(row) is Barrier:
+                    row.acknowledge(self)
+                    for q in self.out_queues:
+                        await q.put(row)
+                    continue
 
                 row_is_emitted = False
                 for (cond, oq) in zip(self.conditions, self.out_queues):
@@ -37,5 +45,6 @@ class Selector(OneToMany):
                     if len(self.out_queues) > len(self.conditions):
                         default_queue = self.out_queues[len(self.conditions)]
                         await default_queue.put(row)
+            self.finish()
 
         return job
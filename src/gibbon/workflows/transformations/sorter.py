@@ -1,28 +1,79 @@
 from .base import OneToMany
+from ..checkpoint import Barrier
+from ..memory import spill, read_spilled
+import asyncio
+import heapq
+import itertools
+import os
 
 
 class Sorter(OneToMany):
-    # TODO: add doc string
+    '''Sorts a stream of rows by :key, output once the whole stream is read.
+    When the memory governor asks for it, the rows read so far are sorted and spilled to a file,
+    the sorted files being merged at the end of the stream.'''
     def __init__(self, name, key, reverse=False, out_ports=1):
         super().__init__(name, out_ports)
         self.key = key
         self.reverse = reverse
 
-    def get_async_job(self):
-        async def job():
-            buffer = []
+    @property
+    def spillable(self):
+        # the state saved at checkpoints is the rows kept in memory
+        return self.checkpoints is None
+
+    async def _merge(self, runs, buffer):
+        loop = asyncio.get_event_loop()
+        merged = heapq.merge(*(read_spilled(run) for run in runs), sorted(buffer, key=self.key, reverse=self.reverse),
+                             key=self.key, reverse=self.reverse)
+        try:
             while True:
-                row = await self.in_queues[0].get()
-                if row is None:
+                rows = await loop.run_in_executor(None, list, itertools.islice(merged, 1000))
+                if not rows:
                     break
-                else:
-                    buffer.append(row)
+                for row in rows:
+                    for q in self.out_queues:
+                        await q.put(row)
+        finally:
+            merged.close()
 
-            for row in sorted(buffer, key=self.key, reverse=self.reverse):
-                for q in self.out_queues:
-                    await q.put(row)
+    def get_async_job(self):
+        async def job():
+            memory = self.memory
+            buffer = list(self.restored_state or [])
+            runs = []
+            try:
+                while True:
+                    row = await self.in_queues[0].get()
+                    if row is None:
+                        break
+                    elif type(row) is Barrier:
+                        row.acknowledge(self, buffer)
+                        for q in self.out_queues:
+                            await q.put(row)
+                    else:
+                        buffer.append(row)
+                        if memory is not None and memory.add(row) and self.spillable:
+                            buffer.sort(key=self.key, reverse=self.reverse)
+                            runs.append(await asyncio.get_event_loop().run_in_executor(
+                                None, spill, buffer, memory.spill_dir))
+                            memory.spilled(len(buffer))
+                            buffer = []
+
+                if runs:
+                    await self._merge(runs, buffer)
+                else:
+                    for row in sorted(buffer, key=self.key, reverse=self.reverse):
+                        for q in self.out_queues:
+                            await q.put(row)
+            finally:
+                for run in runs:
+                    if os.path.exists(run):
+                        os.remove(run)
+            if memory is not None:
+                memory.release()
 
             for q in self.out_queues:
                 await q.put(None)
+            self.finish()
 
         return job
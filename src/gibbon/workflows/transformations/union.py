@@ -1,4 +1,5 @@
 from .base import ManyToMany
+from ..checkpoint import Barrier
 
 
 class Union(ManyToMany):
@@ -6,22 +7,34 @@ class Union(ManyToMany):
         super().__init__(name, in_ports, out_ports)
 
     def get_async_job(self):
-        eof_signals = {q: False for q in self.in_queues}
-
         async def job():
+            # keyed by the queues the job reads, which may be wrapped after the job is created
+            eof_signals = {q: False for q in self.in_queues}
+            barriers = dict()
             while True:
+                if barriers and all(eof_signals[iq] or iq in barriers for iq in self.in_queues):
+                    # the barrier was met on every input still open, it may go on
+                    barrier = next(iter(barriers.values()))
+                    barrier.acknowledge(self)
+                    for oq in self.out_queues:
+                        await oq.put(barrier)
+                    barriers.clear()
+
                 if all(eof_signals.values()):
                     for oq in self.out_queues:
                         await oq.put(None)
                     break
 
                 for iq in self.in_queues:
-                    if not eof_signals[iq]:
+                    if not eof_signals[iq] and iq not in barriers:
                         row = await iq.get()
                         if row is None:
                             eof_signals[iq] = True
+                        elif type(row) is Barrier:
+                            barriers[iq] = row
                         else:
                             for oq in self.out_queues:
                                 await oq.put(row)
+            self.finish()
 
         return job
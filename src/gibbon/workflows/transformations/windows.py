@@ -0,0 +1,155 @@
+class Window:
+    """Groups the rows of an unbounded stream by time, see Aggregator. A window is the interval [start, end)"""
+    def assign(self, t):
+        """The windows a row of time :t belongs to"""
+        raise NotImplementedError
+
+
+class TumblingWindow(Window):
+    """Consecutive windows of :size, every row belongs to exactly one of them"""
+    def __init__(self, size, origin=0):
+        if size <= 0:
+            raise ValueError('The size of a window must be positive')
+        self.size = size
+        self.origin = origin
+
+    def assign(self, t):
+        start = t - (t - self.origin) % self.size
+        return (start, start + self.size),
+
+
+class SlidingWindow(Window):
+    """Windows of :size starting every :slide, a row belongs to every window covering its time. With a :slide
+    larger than the :size, the rows between two windows belong to none"""
+    def __init__(self, size, slide, origin=0):
+        if size <= 0 or slide <= 0:
+            raise ValueError('The size and the slide of a window must be positive')
+        self.size = size
+        self.slide = slide
+        self.origin = origin
+
+    def assign(self, t):
+        last = t - (t - self.origin) % self.slide
+        windows = []
+        start = last
+        while start > t - self.size:
+            windows.append((start, start + self.size))
+            start -= self.slide
+        return tuple(reversed(windows))
+
+
+class SessionWindow(Window):
+    """Windows of the rows of a key closer in time than :gap, a session ending :gap after its last row"""
+    def __init__(self, gap):
+        if gap <= 0:
+            raise ValueError('The gap of a session must be positive')
+        self.gap = gap
+
+    def assign(self, t):
+        return (t, t + self.gap),
+
+
+class WindowState:
+    """The open windows of an Aggregator in streaming mode. Fixed windows fold their rows as they come,
+    sessions keep theirs until they close since sessions merge when a row bridges them. Closed windows
+    are evicted, so that the state only holds the windows the watermark has not passed yet."""
+    def __init__(self, window, key, accumulator, initializer):
+        self.window = window
+        self.key = key
+        self.func = accumulator
+        self.initializer = initializer
+        self.panes = dict()
+        self.sessions = dict()
+        self.watermark = None
+        self.late_rows = 0
+        self.gap_rows = 0
+
+    def get_state(self):
+        return self.panes, self.sessions, self.watermark, self.late_rows, self.gap_rows
+
+    def set_state(self, state):
+        self.panes, self.sessions, self.watermark, self.late_rows, self.gap_rows = state
+
+    @property
+    def is_session(self):
+        return isinstance(self.window, SessionWindow)
+
+    def _is_closed(self, end):
+        return self.watermark is not None and end <= self.watermark
+
+    def add(self, row, t):
+        key = self.key(row)
+        if self.is_session:
+            self._add_to_session(key, row, t)
+            return
+
+        windows = self.window.assign(t)
+        if not windows:
+            # between two sliding windows
+            self.gap_rows += 1
+            return
+
+        windows = [w for w in windows if not self._is_closed(w[1])]
+        if not windows:
+            self.late_rows += 1
+        for w in windows:
+            pane = self.panes.setdefault(w, dict())
+            pane[key] = self.func(row, *pane.get(key, self.initializer))
+
+    def _add_to_session(self, key, row, t):
+        start, end = t, t + self.window.gap
+        if self._is_closed(end):
+            self.late_rows += 1
+            return
+
+        rows = [(t, row)]
+        kept = []
+        for session in self.sessions.get(key, ()):
+            if session[0] < end and start < session[1]:
+                start, end = min(start, session[0]), max(end, session[1])
+                rows.extend(session[2])
+            else:
+                kept.append(session)
+        kept.append((start, end, rows))
+        self.sessions[key] = kept
+
+    def next_deadline(self):
+        """The end of the first window to close"""
+        ends = [w[1] for w in self.panes]
+        ends.extend(s[1] for sessions in self.sessions.values() for s in sessions)
+        return min(ends) if ends else None
+
+    def advance(self, watermark):
+        """Moves the watermark forward and returns the rows of the windows it closes, by end of window"""
+        if self.watermark is None or watermark > self.watermark:
+            self.watermark = watermark
+
+        closed = []
+        for w in [w for w in self.panes if self._is_closed(w[1])]:
+            for key, value in self.panes.pop(w).items():
+                closed.append((w[1], (*key, w[0], w[1], value[0])))
+
+        for key in list(self.sessions):
+            kept = []
+            for start, end, rows in self.sessions[key]:
+                if not self._is_closed(end):
+                    kept.append((start, end, rows))
+                    continue
+                value = self.initializer
+                for _, row in sorted(rows, key=lambda r: r[0]):
+                    value = self.func(row, *value)
+                closed.append((end, (*key, start, end, value[0])))
+            if kept:
+                self.sessions[key] = kept
+            else:
+                del self.sessions[key]
+
+        closed.sort(key=lambda c: c[0])
+        return [row for _, row in closed]
+
+    def flush(self):
+        """Closes every window, at the end of the stream"""
+        watermark = self.watermark
+        rows = self.advance(float('inf'))
+        self.watermark = watermark
+        return rows
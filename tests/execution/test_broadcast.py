@@ -0,0 +1,86 @@
+import unittest
+import asyncio
+
+from src import gibbon
+from src.gibbon.execution.broadcast import BroadcastQueue
+
+
+class TestBroadcastQueue(unittest.TestCase):
+    def setUp(self):
+        self._loop = asyncio.new_event_loop()
+
+    def test_independent_cursors(self):
+        queue = BroadcastQueue(capacity=2)
+        fast, slow = queue.reader(), queue.reader()
+
+        for item in range(5):
+            queue.put_nowait(item)
+        self.assertEqual(queue.lag, 5)
+
+        self.assertSequenceEqual([fast.get_nowait() for _ in range(5)], list(range(5)))
+        self.assertTrue(fast.empty())
+        self.assertEqual(queue.lag, 5)
+
+        self.assertSequenceEqual([slow.get_nowait() for _ in range(3)], list(range(3)))
+        self.assertEqual(queue.lag, 2)
+        self.assertEqual(queue.max_lag, 5)
+
+    def test_bounded(self):
+        queue = BroadcastQueue(maxsize=2)
+        fast, slow = queue.reader(), queue.reader()
+        received = ([], [])
+
+        async def produce():
+            for item in range(10):
+                await queue.put(item)
+                self.assertLessEqual(queue.lag, 2)
+            await queue.put(None)
+
+        async def consume(reader, sink, delay):
+            while True:
+                item = await reader.get()
+                if item is None:
+                    break
+                sink.append(item)
+                await asyncio.sleep(delay)
+
+        async def run():
+            await asyncio.gather(produce(), consume(fast, received[0], 0), consume(slow, received[1], 0.001))
+
+        self._loop.run_until_complete(run())
+        self.assertSequenceEqual(received[0], list(range(10)))
+        self.assertSequenceEqual(received[1], list(range(10)))
+        self.assertEqual(queue.max_lag, 2)
+
+    def tearDown(self):
+        self._loop.close()
+
+
+class TestBroadcastWorkflow(unittest.TestCase):
+    def setUp(self):
+        self.w = gibbon.Workflow('fan_out')
+        self.w.add_source('src')
+        self.w.add_transformation('exp', gibbon.Expression, source='src', func=lambda r: (r[0] * 2,))
+        self.w.add_target('tgt1', source='exp')
+        self.w.add_target('tgt2', source='exp')
+        self.w.add_target('tgt3', source='exp')
+
+    def test_fan_out(self):
+        data = [(i,) for i in range(20)]
+        sinks = ([], [], [])
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=data)
+        for i, sink in enumerate(sinks):
+            cfg.add_configuration(f'tgt{i+1}', target=gibbon.SequenceWrapper, container=sink)
+
+        self.w.prepare(cfg)
+        self.w.run(gibbon.get_async_executor(shutdown=True))
+
+        self.assertEqual(len(self.w.get_node_by_name('exp').out_queues), 1)
+        for sink in sinks:
+            self.assertSequenceEqual(sink, [(i * 2,) for i in range(20)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from src import gibbon
+
+
+class TestRunMany(unittest.TestCase):
+    def setUp(self):
+        self.w = gibbon.Workflow('run_many')
+        self.w.add_source('src')
+        self.w.add_transformation('enum', gibbon.Enumerator, source='src')
+        self.w.add_target('tgt', source='enum')
+
+        self.cfg = gibbon.Configuration()
+        self.cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=())
+        self.cfg.add_configuration('tgt', target=gibbon.SequenceWrapper)
+        self.w.prepare(self.cfg)
+
+    def test_run_many(self):
+        executor = gibbon.get_async_executor()
+        plan = self.w.compile()
+        with executor:
+            for batch in range(3):
+                data = [(f'{batch}-{i}',) for i in range(batch + 1)]
+                sink = []
+                ok = self.w.run(executor, parameters={'src': dict(iterable=data), 'tgt': dict(container=sink)})
+                self.assertTrue(ok)
+                self.assertSequenceEqual(sink, [(i, r[0]) for i, r in enumerate(data)])
+                self.assertEqual(len(executor._jobs), 0)
+                self.assertEqual(len(executor._tasks), 0)
+                self.assertFalse(executor.loop.is_closed())
+                self.assertIs(self.w.compile(), plan)
+
+        self.assertTrue(executor.loop.is_closed())
+        self.assertDictEqual(self.w.get_node_by_name('src').run_parameters, {})
+
+    def test_failed_run(self):
+        def fail(r):
+            raise ValueError(r)
+
+        w = gibbon.Workflow('failing')
+        w.add_source('src')
+        w.add_transformation('exp', gibbon.Expression, source='src', func=fail)
+        w.add_target('tgt', source='exp')
+        w.prepare(self.cfg)
+
+        with gibbon.get_async_executor() as executor:
+            self.assertFalse(w.run(executor, parameters={'src': dict(iterable=[(1,)])}))
+            self.assertEqual(len(executor._tasks), 0)
+            sink = []
+            self.assertTrue(self.w.run(executor, parameters={'src': dict(iterable=[('a',)]),
+                                                             'tgt': dict(container=sink)}))
+            self.assertSequenceEqual(sink, [(0, 'a')])
+
+    def test_unknown_node(self):
+        with gibbon.get_async_executor() as executor:
+            self.assertFalse(self.w.run(executor, parameters={'unknown': dict(iterable=[])}))
+            self.assertFalse(self.w.run(executor, parameters={'enum': dict(start_with=3)}))
+
+    def test_closed(self):
+        executor = gibbon.get_async_executor(shutdown=True)
+        self.w.run(executor)
+        with self.assertRaises(RuntimeError):
+            self.w.run(executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+def expensive(row):
+    return sum(i * i for i in range(2000)) >= 0
+
+
+def cheap(row):
+    return row
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.w = chained_workflow('profiled', dict(source=gibbon.SequenceWrapper, iterable=[(i,) for i in range(300)]),
+                                  dict(target=gibbon.SequenceWrapper),
+                                  ('filter', gibbon.Filter, dict(condition=expensive)),
+                                  ('exp', gibbon.Expression, dict(func=cheap)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_report(self):
+        profiler = gibbon.Profiler()
+        with gibbon.get_async_executor(profiler=profiler) as executor:
+            self.assertTrue(self.w.run(executor))
+            report = profiler.report()
+            self.assertSetEqual(set(report), {'src', 'filter', 'exp', 'tgt'})
+            self.assertGreater(report['filter']['cpu'], report['exp']['cpu'])
+            self.assertIn('condition', report['filter']['callables'])
+            self.assertIn('func', report['exp']['callables'])
+            self.assertGreater(report['filter']['callables']['condition'],
+                               report['exp']['callables']['func'])
+
+            # profiling is switched off for the next run
+            executor.profiler = None
+            self.assertTrue(self.w.run(executor))
+            self.assertEqual(profiler.report()['filter']['cpu'], report['filter']['cpu'])
+
+    def test_exports(self):
+        profiler = gibbon.Profiler()
+        self.assertTrue(self.w.run(gibbon.get_async_executor(shutdown=True, profiler=profiler)))
+
+        filename = os.path.join(self.tmp.name, 'filter.pstats')
+        profiler.dump_stats(filename, 'filter')
+        functions = {func[2] for func in pstats.Stats(filename).stats}
+        self.assertIn('expensive', functions)
+        self.assertNotIn('cheap', functions)
+
+        filename = os.path.join(self.tmp.name, 'run.folded')
+        profiler.dump_collapsed(filename)
+        with open(filename) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(all(line.split(';')[0] in ('src', 'filter', 'exp', 'tgt') for line in lines))
+        self.assertTrue(all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines))
+        self.assertTrue(any(line.startswith('filter;') and 'expensive (test_profiler.py' in line for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+class TestRuntime(unittest.TestCase):
+    def setUp(self):
+        self.sink = []
+        self.target_cfg = dict(target=gibbon.SequenceWrapper, container=self.sink)
+
+    def test_loop_factory(self):
+        loops = []
+
+        def factory():
+            loop = asyncio.new_event_loop()
+            loops.append(loop)
+            return loop
+
+        executor = gibbon.get_async_executor(shutdown=True, loop_factory=factory)
+        w = chained_workflow('runtime', dict(source=gibbon.SequenceWrapper, iterable=[(1,), (2,)]), self.target_cfg)
+        self.assertTrue(w.run(executor))
+        self.assertListEqual(self.sink, [(1,), (2,)])
+        self.assertEqual(len(loops), 1)
+        self.assertIs(executor.loop, loops[0])
+        self.assertTrue(loops[0].is_closed())
+
+    def test_given_loop(self):
+        loop = asyncio.new_event_loop()
+        w = chained_workflow('runtime', dict(source=gibbon.SequenceWrapper, iterable=[(1,)]), self.target_cfg)
+        with gibbon.get_async_executor(loop=loop) as executor:
+            self.assertTrue(w.run(executor))
+            self.assertFalse(loop.is_closed())
+        self.assertTrue(loop.is_closed())
+
+    def test_eager_tasks(self):
+        executor = gibbon.get_async_executor(shutdown=True, eager_tasks=True)
+        self.assertEqual(executor.eager_tasks, sys.version_info >= (3, 12))
+        w = chained_workflow('runtime', dict(source=gibbon.SequenceWrapper, iterable=[(i,) for i in range(100)]),
+                             self.target_cfg, ('exp', gibbon.Expression, dict(func=lambda r: r)))
+        self.assertTrue(w.run(executor))
+        self.assertListEqual(self.sink, [(i,) for i in range(100)])
+
+    def test_cancelled_run(self):
+        # a job blocked forever, the run is cancelled from outside
+        started = asyncio.Event()
+
+        class Endless(gibbon.SequenceWrapper):
+            async def __anext__(self):
+                started.set()
+                await asyncio.sleep(3600)
+
+        w = chained_workflow('runtime', dict(source=Endless), self.target_cfg)
+
+        loop = asyncio.new_event_loop()
+        executor = gibbon.get_async_executor(loop=loop)
+
+        async def cancel_run():
+            run = asyncio.ensure_future(w.schedule(executor))
+            await started.wait()
+            run.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await run
+            return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+        try:
+            self.assertListEqual(loop.run_until_complete(cancel_run()), [])
+        finally:
+            executor.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
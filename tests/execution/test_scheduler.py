@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+def fail(row):
+    raise ValueError(row)
+
+
+class TestScheduler(unittest.TestCase):
+    def test_many_workflows(self):
+        scheduler = gibbon.WorkflowScheduler(max_concurrency=4, io_threads=2)
+        sinks = dict()
+        for i in range(20):
+            sinks[i] = []
+            scheduler.add(chained_workflow(f'w{i}', dict(source=gibbon.SequenceWrapper, iterable=[(i,)] * 10),
+                                           dict(target=gibbon.SequenceWrapper, container=sinks[i])))
+        self.assertTrue(scheduler.run())
+        for i in range(20):
+            self.assertListEqual(sinks[i], [(i,)] * 10)
+
+        stats = scheduler.statistics
+        self.assertEqual(stats['runs'], 20)
+        self.assertEqual(stats['succeeded'], 20)
+        self.assertLessEqual(stats['max_concurrency'], 4)
+        self.assertGreater(stats['max_concurrency'], 1)
+
+    def test_dependencies(self):
+        order = []
+
+        def record(name):
+            def _record(row):
+                order.append(name)
+                return row
+            return _record
+
+        scheduler = gibbon.WorkflowScheduler()
+        for name, depends_on in (('load', ('extract_a', 'extract_b')), ('extract_a', ()), ('extract_b', ()),
+                                 ('report', ('load',))):
+            w = chained_workflow(name, dict(source=gibbon.SequenceWrapper, iterable=[(1,)]),
+                                 dict(target=gibbon.SequenceWrapper),
+                                 ('exp', gibbon.Expression, dict(func=record(name))))
+            scheduler.add(w, depends_on=depends_on)
+
+        self.assertTrue(scheduler.run())
+        self.assertLess(order.index('extract_a'), order.index('load'))
+        self.assertLess(order.index('extract_b'), order.index('load'))
+        self.assertEqual(order[-1], 'report')
+
+    def test_failure_skips_dependents(self):
+        scheduler = gibbon.WorkflowScheduler()
+        scheduler.add(chained_workflow('failing', dict(source=gibbon.SequenceWrapper, iterable=[(1,)]),
+                                       dict(target=gibbon.SequenceWrapper),
+                                       ('exp', gibbon.Expression, dict(func=fail))))
+        scheduler.add(chained_workflow('dependent', dict(source=gibbon.SequenceWrapper, iterable=[(1,)]),
+                                       dict(target=gibbon.SequenceWrapper)), depends_on=('failing',))
+        scheduler.add(chained_workflow('independent', dict(source=gibbon.SequenceWrapper, iterable=[(1,)]),
+                                       dict(target=gibbon.SequenceWrapper)))
+
+        self.assertFalse(scheduler.run())
+        self.assertEqual(scheduler.results['failing'].status, 'FAILURE')
+        self.assertEqual(scheduler.results['dependent'].status, 'SKIPPED')
+        self.assertEqual(scheduler.results['independent'].status, 'SUCCESS')
+        stats = scheduler.statistics
+        self.assertEqual((stats['succeeded'], stats['failed'], stats['skipped']), (1, 1, 1))
+
+    def test_invalid_dependencies(self):
+        scheduler = gibbon.WorkflowScheduler()
+        for name, depends_on in (('a', ('c',)), ('b', ('a',)), ('c', ('b',))):
+            scheduler.add(chained_workflow(name, dict(source=gibbon.SequenceWrapper),
+                                           dict(target=gibbon.SequenceWrapper)), depends_on=depends_on)
+        with self.assertRaises(gibbon.NodeCycleError):
+            scheduler.run()
+
+        scheduler = gibbon.WorkflowScheduler()
+        scheduler.add(chained_workflow('a', dict(source=gibbon.SequenceWrapper),
+                                       dict(target=gibbon.SequenceWrapper)), depends_on=('unknown',))
+        with self.assertRaises(ValueError):
+            scheduler.run()
+
+    def test_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            scheduler = gibbon.WorkflowScheduler(processes=2)
+            for i in range(3):
+                source = os.path.join(tmp, f'in{i}.csv')
+                with open(source, 'w') as f:
+                    f.write(f'{i},a\n{i},b\n')
+                scheduler.add(chained_workflow(f'w{i}', dict(source=gibbon.CSVSourceFile, filename=source),
+                                               dict(target=gibbon.CSVTargetFile, filename=source + '.out')))
+            self.assertTrue(scheduler.run())
+            for i in range(3):
+                with open(os.path.join(tmp, f'in{i}.csv.out')) as f:
+                    self.assertListEqual(f.read().split(), [f'{i},a', f'{i},b'])
+
+
+class TestBoundedExecutor(unittest.TestCase):
+    def test_limit(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def call(i):
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return i
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            executor = gibbon.BoundedExecutor(pool, 2)
+            futures = [executor.submit(call, i) for i in range(10)]
+            self.assertListEqual([f.result() for f in futures], list(range(10)))
+        self.assertEqual(running[1], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+class YieldingSource(gibbon.SequenceWrapper):
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        return await super().__anext__()
+
+
+class SlowTarget(gibbon.SequenceWrapper):
+    async def send(self, data):
+        await asyncio.sleep(0.001)
+        await super().send(data)
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.w = chained_workflow('traced', dict(source=YieldingSource, iterable=[(i,) for i in range(50)]),
+                                  dict(target=SlowTarget), ('exp', gibbon.Expression, dict(func=lambda r: r)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _load(self, tracer):
+        filename = os.path.join(self.tmp.name, 'trace.json')
+        tracer.dump(filename)
+        with open(filename) as f:
+            return json.load(f)['traceEvents']
+
+    def test_timeline(self):
+        tracer = gibbon.Tracer()
+        self.assertTrue(self.w.run(gibbon.get_async_executor(shutdown=True, tracer=tracer)))
+        events = self._load(tracer)
+
+        threads = {e['tid']: e['args']['name'] for e in events if e['name'] == 'thread_name'}
+        self.assertSetEqual(set(threads.values()), {'src', 'exp', 'tgt'})
+        spans = dict()
+        for e in events:
+            if e['ph'] == 'X':
+                spans.setdefault(threads[e['tid']], []).append(e)
+
+        labels = {name: {e['name'] for e in node_spans} for name, node_spans in spans.items()}
+        self.assertIn('busy', labels['src'])
+        # the expression waits for rows, the target for its writes
+        self.assertIn('get', labels['exp'])
+        self.assertIn('await', labels['tgt'])
+        self.assertGreater(sum(e['dur'] for e in spans['tgt'] if e['name'] == 'await'), 50 * 1000)
+
+        # the spans of a node follow each other
+        for node_spans in spans.values():
+            node_spans.sort(key=lambda e: e['ts'])
+            for before, after in zip(node_spans, node_spans[1:]):
+                self.assertLessEqual(before['ts'] + before['dur'], after['ts'] + 1)
+
+        counters = [e for e in events if e['ph'] == 'C']
+        self.assertSetEqual({e['name'] for e in counters}, {'exp queued rows', 'tgt queued rows'})
+
+    def test_union(self):
+        w = gibbon.Workflow('merged')
+        w.add_source('src1')
+        w.add_source('src2')
+        w.add_complex_transformation('union', gibbon.Union, sources=('src1', 'src2'))
+        w.add_target('tgt', source='union')
+        sink = []
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src1', source=YieldingSource, iterable=[(i,) for i in range(10)])
+        cfg.add_configuration('src2', source=YieldingSource, iterable=[(i,) for i in range(10, 20)])
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+
+        tracer = gibbon.Tracer()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True, tracer=tracer)))
+        self.assertCountEqual(sink, [(i,) for i in range(20)])
+        counters = {e['name'] for e in self._load(tracer) if e['ph'] == 'C'}
+        self.assertSetEqual(counters, {'union queued rows', 'tgt queued rows'})
+
+    def test_sampling(self):
+        full = gibbon.Tracer()
+        self.assertTrue(self.w.run(gibbon.get_async_executor(shutdown=True, tracer=full)))
+        sampled = gibbon.Tracer(sample=10, min_duration=0.0005)
+        with gibbon.get_async_executor(tracer=sampled) as executor:
+            self.assertTrue(self.w.run(executor))
+            self.assertTrue(self.w.run(executor))
+            executor.tracer = None
+            self.assertTrue(self.w.run(executor))
+
+        spans = [e for e in self._load(sampled) if e['ph'] == 'X']
+        self.assertLess(len(spans), len([e for e in full.events if e['ph'] == 'X']) // 4)
+        self.assertTrue(all(e['dur'] >= 500 for e in spans))
+        # a process per traced run
+        self.assertSetEqual({e['pid'] for e in spans}, {1, 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
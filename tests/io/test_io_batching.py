@@ -0,0 +1,156 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+class TestBatchBuffer(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.batches = []
+
+    def tearDown(self):
+        self.loop.close()
+
+    async def write(self, rows):
+        await asyncio.sleep(0)
+        self.batches.append(rows)
+
+    def test_batch_size(self):
+        async def send():
+            buffer = gibbon.BatchBuffer(self.write, 3)
+            for i in range(7):
+                await buffer.add((i,))
+            self.assertEqual(len(self.batches), 2)
+            await buffer.close()
+
+        self.loop.run_until_complete(send())
+        self.assertListEqual([len(b) for b in self.batches], [3, 3, 1])
+
+    def test_linger(self):
+        async def send():
+            buffer = gibbon.BatchBuffer(self.write, 1000, linger=0.05)
+            await buffer.add((1,))
+            await buffer.add((2,))
+            await asyncio.sleep(0.2)
+            self.assertListEqual(self.batches, [[(1,), (2,)]])
+            await buffer.add((3,))
+            await buffer.close()
+
+        self.loop.run_until_complete(send())
+        self.assertListEqual(self.batches, [[(1,), (2,)], [(3,)]])
+
+    def test_discard(self):
+        async def send():
+            buffer = gibbon.BatchBuffer(self.write, 1000, linger=10)
+            await buffer.add((1,))
+            await buffer.close(discard=True)
+
+        self.loop.run_until_complete(send())
+        self.assertListEqual(self.batches, [])
+
+    def test_close_while_flushing(self):
+        async def slow_write(rows):
+            await asyncio.sleep(0.02)
+            self.batches.append(rows)
+
+        async def send():
+            buffer = gibbon.BatchBuffer(slow_write, 1000, linger=0.001)
+            await buffer.add((1,))
+            while not buffer._lock or not buffer._lock.locked():
+                await asyncio.sleep(0.001)
+            # buffered during the background write
+            await buffer.add((2,))
+            await buffer.close()
+            # no flusher outlives the buffer
+            return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+        self.assertListEqual(self.loop.run_until_complete(send()), [])
+        self.assertListEqual(self.batches, [[(1,)], [(2,)]])
+
+    def test_failed_flush(self):
+        async def fail(rows):
+            raise ValueError(rows)
+
+        async def send():
+            buffer = gibbon.BatchBuffer(fail, 1000, linger=0.01)
+            await buffer.add((1,))
+            await asyncio.sleep(0.1)
+            await buffer.add((2,))
+
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(send())
+
+
+class TestLinger(unittest.TestCase):
+    """Rows sent one by one reach the target before the end of a stream that waits for them"""
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, target_cfg, written, **kwargs):
+        class Waiting(gibbon.SequenceWrapper):
+            async def __anext__(self):
+                try:
+                    return await super().__anext__()
+                except StopAsyncIteration:
+                    for _ in range(100):
+                        if written():
+                            break
+                        await asyncio.sleep(0.02)
+                    else:
+                        raise TimeoutError('rows were not written on time')
+                    raise
+
+        w = chained_workflow('linger', dict(source=Waiting, iterable=[(1, 'a'), (2, 'b')]), target_cfg,
+                             ('exp', gibbon.Expression, dict(func=lambda r: r, **kwargs)))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+
+    def test_csv(self):
+        filename = os.path.join(self.tmp.name, 'out.csv')
+
+        def written():
+            if not os.path.exists(filename):
+                return False
+            with open(filename) as f:
+                return len(f.read().split()) == 2
+
+        self._run(dict(target=gibbon.CSVTargetFile, filename=filename, linger=0.05), written)
+        self.assertTrue(written())
+
+    def test_sqlite(self):
+        database = os.path.join(self.tmp.name, 'out.db')
+        with sqlite3.connect(database) as conn:
+            conn.execute('CREATE TABLE t (id INTEGER, name TEXT)')
+        conn.close()
+
+        def written():
+            conn = sqlite3.connect(database)
+            try:
+                return conn.execute('SELECT count(*) FROM t').fetchone()[0] == 2
+            finally:
+                conn.close()
+
+        self._run(dict(target=gibbon.SQLiteTarget, database=database, table='t', linger=0.05), written)
+
+    def test_parallel_expression(self):
+        filename = os.path.join(self.tmp.name, 'out.jsonl')
+
+        def written():
+            if not os.path.exists(filename):
+                return False
+            with open(filename) as f:
+                return len(f.readlines()) == 2
+
+        self._run(dict(target=gibbon.JSONLinesTargetFile, filename=filename, fields=('id', 'name'), linger=0.05),
+                  written, parallelism=2, batch_size=100, linger=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import asyncio
+import datetime
+from pathlib import Path
+import os
+
+from src import gibbon
+
+
+def get_tgt_path():
+    p = Path(__file__)
+    p = Path(p.absolute())
+    p = Path(p.parents[1])
+    p = Path.joinpath(p, 'output.gbc')
+    return p
+
+
+schema = (('name', 'str'), ('age', 'int'), ('score', 'float'), ('active', 'bool'), ('seen', 'date'))
+
+input_data = [
+    ('Brian', 23, 1.5, True, datetime.date(2020, 1, 1)),
+    ('Joe', None, 2.0, False, None),
+    ('Mary', 40, None, True, datetime.date(2020, 1, 3)),
+    (None, 25, 0.25, None, datetime.date(2020, 1, 4)),
+    ('Billy', 15, -1.0, False, datetime.date(2020, 1, 5)),
+]
+
+
+class TestColumnarFile(unittest.TestCase):
+    def setUp(self):
+        self._loop = asyncio.new_event_loop()
+        p = get_tgt_path()
+        self._filename = p.absolute()
+        if p.exists():
+            os.remove(p.absolute())
+
+    def write(self, rows, **kwargs):
+        io = gibbon.ColumnarTargetFile(filename=self._filename, loop=self._loop, schema=schema, **kwargs)
+
+        async def write_file():
+            async with io:
+                for row in rows:
+                    await io.send(row)
+
+        self._loop.run_until_complete(write_file())
+
+    def read(self, **kwargs):
+        io = gibbon.ColumnarSourceFile(filename=self._filename, loop=self._loop, **kwargs)
+
+        async def read_file():
+            lines = []
+            async with io:
+                async for line in io:
+                    lines.append(line)
+            return lines
+
+        return self._loop.run_until_complete(read_file())
+
+    def test_round_trip(self):
+        for compression in (None, 'zlib', 'lzma'):
+            with self.subTest(compression=compression):
+                self.write(input_data, compression=compression, row_group_size=2)
+                self.assertSequenceEqual(self.read(), input_data)
+
+    def test_column_subset(self):
+        self.write(input_data, compression='zlib', row_group_size=2)
+        self.assertSequenceEqual(self.read(columns=('age', 'name')), [(r[1], r[0]) for r in input_data])
+        self.assertSequenceEqual(self.read(columns=(2,)), [(r[2],) for r in input_data])
+
+    def test_row_group_subset(self):
+        self.write(input_data, row_group_size=2)
+        self.assertSequenceEqual(self.read(row_groups=(1, 2)), input_data[2:])
+
+    def test_empty(self):
+        self.write([])
+        self.assertSequenceEqual(self.read(), [])
+
+    def test_failed_append(self):
+        self.write(input_data[:2], row_group_size=1)
+        io = gibbon.ColumnarTargetFile(filename=self._filename, loop=self._loop, schema=schema, row_group_size=1,
+                                       append=True)
+
+        async def fail():
+            async with io:
+                for row in input_data[2:]:
+                    await io.send(row)
+                raise RuntimeError('failed')
+
+        with self.assertRaises(RuntimeError):
+            self._loop.run_until_complete(fail())
+        self.assertSequenceEqual(self.read(), input_data[:2])
+
+        self.write(input_data[2:], row_group_size=1, append=True)
+        self.assertSequenceEqual(self.read(), input_data)
+
+    def test_invalid_type(self):
+        with self.assertRaises(ValueError):
+            gibbon.ColumnarTargetFile(filename=self._filename, loop=self._loop, schema=(('a', 'complex'),))
+
+    def tearDown(self):
+        self._loop.close()
+        p = get_tgt_path()
+        if p.exists():
+            os.remove(p.absolute())
+
+
+class TestColumnarWorkflow(unittest.TestCase):
+    def setUp(self):
+        p = get_tgt_path()
+        self._filename = p.absolute()
+
+        self.w_write = gibbon.Workflow('columnar_write')
+        self.w_write.add_source('src')
+        self.w_write.add_target('col', source='src')
+
+        self.w_read = gibbon.Workflow('columnar_read')
+        self.w_read.add_source('col')
+        self.w_read.add_target('tgt', source='col')
+
+    def test_columnar_round_trip(self):
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=input_data)
+        cfg.add_configuration('col', target=gibbon.ColumnarTargetFile, filename=self._filename,
+                              schema=schema, compression='zlib')
+        self.w_write.prepare(cfg)
+        self.w_write.run(gibbon.get_async_executor(shutdown=True))
+
+        results = []
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('col', source=gibbon.ColumnarSourceFile, filename=self._filename)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=results)
+        self.w_read.prepare(cfg)
+        self.w_read.run(gibbon.get_async_executor(shutdown=True))
+        self.assertSequenceEqual(results, input_data)
+
+    def tearDown(self):
+        p = get_tgt_path()
+        if p.exists():
+            os.remove(p.absolute())
+
+
+if __name__ == '__main__':
+    unittest.main()
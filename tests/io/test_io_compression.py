@@ -0,0 +1,110 @@
+import unittest
+import asyncio
+import gzip
+from pathlib import Path
+import os
+
+from src import gibbon
+
+
+def get_path(name):
+    p = Path(__file__)
+    p = Path(p.absolute())
+    p = Path(p.parents[1])
+    p = Path.joinpath(p, name)
+    return p
+
+
+input_data = [
+    ('Brian', '23'),
+    ('Joe', 'multi\nline'),
+    ('Mary', '40'),
+    ('Alice', '25'),
+    ('Billy', '15'),
+]
+
+
+class TestCompressionHelpers(unittest.TestCase):
+    def test_infer(self):
+        self.assertEqual(gibbon.infer_compression('data.csv.gz'), 'gzip')
+        self.assertEqual(gibbon.infer_compression('data.csv.bz2'), 'bz2')
+        self.assertEqual(gibbon.infer_compression('data.csv.XZ'), 'xz')
+        self.assertIsNone(gibbon.infer_compression('data.csv'))
+        self.assertEqual(gibbon.infer_compression('data.csv', compression='bz2'), 'bz2')
+        self.assertIsNone(gibbon.infer_compression('data.csv.gz', compression=None))
+        with self.assertRaises(ValueError):
+            gibbon.infer_compression('data.csv', compression='zip')
+
+    def test_small_chunks(self):
+        p = get_path('output.txt.gz')
+        lines = [f'line {i}\n' for i in range(100)]
+        try:
+            with gibbon.open_compressed_file(p, 'w', chunk_size=7, buffers=2) as f:
+                for line in lines:
+                    f.write(line)
+            with gibbon.open_compressed_file(p, 'r', chunk_size=5, buffers=2) as f:
+                self.assertSequenceEqual(list(f), lines)
+            with gzip.open(p, 'rt') as f:
+                self.assertEqual(f.read(), ''.join(lines))
+        finally:
+            os.remove(p)
+
+    def test_early_close(self):
+        p = get_path('output.txt.xz')
+        try:
+            with gibbon.open_compressed_file(p, 'w') as f:
+                for i in range(10000):
+                    f.write(f'line {i}\n')
+            with gibbon.open_compressed_file(p, 'r', chunk_size=16, buffers=1) as f:
+                self.assertEqual(f.readline(), 'line 0\n')
+            self.assertTrue(f.closed)
+        finally:
+            os.remove(p)
+
+
+class TestCompressedCSV(unittest.TestCase):
+
+    def round_trip(self, filename, **kwargs):
+        self.w_write = gibbon.Workflow('csv_write')
+        self.w_write.add_source('src')
+        self.w_write.add_target('csv', source='src')
+
+        self.w_read = gibbon.Workflow('csv_read')
+        self.w_read.add_source('csv')
+        self.w_read.add_target('tgt', source='csv')
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=input_data)
+        cfg.add_configuration('csv', target=gibbon.CSVTargetFile, filename=filename, **kwargs)
+        self.w_write.prepare(cfg)
+        self.w_write.run(gibbon.get_async_executor(shutdown=True))
+
+        results = []
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('csv', source=gibbon.CSVSourceFile, filename=filename, **kwargs)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=results)
+        self.w_read.prepare(cfg)
+        self.w_read.run(gibbon.get_async_executor(shutdown=True))
+        return results
+
+    def test_inferred(self):
+        for ext in ('gz', 'bz2', 'xz'):
+            with self.subTest(ext=ext):
+                p = get_path(f'output.csv.{ext}')
+                try:
+                    self.assertSequenceEqual(self.round_trip(p.absolute()), input_data)
+                finally:
+                    os.remove(p)
+
+    def test_explicit(self):
+        p = get_path('output.dat')
+        try:
+            self.assertSequenceEqual(self.round_trip(p.absolute(), compression='gzip'), input_data)
+            with gzip.open(p, 'rt') as f:
+                self.assertTrue(f.readline().startswith('Brian'))
+        finally:
+            os.remove(p)
+
+
+if __name__ == '__main__':
+    unittest.main()
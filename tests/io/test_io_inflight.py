@@ -0,0 +1,70 @@
+import asyncio
+import random
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+class SlowTarget(gibbon.SequenceWrapper):
+    """A target whose writes wait on a remote service"""
+    concurrency = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.running = 0
+
+    async def send(self, data):
+        self.running += 1
+        SlowTarget.concurrency = max(SlowTarget.concurrency, self.running)
+        try:
+            await asyncio.sleep(random.uniform(0.005, 0.02))
+            if data[1] == 'fail':
+                raise ValueError(data)
+            await super().send(data)
+        finally:
+            self.running -= 1
+
+
+class TestInFlight(unittest.TestCase):
+    def setUp(self):
+        SlowTarget.concurrency = 0
+
+    def _run(self, data, **kwargs):
+        sink = []
+        w = chained_workflow('in_flight', dict(source=gibbon.SequenceWrapper, iterable=data),
+                             dict(target=SlowTarget, container=sink, **kwargs))
+        return w.run(gibbon.get_async_executor(shutdown=True)), sink
+
+    def test_concurrent_writes(self):
+        data = [(i, 'row') for i in range(40)]
+        ok, sink = self._run(data, in_flight=8)
+        self.assertTrue(ok)
+        self.assertCountEqual(sink, data)
+        # the writes overlap up to the window
+        self.assertEqual(SlowTarget.concurrency, 8)
+
+        SlowTarget.concurrency = 0
+        ok, sink = self._run(data)
+        self.assertTrue(ok)
+        self.assertListEqual(sink, data)
+        self.assertEqual(SlowTarget.concurrency, 1)
+
+    def test_ordered_by(self):
+        data = [(i % 3, i) for i in range(30)]
+        ok, sink = self._run(data, in_flight=6, ordered_by=0)
+        self.assertTrue(ok)
+        self.assertCountEqual(sink, data)
+        for key in range(3):
+            self.assertListEqual([r for r in sink if r[0] == key], [r for r in data if r[0] == key])
+        self.assertEqual(SlowTarget.concurrency, 3)
+
+    def test_failure(self):
+        data = [(i, 'fail' if i == 5 else 'row') for i in range(40)]
+        ok, sink = self._run(data, in_flight=4)
+        self.assertFalse(ok)
+        self.assertLess(len(sink), 39)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import asyncio
+import json
+from pathlib import Path
+import os
+
+from src import gibbon
+
+
+def get_path(name):
+    p = Path(__file__)
+    p = Path(p.absolute())
+    p = Path(p.parents[1])
+    p = Path.joinpath(p, name)
+    return p
+
+
+events = [
+    {'id': 1, 'kind': 'click', 'payload': {'x': 3}},
+    {'id': 2, 'kind': 'view'},
+    {'id': 3, 'kind': 'click', 'extra': True, 'payload': {'x': 5}},
+]
+
+
+class TestJSONLines(unittest.TestCase):
+    def setUp(self):
+        self._loop = asyncio.new_event_loop()
+
+    def read(self, filename, **kwargs):
+        io = gibbon.JSONLinesSourceFile(filename=filename, loop=self._loop, **kwargs)
+
+        async def read_file():
+            rows = []
+            async with io:
+                async for row in io:
+                    rows.append(row)
+            return rows
+
+        return self._loop.run_until_complete(read_file())
+
+    def test_read_projected(self):
+        p = get_path('output.jsonl')
+        try:
+            with open(p, 'w') as f:
+                for e in events:
+                    f.write(json.dumps(e) + '\n')
+                f.write('\n')
+            rows = self.read(p, fields=('kind', 'id', 'payload'), chunk_size=2)
+            self.assertSequenceEqual(rows, [('click', 1, {'x': 3}), ('view', 2, None), ('click', 3, {'x': 5})])
+        finally:
+            os.remove(p)
+
+    def test_workflow_round_trip(self):
+        fields = ('id', 'kind')
+        data = [(e['id'], e['kind']) for e in events]
+
+        for name in ('output.jsonl', 'output.jsonl.gz'):
+            with self.subTest(filename=name):
+                p = get_path(name)
+                try:
+                    w = gibbon.Workflow('jsonl_write')
+                    w.add_source('src')
+                    w.add_target('jsonl', source='src')
+
+                    cfg = gibbon.Configuration()
+                    cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=data)
+                    cfg.add_configuration('jsonl', target=gibbon.JSONLinesTargetFile, filename=p, fields=fields,
+                                          chunk_size=2)
+                    w.prepare(cfg)
+                    w.run(gibbon.get_async_executor(shutdown=True))
+
+                    self.assertSequenceEqual(self.read(p, fields=fields), data)
+                finally:
+                    os.remove(p)
+
+    def tearDown(self):
+        self._loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+class CountingReader(gibbon.CSVSourceFile):
+    opened = 0
+    most_opened = 0
+
+    async def __aenter__(self):
+        CountingReader.opened += 1
+        CountingReader.most_opened = max(CountingReader.most_opened, CountingReader.opened)
+        return await super().__aenter__()
+
+    async def __aexit__(self, *args):
+        CountingReader.opened -= 1
+        return await super().__aexit__(*args)
+
+
+class FailOnce:
+    def __init__(self, at):
+        self.at = at
+        self.failed = False
+
+    def __call__(self, row):
+        if row == self.at and not self.failed:
+            self.failed = True
+            raise RuntimeError(f'failure on {row}')
+        return row
+
+
+class TestMultiFileSource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rows = []
+        for day in range(1, 7):
+            filename = os.path.join(self.tmp.name, f'2024-01-0{day}.csv')
+            rows = [(str(day), str(i)) for i in range(day * 10)]
+            with open(filename, 'w') as f:
+                f.writelines(','.join(row) + '\n' for row in rows)
+            self.rows.extend((*row, filename) for row in rows)
+        with open(os.path.join(self.tmp.name, 'README'), 'w') as f:
+            f.write('not a csv file\n')
+        CountingReader.opened = CountingReader.most_opened = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, sink=None, checkpoints=None, fail=None, **kwargs):
+        sink = [] if sink is None else sink
+        nodes = [] if fail is None else [('fail', gibbon.Expression, dict(func=fail))]
+        w = chained_workflow('multifile', dict(source=gibbon.MultiFileSource, **kwargs),
+                             dict(target=gibbon.SequenceWrapper, container=sink), *nodes)
+        w.set_checkpointing(checkpoints, interval=10)
+        return w.run(gibbon.get_async_executor(shutdown=True)), sink
+
+    def test_ordered(self):
+        ok, sink = self._run(filenames=os.path.join(self.tmp.name, '*.csv'), reader=CountingReader, concurrency=3,
+                             buffer_size=4, ordered=True, with_filename=True)
+        self.assertTrue(ok)
+        self.assertListEqual(sink, self.rows)
+        self.assertEqual(CountingReader.most_opened, 3)
+        self.assertEqual(CountingReader.opened, 0)
+
+    def test_unordered(self):
+        ok, sink = self._run(filenames=os.path.join(self.tmp.name, '*.csv'), reader=CountingReader, concurrency=2)
+        self.assertTrue(ok)
+        self.assertCountEqual(sink, [row[:2] for row in self.rows])
+        self.assertEqual(CountingReader.most_opened, 2)
+
+    def test_file_list(self):
+        filenames = [row[2] for row in self.rows if row[1] == '0'][:2]
+        ok, sink = self._run(filenames=reversed(filenames), ordered=True, predicate=lambda r: r[1] == '5')
+        self.assertTrue(ok)
+        self.assertListEqual(sink, [('2', '5'), ('1', '5')])
+
+        ok, sink = self._run(filenames=os.path.join(self.tmp.name, '*.json'))
+        self.assertTrue(ok)
+        self.assertListEqual(sink, [])
+
+    def test_failure(self):
+        filenames = [os.path.join(self.tmp.name, f'2024-01-0{day}.csv') for day in (1, 9, 2)]
+        for ordered in (True, False):
+            ok, sink = self._run(filenames=filenames, ordered=ordered)
+            self.assertFalse(ok)
+
+    def test_resume_unordered(self):
+        # rows come in a different order in each run, the position of each file is what is resumed from
+        store = gibbon.CheckpointStore(self.tmp.name)
+        pattern = os.path.join(self.tmp.name, '*.csv')
+        sink, fail = [], FailOnce(('3', '17'))
+        ok, _ = self._run(sink, store, fail, filenames=pattern, concurrency=3, buffer_size=2)
+        self.assertFalse(ok)
+        self.assertIsNotNone(store.load('multifile'))
+        ok, _ = self._run(sink, store, fail, filenames=pattern, concurrency=3, buffer_size=2)
+        self.assertTrue(ok)
+        self.assertCountEqual(sink, [row[:2] for row in self.rows])
+
+    def test_seek(self):
+        async def read(source, position=None):
+            rows = []
+            async with source as src:
+                if position is not None:
+                    await src.seek(position)
+                async for row in src:
+                    rows.append(row)
+                return rows, src.tell()
+
+        loop = asyncio.new_event_loop()
+        try:
+            pattern = os.path.join(self.tmp.name, '*.csv')
+            rows, position = loop.run_until_complete(read(gibbon.MultiFileSource(pattern, loop, concurrency=3)))
+            self.assertEqual(len(rows), len(self.rows))
+            self.assertEqual(sum(position.values()), len(self.rows))
+
+            # rows appended to a file and a new file
+            with open(self.rows[0][2], 'a') as f:
+                f.write('1,new\n')
+            with open(os.path.join(self.tmp.name, '2024-01-07.csv'), 'w') as f:
+                f.write('7,0\n')
+            rows, position = loop.run_until_complete(read(gibbon.MultiFileSource(pattern, loop, concurrency=3),
+                                                          position))
+            self.assertCountEqual(rows, [('1', 'new'), ('7', '0')])
+            self.assertEqual(sum(position.values()), len(self.rows) + 2)
+        finally:
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+class CountingWriter(gibbon.CSVTargetFile):
+    opened = 0
+    most_opened = 0
+    openings = 0
+
+    async def __aenter__(self):
+        CountingWriter.opened += 1
+        CountingWriter.openings += 1
+        CountingWriter.most_opened = max(CountingWriter.most_opened, CountingWriter.opened)
+        return await super().__aenter__()
+
+    async def __aexit__(self, *args):
+        CountingWriter.opened -= 1
+        return await super().__aexit__(*args)
+
+
+data = [(f'2024-01-0{i % 5 + 1}', i) for i in range(40)]
+
+
+class TestPartitionedTarget(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        CountingWriter.opened = CountingWriter.most_opened = CountingWriter.openings = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, **kwargs):
+        w = chained_workflow('partitioned', dict(source=gibbon.SequenceWrapper, iterable=data),
+                             dict(target=gibbon.PartitionedTarget, **kwargs))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+
+    def _read(self, filename):
+        with open(filename) as f:
+            return [(day, int(i)) for day, i in csv.reader(f)]
+
+    def test_partitions(self):
+        filename = os.path.join(self.tmp.name, 'out', '{}.csv')
+        self._run(filename=filename, partition_by=0, writer=CountingWriter, max_open=2, buffer_size=3)
+
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp.name, 'out'))), 5)
+        for day in range(1, 6):
+            day = f'2024-01-0{day}'
+            self.assertListEqual(self._read(filename.format(day)), [r for r in data if r[0] == day])
+        self.assertEqual(CountingWriter.most_opened, 2)
+        self.assertEqual(CountingWriter.opened, 0)
+
+    def test_buffering(self):
+        # the rows of a partition are written at once, so that a file is opened only once
+        filename = os.path.join(self.tmp.name, '{}.csv')
+        self._run(filename=filename, partition_by=0, writer=CountingWriter, max_open=1, buffer_size=10,
+                  max_buffered=40)
+        self.assertEqual(CountingWriter.openings, 5)
+
+        # too many rows are buffered overall, the largest buffer is written
+        CountingWriter.openings = 0
+        self._run(filename=filename, partition_by=0, writer=CountingWriter, max_open=1, buffer_size=10,
+                  max_buffered=4)
+        self.assertGreater(CountingWriter.openings, 5)
+        self.assertListEqual(self._read(filename.format('2024-01-01')), [r for r in data if r[0] == '2024-01-01'])
+
+    def test_writer_options(self):
+        filename = os.path.join(self.tmp.name, '{}-{}.jsonl')
+        self._run(filename=filename, partition_by=lambda r: (r[0][-1], r[1] % 2), writer=gibbon.JSONLinesTargetFile,
+                  fields=('day', 'i'))
+        self.assertEqual(len(os.listdir(self.tmp.name)), 10)
+        with open(filename.format('3', 1)) as f:
+            self.assertListEqual([json.loads(line)['i'] for line in f], [7, 17, 27, 37])
+
+    def test_checkpoint(self):
+        filename = os.path.join(self.tmp.name, '{}.csv')
+        loop = asyncio.new_event_loop()
+
+        async def write(rows, resume=None, checkpoint_at=None):
+            token = None
+            async with gibbon.PartitionedTarget(filename, loop, 0, max_open=1, buffer_size=4,
+                                                resume=resume) as tgt:
+                for n, row in enumerate(rows):
+                    if n == checkpoint_at:
+                        token = await tgt.checkpoint()
+                    await tgt.send(row)
+            return token
+
+        try:
+            # a first run stops 10 rows after its checkpoint, the next run resumes from the checkpoint
+            token = loop.run_until_complete(write(data[:30], checkpoint_at=20))
+            self.assertEqual(len(token), 5)
+            loop.run_until_complete(write(data[20:], resume=token))
+        finally:
+            loop.close()
+        for day in range(1, 6):
+            day = f'2024-01-0{day}'
+            self.assertListEqual(self._read(filename.format(day)), [r for r in data if r[0] == day])
+
+
+if __name__ == '__main__':
+    unittest.main()
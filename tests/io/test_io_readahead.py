@@ -0,0 +1,105 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+class FailingSource(gibbon.SequenceWrapper):
+    async def __anext__(self):
+        row = await super().__anext__()
+        if row[0] == 3:
+            raise ValueError(row)
+        return row
+
+
+class TestReadAhead(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.loop.close()
+        self.tmp.cleanup()
+
+    def test_rows_and_position(self):
+        filename = os.path.join(self.tmp.name, 'in.csv')
+        with open(filename, 'w') as f:
+            f.writelines(f'{i},row{i}\n' for i in range(50))
+
+        async def read():
+            source = gibbon.CSVSourceFile(filename, self.loop)
+            async with gibbon.ReadAhead(source, depth=8) as src:
+                await src.seek(10)
+                rows = [await src.__anext__() for _ in range(5)]
+                # the source itself is ahead of the rows read through the wrapper
+                await asyncio.sleep(0.05)
+                self.assertEqual(src.tell(), 15)
+                self.assertGreater(source.tell(), 15)
+                rows += [row async for row in src]
+                self.assertEqual(src.tell(), 50)
+            return rows
+
+        rows = self.loop.run_until_complete(read())
+        self.assertListEqual(rows, [(str(i), f'row{i}') for i in range(10, 50)])
+
+    def test_capabilities(self):
+        src = gibbon.ReadAhead(gibbon.SQLiteSource(self.loop, 'SELECT 1', database=':memory:'))
+        self.assertFalse(hasattr(src, 'seek'))
+        self.assertTrue(hasattr(gibbon.ReadAhead(gibbon.CSVSourceFile('in.csv', self.loop)), 'seek'))
+
+    def test_failure(self):
+        async def read():
+            rows = []
+            async with gibbon.ReadAhead(FailingSource(iterable=[(i,) for i in range(10)]), depth=2) as src:
+                async for row in src:
+                    rows.append(row)
+            return rows
+
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(read())
+
+
+class TestIOExecutors(unittest.TestCase):
+    def _run(self, source_cfg, target_cfg, workflow_executor=None):
+        w = chained_workflow('io_executors', source_cfg, target_cfg)
+        w.set_io_executor(workflow_executor)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        w.set_io_executor(None)
+        return w
+
+    def test_dedicated_executors(self):
+        threads = dict()
+
+        def record(name):
+            def tuple_maker(fields):
+                threads.setdefault(name, set()).add(threading.current_thread().name)
+                return tuple(fields)
+            return tuple_maker
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'in.csv')
+            with open(filename, 'w') as f:
+                f.writelines(f'{i}\n' for i in range(100))
+
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix='shared') as pool:
+                w = self._run(dict(source=gibbon.CSVSourceFile, filename=filename, tuple_maker=record('endpoint'),
+                                   executor=2, read_ahead=10),
+                              dict(target=gibbon.CSVTargetFile, filename=filename + '.out', executor=pool))
+                self.assertTrue(all(t.startswith('gibbon-src') for t in threads['endpoint']))
+                self.assertIs(w.get_node_by_name('tgt').io_executor, pool)
+
+                self._run(dict(source=gibbon.CSVSourceFile, filename=filename, tuple_maker=record('workflow')),
+                          dict(target=gibbon.CSVTargetFile, filename=filename + '.out'), workflow_executor=pool)
+                self.assertSetEqual(threads['workflow'], {'shared_0'})
+
+            with open(filename + '.out') as f:
+                self.assertListEqual(f.read().split(), [str(i) for i in range(100)])
+
+
+if __name__ == '__main__':
+    unittest.main()
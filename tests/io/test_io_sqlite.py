@@ -0,0 +1,130 @@
+import asyncio
+import unittest
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import os
+
+from src import gibbon
+
+
+def get_db_path():
+    p = Path(__file__)
+    p = Path(p.absolute())
+    p = Path(p.parents[1])
+    p = Path.joinpath(p, 'output.db')
+    return p
+
+
+input_data = [
+    ('Brian', 23),
+    ('Joe', 35),
+    ('Mary', 40),
+    ('Alice', 25),
+    ('Billy', 15),
+]
+
+
+class TestSQLite(unittest.TestCase):
+    def setUp(self):
+        p = get_db_path()
+        self._filename = str(p.absolute())
+        if p.exists():
+            os.remove(self._filename)
+
+        with sqlite3.connect(self._filename) as conn:
+            conn.execute('CREATE TABLE people (name TEXT, age INTEGER)')
+            conn.execute('CREATE TABLE adults (name TEXT, age INTEGER)')
+        conn.close()
+
+    def fetch(self, query):
+        conn = sqlite3.connect(self._filename)
+        try:
+            return conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+    def test_target(self):
+        w = gibbon.Workflow('sqlite_write')
+        w.add_source('src')
+        w.add_target('db', source='src')
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=input_data)
+        cfg.add_configuration('db', target=gibbon.SQLiteTarget, database=self._filename, table='people',
+                              columns=('name', 'age'), batch_size=2, transaction_size=3,
+                              pragmas={'journal_mode': 'WAL', 'synchronous': 'OFF'})
+        w.prepare(cfg)
+        w.run(gibbon.get_async_executor(shutdown=True))
+
+        self.assertSequenceEqual(self.fetch('SELECT name, age FROM people ORDER BY rowid'), input_data)
+        self.assertEqual(self.fetch('PRAGMA journal_mode'), [('wal',)])
+
+    def test_source_and_target_with_pool(self):
+        with sqlite3.connect(self._filename) as conn:
+            conn.executemany('INSERT INTO people VALUES (?, ?)', input_data)
+        conn.close()
+
+        w = gibbon.Workflow('sqlite_copy')
+        w.add_source('db_src')
+        w.add_target('db_tgt', source='db_src')
+
+        with gibbon.SQLiteConnectionPool(self._filename, size=2) as pool:
+            cfg = gibbon.Configuration()
+            cfg.add_configuration('db_src', source=gibbon.SQLiteSource, pool=pool, batch_size=2,
+                                  query='SELECT name, age FROM people WHERE age > ? ORDER BY rowid',
+                                  parameters=(18,))
+            cfg.add_configuration('db_tgt', target=gibbon.SQLiteTarget, pool=pool, table='adults')
+            w.prepare(cfg)
+            w.run(gibbon.get_async_executor(shutdown=True))
+
+        self.assertSequenceEqual(self.fetch('SELECT name, age FROM adults ORDER BY rowid'),
+                                 [r for r in input_data if r[1] > 18])
+
+    def test_pool_reuse(self):
+        pool = gibbon.SQLiteConnectionPool(self._filename, size=1, pragmas={'synchronous': 'OFF'})
+        conn = pool.acquire()
+        self.assertEqual(conn.execute('PRAGMA synchronous').fetchone(), (0,))
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        pool.close()
+
+    def test_pool_exhausted(self):
+        pool = gibbon.SQLiteConnectionPool(self._filename, size=1)
+        loop = asyncio.new_event_loop()
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        async def contend():
+            conn = await pool.acquire_async(loop, executor)
+            waiting = asyncio.ensure_future(pool.acquire_async(loop, executor))
+            cancelled = asyncio.ensure_future(pool.acquire_async(loop, executor))
+            await asyncio.sleep(0.01)
+            self.assertFalse(waiting.done())
+            cancelled.cancel()
+            # the only thread of the executor is not held by the waiting endpoint
+            self.assertEqual(await loop.run_in_executor(executor, sum, (1, 2)), 3)
+            await loop.run_in_executor(executor, pool.release, conn)
+            self.assertIs(await asyncio.wait_for(waiting, 5), conn)
+            pool.release(conn)
+            return await asyncio.wait_for(pool.acquire_async(loop, executor), 5)
+
+        try:
+            self.assertIsNotNone(loop.run_until_complete(contend()))
+        finally:
+            executor.shutdown()
+            loop.close()
+            pool.close()
+
+    def test_invalid_pragma(self):
+        with self.assertRaises(ValueError):
+            gibbon.sqlite_connect(self._filename, pragmas={'synchronous; DROP TABLE people': 'OFF'})
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            p = Path(self._filename + suffix)
+            if p.exists():
+                os.remove(p.absolute())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,6 @@
+from src import gibbon
+
+
 list_of_people = [
     ('Brian', 23),
     ('Joe', 35),
@@ -25,4 +28,26 @@ list_of_items = [
     ('bar', 6),
     ('foo', 5),
     ('bar', 2)
-]
\ No newline at end of file
+]
+
+
+def chained_workflow(name, source_cfg, target_cfg, *transformations, fan_out=False):
+    """A prepared workflow from the source 'src' to the target 'tgt', configured with :source_cfg and :target_cfg,
+    through :transformations, (name, class, keyword arguments) triples chained in that order.
+    With :fan_out, the target 'other', a SequenceWrapper, reads the source as well"""
+    w = gibbon.Workflow(name)
+    w.add_source('src')
+    parent = 'src'
+    for node, cls, kwargs in transformations:
+        w.add_transformation(node, cls, source=parent, **kwargs)
+        parent = node
+    w.add_target('tgt', source=parent)
+    if fan_out:
+        w.add_target('other', source='src')
+
+    cfg = gibbon.Configuration()
+    cfg.add_configuration('src', **source_cfg)
+    cfg.add_configuration('tgt', **target_cfg)
+    cfg.add_configuration('other', target=gibbon.SequenceWrapper)
+    w.prepare(cfg)
+    return w
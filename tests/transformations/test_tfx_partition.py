@@ -0,0 +1,83 @@
+import tempfile
+import threading
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+def square(row):
+    return row[0], row[0] ** 2
+
+
+def is_even(row):
+    return row[0] % 2 == 0
+
+
+class TestPartitionRun(unittest.TestCase):
+    def _run(self, key, ordered, store=None):
+        w = gibbon.Workflow('test_partition')
+        w.add_source('src')
+        w.add_transformation('part', gibbon.Partition, source='src', key=key, out_ports=3)
+        for i in range(3):
+            w.add_transformation(f'exp{i}', gibbon.Expression, source='part', func=square)
+        w.add_complex_transformation('gather', gibbon.Gather, sources=('exp0', 'exp1', 'exp2'), ordered=ordered)
+        w.add_target('tgt', source='gather')
+        w.set_checkpointing(store, interval=5)
+        w.validate()
+        self.assertTrue(w.is_valid)
+
+        data = [(i,) for i in range(100)]
+        sink = []
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=data)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        return sink
+
+    def test_round_robin_ordered(self):
+        self.assertListEqual(self._run(None, True), [(i, i ** 2) for i in range(100)])
+
+    def test_round_robin_ordered_checkpoints(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = self._run(None, True, gibbon.CheckpointStore(tmp))
+        self.assertListEqual(sink, [(i, i ** 2) for i in range(100)])
+
+    def test_hash_unordered(self):
+        sink = self._run(lambda r: r[0] % 7, False)
+        self.assertListEqual(sorted(sink), [(i, i ** 2) for i in range(100)])
+
+
+class TestParallelism(unittest.TestCase):
+    def _run(self, cls, **kwargs):
+        sink = []
+        w = chained_workflow('test_parallelism',
+                             dict(source=gibbon.SequenceWrapper, iterable=[(i,) for i in range(1000)]),
+                             dict(target=gibbon.SequenceWrapper, container=sink), ('tfx', cls, kwargs))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        return sink
+
+    def test_expression_threads(self):
+        threads = set()
+
+        def record(row):
+            threads.add(threading.get_ident())
+            return square(row)
+
+        sink = self._run(gibbon.Expression, func=record, parallelism=4, batch_size=100)
+        self.assertListEqual(sink, [(i, i ** 2) for i in range(1000)])
+        self.assertGreater(len(threads), 1)
+
+    def test_expression_hash_key(self):
+        sink = self._run(gibbon.Expression, func=square, parallelism=3, partition_key=lambda r: r[0] % 10,
+                         batch_size=64)
+        self.assertListEqual(sink, [(i, i ** 2) for i in range(1000)])
+
+    def test_filter_processes(self):
+        sink = self._run(gibbon.Filter, condition=is_even, parallelism=2, processes=True, batch_size=250)
+        self.assertListEqual(sink, [(i,) for i in range(0, 1000, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
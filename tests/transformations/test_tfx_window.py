@@ -0,0 +1,108 @@
+import asyncio
+import time
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+events = [
+    ('a', 1), ('b', 2), ('a', 4), ('a', 6), ('b', 9), ('a', 3), ('b', 12), ('a', 21), ('a', 5),
+]
+
+
+def count(r, c):
+    return c + 1,
+
+
+class TestWindows(unittest.TestCase):
+    def test_assign(self):
+        self.assertTupleEqual(gibbon.TumblingWindow(5).assign(7), ((5, 10),))
+        self.assertTupleEqual(gibbon.SlidingWindow(10, 5).assign(7), ((0, 10), (5, 15)))
+        self.assertTupleEqual(gibbon.SlidingWindow(10, 5).assign(10), ((5, 15), (10, 20)))
+        with self.assertRaises(ValueError):
+            gibbon.SessionWindow(0)
+
+    def _run(self, window, data=events, **kwargs):
+        sink = []
+        w = chained_workflow('windows', dict(source=gibbon.SequenceWrapper, iterable=data),
+                             dict(target=gibbon.SequenceWrapper, container=sink),
+                             ('agg', gibbon.Aggregator, dict(key=lambda r: (r[0],), accumulator=count,
+                                                             initializer=(0,), window=window, **kwargs)))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        return sink, w.get_node_by_name('agg')
+
+    def test_tumbling(self):
+        sink, agg = self._run(gibbon.TumblingWindow(5), event_time=lambda r: r[1])
+        # ('a', 3) and ('a', 5) come after their windows closed
+        self.assertListEqual(sink, [('a', 0, 5, 2), ('b', 0, 5, 1), ('a', 5, 10, 1), ('b', 5, 10, 1),
+                                    ('b', 10, 15, 1), ('a', 20, 25, 1)])
+        self.assertEqual(agg.late_rows, 2)
+
+        sink, agg = self._run(gibbon.TumblingWindow(5), event_time=lambda r: r[1], allowed_lateness=5)
+        self.assertIn(('a', 0, 5, 3), sink)
+        self.assertEqual(agg.late_rows, 1)
+
+    def test_sliding(self):
+        data = [('a', t) for t in (1, 3, 6, 8, 12)]
+        sink, _ = self._run(gibbon.SlidingWindow(6, 3), data, event_time=lambda r: r[1])
+        self.assertListEqual(sink, [('a', -3, 3, 1), ('a', 0, 6, 2), ('a', 3, 9, 3), ('a', 6, 12, 2),
+                                    ('a', 9, 15, 1), ('a', 12, 18, 1)])
+
+        # hopping windows: the rows between two windows are neither aggregated nor late
+        sink, agg = self._run(gibbon.SlidingWindow(2, 5), data, event_time=lambda r: r[1])
+        self.assertListEqual(sink, [('a', 0, 2, 1), ('a', 5, 7, 1)])
+        self.assertEqual(agg.gap_rows, 3)
+        self.assertEqual(agg.late_rows, 0)
+
+    def test_session(self):
+        sink, _ = self._run(gibbon.SessionWindow(3), event_time=lambda r: r[1], allowed_lateness=10)
+        # ('a', 3) bridges two sessions, ('a', 5) comes after the merged session closed
+        self.assertListEqual(sink, [('b', 2, 5, 1), ('a', 1, 9, 4), ('b', 9, 12, 1), ('b', 12, 15, 1),
+                                    ('a', 21, 24, 1)])
+
+    def _run_until_output(self, data, **kwargs):
+        """Runs a source that ends its stream only once the aggregator output a row"""
+        first = None
+
+        class Waiting(gibbon.SequenceWrapper):
+            async def __anext__(self):
+                try:
+                    return await super().__anext__()
+                except StopAsyncIteration:
+                    await asyncio.wait_for(first.wait(), 5)
+                    raise
+
+        class Notifying(gibbon.SequenceWrapper):
+            async def send(self, data):
+                await super().send(data)
+                first.set()
+
+        sink = []
+        w = chained_workflow('latency', dict(source=Waiting, iterable=data), dict(target=Notifying, container=sink),
+                             ('agg', gibbon.Aggregator, dict(key=lambda r: (r[0],), accumulator=count,
+                                                             initializer=(0,), **kwargs)))
+
+        executor = gibbon.get_async_executor(shutdown=True)
+        first = asyncio.Event()
+        self.assertTrue(w.run(executor))
+        return sink
+
+    def test_processing_time(self):
+        # no row comes after the first two, their window is output when its time is over
+        origin = time.time()
+        sink = self._run_until_output([('a',), ('a',)], window=gibbon.TumblingWindow(0.2, origin=origin))
+        (key, start, end, value), = sink
+        self.assertTupleEqual((key, value), ('a', 2))
+        self.assertAlmostEqual(start, origin)
+        self.assertAlmostEqual(end, origin + 0.2)
+        self.assertLess(time.time() - origin, 1)
+
+    def test_low_latency(self):
+        sink = self._run_until_output([('a', 1), ('a', 7)], window=gibbon.TumblingWindow(5),
+                                      event_time=lambda r: r[1])
+        self.assertListEqual(sink, [('a', 0, 5, 1), ('a', 5, 10, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
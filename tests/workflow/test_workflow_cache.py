@@ -0,0 +1,184 @@
+import os
+import tempfile
+import unittest
+from src import gibbon
+
+
+calls = []
+
+
+def parse(row):
+    calls.append(row)
+    return row[0], int(row[1])
+
+
+FACTOR = 2
+
+
+def factor():
+    return FACTOR
+
+
+def scale(row):
+    calls.append(row)
+    return row[0], int(row[1]) * factor()
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = gibbon.ResultCache(os.path.join(self.tmp.name, 'cache'))
+        self.filename = os.path.join(self.tmp.name, 'in.csv')
+        self._write_source(['c,3', 'a,1', 'b,2'])
+        calls.clear()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_source(self, lines):
+        with open(self.filename, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def _build(self, prefix, sink, **source_cfg):
+        w = gibbon.Workflow(f'{prefix}workflow')
+        w.add_source(f'{prefix}src')
+        w.add_transformation(f'{prefix}parse', gibbon.Expression, source=f'{prefix}src', func=parse)
+        w.add_transformation(f'{prefix}sort', gibbon.Sorter, source=f'{prefix}parse', key=lambda r: r[0])
+        w.add_target(f'{prefix}tgt', source=f'{prefix}sort')
+        w.set_result_cache(self.cache)
+        w.set_cacheable(f'{prefix}sort')
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration(f'{prefix}src', **(source_cfg or dict(source=gibbon.CSVSourceFile,
+                                                                      filename=self.filename)))
+        cfg.add_configuration(f'{prefix}tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+        return w
+
+    def test_replay(self):
+        sink = []
+        w = self._build('', sink)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 3)
+        self.assertGreater(self.cache.size, 0)
+
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 3)
+        self.assertListEqual(sink, [('a', 1), ('b', 2), ('c', 3)] * 2)
+
+        # another workflow sharing the same prefix
+        other_sink = []
+        self.assertTrue(self._build('other_', other_sink).run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 3)
+        self.assertListEqual(other_sink, [('a', 1), ('b', 2), ('c', 3)])
+
+    def test_invalidation(self):
+        sink = []
+        w = self._build('', sink)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+
+        self._write_source(['d,4', 'c,3', 'a,1', 'b,2'])
+        sink.clear()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 7)
+        self.assertListEqual(sink, [('a', 1), ('b', 2), ('c', 3), ('d', 4)])
+
+        w.invalidate_cache('sort')
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 11)
+
+        # a change of the configuration makes another result
+        w.get_node_by_name('sort').reverse = True
+        sink.clear()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 15)
+        self.assertListEqual(sink, [('d', 4), ('c', 3), ('b', 2), ('a', 1)])
+
+    def test_referenced_globals(self):
+        global FACTOR, factor
+        sink = []
+        w = self._build('', sink)
+        w.get_node_by_name('parse').func = scale
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 3)
+
+        # a constant read by a helper function changes
+        saved_factor, saved_helper = FACTOR, factor
+        try:
+            FACTOR = 3
+            sink.clear()
+            self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+            self.assertEqual(len(calls), 6)
+            self.assertListEqual(sink, [('a', 3), ('b', 6), ('c', 9)])
+
+            # the helper function changes
+            factor = lambda: 1
+            sink.clear()
+            self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+            self.assertEqual(len(calls), 9)
+            self.assertListEqual(sink, [('a', 1), ('b', 2), ('c', 3)])
+        finally:
+            FACTOR, factor = saved_factor, saved_helper
+
+    def test_multiple_files(self):
+        part = os.path.join(self.tmp.name, 'part1.csv')
+        with open(part, 'w') as f:
+            f.write('e,5\n')
+        sink = []
+        w = self._build('', sink, source=gibbon.MultiFileSource, filenames=os.path.join(self.tmp.name, '*.csv'))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 4)
+
+        # a matched file changes
+        with open(part, 'a') as f:
+            f.write('f,6\n')
+        sink.clear()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 9)
+        self.assertListEqual(sink, [('a', 1), ('b', 2), ('c', 3), ('e', 5), ('f', 6)])
+
+        # another file matches the pattern
+        with open(os.path.join(self.tmp.name, 'part2.csv'), 'w') as f:
+            f.write('g,7\n')
+        sink.clear()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 15)
+        self.assertListEqual(sink, [('a', 1), ('b', 2), ('c', 3), ('e', 5), ('f', 6), ('g', 7)])
+
+        # a file of a list changes
+        w = self._build('', sink, source=gibbon.MultiFileSource, filenames=[self.filename, part])
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self._write_source(['a,1'])
+        sink.clear()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 23)
+        self.assertListEqual(sink, [('a', 1), ('e', 5), ('f', 6)])
+
+    def test_lru_eviction(self):
+        sinks = [], []
+        w = self._build('', sinks[0])
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        first = self.cache.size
+
+        self.cache.max_size = first + first // 2
+        w.get_node_by_name('sort').reverse = True
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(self.cache.size, first)
+
+        # the first result was evicted
+        w.get_node_by_name('sort').reverse = False
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(calls), 9)
+
+    def test_not_cacheable(self):
+        w = gibbon.Workflow('split')
+        w.add_source('src')
+        w.add_complex_transformation('split', gibbon.Split, source='src', func=lambda r: r[0] % 2)
+        w.set_cacheable('split')
+        self.assertFalse(w.is_valid)
+
+
+if __name__ == '__main__':
+    unittest.main()
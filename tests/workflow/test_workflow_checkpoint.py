@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+from src import gibbon
+
+
+class FailOnce:
+    """Raises when the row :at goes through the first time"""
+    def __init__(self, at):
+        self.at = at
+        self.failed = False
+
+    def __call__(self, row):
+        if row[0] == self.at and not self.failed:
+            self.failed = True
+            raise RuntimeError(f'failure on {row}')
+        return row
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = gibbon.CheckpointStore(self.tmp.name)
+        self.data = [(i,) for i in range(100)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resume(self):
+        sink = []
+        w = gibbon.Workflow('resume')
+        w.add_source('src')
+        w.add_transformation('enum', gibbon.Enumerator, source='src', start_with=1000)
+        w.add_transformation('fail', gibbon.Expression, source='enum', func=FailOnce(1055))
+        w.add_target('tgt', source='fail')
+        w.set_checkpointing(self.store, interval=10)
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=self.data)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+
+        self.assertFalse(w.run(gibbon.get_async_executor(shutdown=True)))
+        snapshot = self.store.load('resume')
+        self.assertIsNotNone(snapshot)
+        self.assertLessEqual(snapshot['id'], 5)
+        self.assertLess(len(sink), 100)
+
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(sink, [(1000 + i, i) for i in range(100)])
+        self.assertIsNone(self.store.load('resume'))
+
+    def test_aggregator_state(self):
+        sink = []
+        w = gibbon.Workflow('aggregate')
+        w.add_source('src')
+        w.add_transformation('fail', gibbon.Expression, source='src', func=FailOnce(42))
+        w.add_transformation('agg', gibbon.Aggregator, source='fail', key=lambda r: (r[0] % 2,),
+                             accumulator=gibbon.simple_sum(0), initializer=(0,))
+        w.add_target('tgt', source='agg')
+        w.set_checkpointing(self.store, interval=10)
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=self.data)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+
+        self.assertFalse(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(sink, [])
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(sorted(sink), [(0, 2450), (1, 2500)])
+
+    def test_csv_target(self):
+        filename = os.path.join(self.tmp.name, 'out.csv')
+        w = gibbon.Workflow('csv')
+        w.add_source('src')
+        w.add_transformation('fail', gibbon.Expression, source='src', func=FailOnce(77))
+        w.add_target('tgt', source='fail')
+        w.set_checkpointing(self.store, interval=10)
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=self.data)
+        cfg.add_configuration('tgt', target=gibbon.CSVTargetFile, filename=filename)
+        w.prepare(cfg)
+
+        self.assertFalse(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        with open(filename) as f:
+            self.assertListEqual([line.strip() for line in f], [str(i) for i in range(100)])
+
+    def test_jsonl_endpoints(self):
+        source = os.path.join(self.tmp.name, 'in.jsonl')
+        target = os.path.join(self.tmp.name, 'out.jsonl')
+        with open(source, 'w') as f:
+            for i in range(100):
+                f.write(f'{{"a": {i}}}\n')
+
+        w = gibbon.Workflow('jsonl')
+        w.add_source('src')
+        w.add_transformation('fail', gibbon.Expression, source='src', func=FailOnce(63))
+        w.add_target('tgt', source='fail')
+        w.set_checkpointing(self.store, interval=10)
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.JSONLinesSourceFile, filename=source, fields=('a',),
+                              chunk_size=7)
+        cfg.add_configuration('tgt', target=gibbon.JSONLinesTargetFile, filename=target, fields=('a',),
+                              chunk_size=4)
+        w.prepare(cfg)
+
+        self.assertFalse(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        with open(source) as f_in, open(target) as f_out:
+            self.assertListEqual(f_out.readlines(), f_in.readlines())
+
+    def test_disabled(self):
+        sink = []
+        w = gibbon.Workflow('disabled')
+        w.add_source('src')
+        w.add_transformation('fail', gibbon.Expression, source='src', func=FailOnce(5))
+        w.add_target('tgt', source='fail')
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=self.data)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+
+        self.assertFalse(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(sink[-100:], self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
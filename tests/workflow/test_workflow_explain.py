@@ -0,0 +1,110 @@
+import unittest
+
+from src import gibbon
+from src.gibbon import col
+
+
+def double(row):
+    return row[0] * 2,
+
+
+class TestExplain(unittest.TestCase):
+    def setUp(self):
+        w = gibbon.Workflow('explained')
+        w.add_source('src')
+        w.add_transformation('filter', gibbon.Filter, source='src', condition=col(0) >= 10)
+        w.add_transformation('exp', gibbon.Expression, source='filter', func=double, parallelism=2, batch_size=10)
+        w.add_transformation('part', gibbon.Partition, source='exp', key=lambda r: r[0], out_ports=2)
+        w.add_target('tgt1', source='part')
+        w.add_target('tgt2', source='part')
+        self.w = w
+
+    def _prepare(self):
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=[(i,) for i in range(100)])
+        cfg.add_configuration('tgt1', target=gibbon.SequenceWrapper)
+        cfg.add_configuration('tgt2', target=gibbon.SequenceWrapper)
+        self.w.prepare(cfg)
+
+    def test_explain(self):
+        text = self.w.explain()
+        self.assertNotIn('predicate', text)
+
+        self._prepare()
+        lines = self.w.explain().splitlines()
+        self.assertListEqual(lines, [
+            'Workflow explained',
+            '  src (Source)',
+            '      predicate: col(0) >= 10',
+            '      queue: 1 unbounded fifo queue',
+            '  filter (Filter) <- src',
+            '      condition pushed down',
+            '      queue: 1 unbounded fifo queue',
+            '  exp (Expression) <- filter',
+            '      parallelism: 2 threads, round-robin, batches of 10',
+            '      queue: 1 unbounded fifo queue',
+            '  part (Partition) <- exp',
+            '      routes rows to 2 targets by hash',
+            '      queue: 2 unbounded fifo queues',
+            '  tgt1 (Target) <- part',
+            '  tgt2 (Target) <- part',
+        ])
+
+    def test_analyze(self):
+        self._prepare()
+        text = self.w.explain(gibbon.get_async_executor(shutdown=True), analyze=True)
+        lines = text.splitlines()
+        self.assertEqual(lines[0], 'Workflow explained (SUCCESS)')
+        actual = [line.strip() for line in lines if line.strip().startswith('actual:')]
+        self.assertEqual(len(actual), 6)
+        self.assertTrue(actual[0].startswith('actual: rows in=0 out=90,'))
+        for line in actual[1:4]:
+            self.assertTrue(line.startswith('actual: rows in=90 out=90,'))
+        rows = [int(line.split()[2][3:]) for line in actual[4:]]
+        self.assertEqual(sum(rows), 90)
+
+    def test_analyze_union(self):
+        w = gibbon.Workflow('merged')
+        w.add_source('src1')
+        w.add_source('src2')
+        w.add_complex_transformation('union', gibbon.Union, sources=('src1', 'src2'))
+        w.add_transformation('part', gibbon.Partition, source='union', out_ports=2)
+        w.add_transformation('exp0', gibbon.Expression, source='part', func=double)
+        w.add_transformation('exp1', gibbon.Expression, source='part', func=double)
+        w.add_complex_transformation('gather', gibbon.Gather, sources=('exp0', 'exp1'), ordered=True)
+        w.add_target('tgt', source='gather')
+        sink = []
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src1', source=gibbon.SequenceWrapper, iterable=[(i,) for i in range(10)])
+        cfg.add_configuration('src2', source=gibbon.SequenceWrapper, iterable=[(i,) for i in range(10, 20)])
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+
+        lines = w.explain(gibbon.get_async_executor(shutdown=True), analyze=True).splitlines()
+        self.assertEqual(lines[0], 'Workflow merged (SUCCESS)')
+        self.assertCountEqual(sink, [(i * 2,) for i in range(20)])
+        actual = [line.strip() for line in lines if line.strip().startswith('actual:')]
+        self.assertTrue(actual[2].startswith('actual: rows in=20 out=20,'))
+        self.assertTrue(actual[-1].startswith('actual: rows in=20 out=0,'))
+
+    def test_statistics(self):
+        self._prepare()
+        analyzer = gibbon.RunAnalyzer()
+        self.w._analyzer = analyzer
+        try:
+            self.assertTrue(self.w.run(gibbon.get_async_executor(shutdown=True)))
+        finally:
+            self.w._analyzer = None
+
+        stats = analyzer.statistics
+        self.assertEqual(stats['exp'].rows_in, 90)
+        self.assertEqual(stats['part'].rows_out(False), 90)
+        self.assertEqual(stats['tgt1'].rows_in + stats['tgt2'].rows_in, 90)
+        for s in stats.values():
+            self.assertGreaterEqual(s.elapsed, s.busy)
+            self.assertGreater(s.busy, 0)
+        self.assertGreater(stats['filter'].row_size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
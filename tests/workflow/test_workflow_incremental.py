@@ -0,0 +1,142 @@
+import os
+import tempfile
+import unittest
+from src import gibbon
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = gibbon.CheckpointStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _append_lines(self, filename, lines):
+        with open(filename, 'a') as f:
+            for line in lines:
+                f.write(line + '\n')
+
+    def _read_lines(self, filename):
+        with open(filename) as f:
+            return [line.strip() for line in f]
+
+    def test_append_only_file(self):
+        source = os.path.join(self.tmp.name, 'in.csv')
+        target = os.path.join(self.tmp.name, 'out.csv')
+        self._append_lines(source, ['a,1', 'b,2', 'c,3'])
+
+        w = gibbon.Workflow('csv')
+        w.add_source('src')
+        w.add_transformation('enum', gibbon.Enumerator, source='src', start_with=1)
+        w.add_target('tgt', source='enum')
+        w.set_incremental(self.store)
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.CSVSourceFile, filename=source)
+        cfg.add_configuration('tgt', target=gibbon.CSVTargetFile, filename=target)
+        w.prepare(cfg)
+
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self._read_lines(target), ['1,a,1', '2,b,2', '3,c,3'])
+
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self._read_lines(target), ['1,a,1', '2,b,2', '3,c,3'])
+
+        self._append_lines(source, ['d,4', 'e,5'])
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self._read_lines(target), ['1,a,1', '2,b,2', '3,c,3', '4,d,4', '5,e,5'])
+
+        w.reset_watermarks()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertEqual(len(self._read_lines(target)), 5)
+
+    def test_watermark_column(self):
+        data = [(1, 'a', 10), (2, 'b', 20), (3, 'a', 30)]
+        sink = []
+        w = gibbon.Workflow('column')
+        w.add_source('src')
+        w.add_transformation('agg', gibbon.Aggregator, source='src', key=lambda r: (r[1],),
+                             accumulator=gibbon.simple_sum(2), initializer=(0,))
+        w.add_target('tgt', source='agg')
+        w.set_incremental(self.store)
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=data, watermark=0)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(sink, [('a', 40), ('b', 20)])
+
+        # the source yields its former rows again, only the updated accumulator is output
+        data.extend([(4, 'b', 5), (5, 'b', 1)])
+        sink.clear()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(sink, [('b', 26)])
+
+        sink.clear()
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(sink, [])
+
+    def test_failed_run(self):
+        data = [(i,) for i in range(3)]
+        sink = []
+
+        def fail(row):
+            if row[0] == 4:
+                raise RuntimeError('failure')
+            return row
+
+        w = gibbon.Workflow('failed')
+        w.add_source('src')
+        w.add_transformation('exp', gibbon.Expression, source='src', func=fail)
+        w.add_target('tgt', source='exp')
+        w.set_incremental(self.store)
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=data)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        w.prepare(cfg)
+
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        watermarks = self.store.load('failed.watermarks')
+        self.assertEqual(watermarks['src']['rows'], 3)
+
+        data.extend([(3,), (4,)])
+        self.assertFalse(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertDictEqual(self.store.load('failed.watermarks'), watermarks)
+
+    def test_columnar_append(self):
+        filename = os.path.join(self.tmp.name, 'out.gbc')
+        schema = (('id', 'int'), ('name', 'str'))
+        data = [(1, 'a'), (2, 'b')]
+
+        w = gibbon.Workflow('columnar')
+        w.add_source('src')
+        w.add_target('tgt', source='src')
+        w.set_incremental(self.store)
+
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=data)
+        cfg.add_configuration('tgt', target=gibbon.ColumnarTargetFile, filename=filename, schema=schema)
+        w.prepare(cfg)
+
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        data.append((3, 'c'))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+
+        sink = []
+        r = gibbon.Workflow('read')
+        r.add_source('src')
+        r.add_target('tgt', source='src')
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.ColumnarSourceFile, filename=filename)
+        cfg.add_configuration('tgt', target=gibbon.SequenceWrapper, container=sink)
+        r.prepare(cfg)
+        self.assertTrue(r.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(sink, [(1, 'a'), (2, 'b'), (3, 'c')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from src import gibbon
+from tests.samples import chained_workflow
+
+
+def count(r, c):
+    return c + 1,
+
+
+class Node:
+    def __init__(self, queue, spillable=False):
+        self.name = 'node'
+        self.in_queues = [queue]
+        self.spillable = spillable
+
+
+class Plan:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+
+class TestMemoryGovernor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        random.seed(7)
+        self.data = [(random.randrange(1000), i) for i in range(5000)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, cls, budget=None, **kwargs):
+        sink = []
+        w = chained_workflow('memory', dict(source=gibbon.SequenceWrapper, iterable=self.data),
+                             dict(target=gibbon.SequenceWrapper, container=sink), ('node', cls, kwargs))
+        w.set_memory_budget(budget, spill_dir=self.tmp.name)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        return sink, w
+
+    def test_sorter_spills(self):
+        sink, w = self._run(gibbon.Sorter, 50000, key=lambda r: r[0])
+        # sorting is stable across the spilled files
+        self.assertListEqual(sink, sorted(self.data, key=lambda r: r[0]))
+        memory = w.get_node_by_name('node').memory
+        self.assertGreater(memory.spills, 1)
+        self.assertGreater(memory.spilled_rows, 0)
+        self.assertListEqual(os.listdir(self.tmp.name), [])
+
+        sink, w = self._run(gibbon.Sorter, 50000, key=lambda r: r[0], reverse=True)
+        self.assertListEqual(sink, sorted(self.data, key=lambda r: r[0], reverse=True))
+
+    def test_aggregator_spills(self):
+        expected, _ = self._run(gibbon.Aggregator, key=lambda r: (r[0],), accumulator=count, initializer=(0,))
+        sink, w = self._run(gibbon.Aggregator, 20000, key=lambda r: (r[0],), accumulator=count,
+                            initializer=(0,))
+        self.assertCountEqual(sink, expected)
+        memory = w.get_node_by_name('node').memory
+        self.assertEqual(memory.spills, 1)
+        self.assertGreater(memory.spilled_rows, 0)
+        self.assertListEqual(os.listdir(self.tmp.name), [])
+
+    def test_report(self):
+        sink, w = self._run(gibbon.Sorter, 1 << 30, key=lambda r: r[0])
+        self.assertEqual(len(sink), len(self.data))
+        report = w.memory_report()
+        self.assertSetEqual(set(report), {'src', 'node', 'tgt'})
+        # the sorter holds every row at the end of the stream
+        self.assertGreater(report['node'], len(self.data) * 50)
+        self.assertEqual(w.get_node_by_name('node').memory.spills, 0)
+
+        w.set_memory_budget(None)
+        self.assertDictEqual(w.memory_report(), {})
+
+    def test_frozen_state(self):
+        queue = asyncio.Queue()
+        node = Node(queue, spillable=True)
+        governor = gibbon.MemoryGovernor(1000, sample=1)
+        governor.attach(Plan([node]))
+        governor.sample_row((0, 'row'))
+        queue.put_nowait((0, 'row'))
+
+        self.assertTrue(node.memory.add((0, 'row'), size=5000))
+        node.memory.freeze()
+        # the state kept by a node spilling the rest no longer makes the sources pause
+        self.assertFalse(governor.check())
+        self.assertEqual(governor.pressure, node.memory.queued)
+        self.assertGreater(governor.usage, 5000)
+        self.assertGreater(governor.report()['node'], 5000)
+
+    def test_backpressure(self):
+        async def throttle():
+            queue = asyncio.Queue()
+            node = Node(queue)
+            governor = gibbon.MemoryGovernor(1000, sample=1, max_pause=0.05)
+            governor.attach(Plan([node]))
+            for i in range(100):
+                queue.put_nowait((i, 'row'))
+
+            # nothing drains the queue, the source pauses for max_pause at most
+            start = time.monotonic()
+            await governor.throttle((0, 'row'))
+            self.assertGreaterEqual(time.monotonic() - start, 0.05)
+            self.assertEqual(governor.pauses, 1)
+            peak = governor.report()['node']
+
+            # the node drains its queue while the source pauses, which goes on once back under the budget
+            governor.max_pause = 60
+            async def consume():
+                while not queue.empty():
+                    await node.in_queues[0].get()
+                    await asyncio.sleep(0)
+            consumer = asyncio.ensure_future(consume())
+            await asyncio.wait_for(governor.throttle((0, 'row')), 30)
+            self.assertLessEqual(governor.pressure, governor.budget)
+            self.assertEqual(governor.pauses, 2)
+            await consumer
+
+            # without queued rows, the source does not pause
+            await governor.throttle((0, 'row'))
+            self.assertEqual(governor.pauses, 2)
+            return peak
+
+        loop = asyncio.new_event_loop()
+        try:
+            peak = loop.run_until_complete(throttle())
+        finally:
+            loop.close()
+        self.assertGreater(peak, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
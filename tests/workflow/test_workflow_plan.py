@@ -0,0 +1,79 @@
+import unittest
+from src import gibbon
+
+
+class TestCompile(unittest.TestCase):
+    def setUp(self):
+        self.w = gibbon.Workflow('plan')
+        self.w.add_source('src1')
+        self.w.add_source('src2')
+        self.w.add_complex_transformation('union', gibbon.Union, sources=('src1', 'src2'))
+        self.w.add_transformation('exp', gibbon.Expression, source='union')
+        self.w.add_target('tgt1', source='exp')
+        self.w.add_target('tgt2', source='src2')
+
+    def test_topological_order(self):
+        plan = self.w.compile()
+        self.assertIsNotNone(plan)
+        names = [n.name for n in plan.nodes]
+        self.assertEqual(len(names), 6)
+        for before, after in (('src1', 'union'), ('src2', 'union'), ('union', 'exp'),
+                              ('exp', 'tgt1'), ('src2', 'tgt2')):
+            self.assertLess(names.index(before), names.index(after))
+        self.assertSetEqual({n.name for n in plan.roots}, {'src1', 'src2'})
+        self.assertEqual(len(plan.links), 5)
+        self.assertEqual(plan.fan_out(self.w.get_node_by_name('src2')), 2)
+
+    def test_cached(self):
+        plan = self.w.compile()
+        self.assertIs(self.w.compile(), plan)
+        self.w.add_target('tgt3', source='exp')
+        self.assertIsNot(self.w.compile(), plan)
+        self.assertEqual(len(self.w.compile()), 7)
+
+    def test_invalid(self):
+        self.w.add_transformation('dangling', gibbon.Filter, source='exp')
+        self.assertIsNone(self.w.compile())
+
+    def test_cycle(self):
+        w = gibbon.Workflow('cycle')
+        w.add_source('src')
+        w.add_complex_transformation('union', gibbon.Union, sources=('src',))
+        w.add_transformation('exp', gibbon.Expression, source='union')
+        w.add_target('tgt', source='exp')
+        w.connect('exp', 'union')
+        self.assertIsNone(w.compile())
+        with self.assertRaises(gibbon.NodeCycleError):
+            w.raise_last()
+
+
+class TestPlanReuse(unittest.TestCase):
+    def setUp(self):
+        self.w = gibbon.Workflow('reuse')
+        self.w.add_source('src')
+        self.w.add_transformation('exp', gibbon.Expression, source='src', func=lambda r: (r[0] + 1,))
+        self.w.add_target('tgt1', source='exp')
+        self.w.add_target('tgt2', source='exp')
+
+    def test_run_twice(self):
+        sinks = ([], [])
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=[(1,), (2,)])
+        cfg.add_configuration('tgt1', target=gibbon.SequenceWrapper, container=sinks[0])
+        cfg.add_configuration('tgt2', target=gibbon.SequenceWrapper, container=sinks[1])
+        self.w.prepare(cfg)
+        plan = self.w.compile()
+        self.assertIn('src', plan.configuration)
+
+        for _ in range(2):
+            self.w.run(gibbon.get_async_executor(shutdown=True))
+
+        self.assertIs(self.w.compile(), plan)
+        self.assertEqual(len(self.w.get_node_by_name('exp').out_queues), 1)
+        self.assertEqual(len(self.w.get_node_by_name('tgt1').in_queues), 1)
+        self.assertSequenceEqual(sinks[0], [(2,), (3,)] * 2)
+        self.assertSequenceEqual(sinks[1], [(2,), (3,)] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src import gibbon
+from src.gibbon import col
+from tests.samples import chained_workflow
+
+
+data = [
+    ('Brian', 23, 'London', 'b@example.com'),
+    ('Joe', 35, 'Paris', 'j@example.com'),
+    ('Mary', 41, 'Rome', None),
+]
+
+
+def name_and_city(row):
+    return row[0], row[2]
+
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, source_cfg, uses=(0, 2), condition=None, fan_out=False):
+        nodes = [('exp', gibbon.Expression, dict(func=name_and_city, uses=uses))]
+        if condition is not None:
+            nodes.insert(0, ('filter', gibbon.Filter, dict(condition=condition)))
+        self.sink = []
+        w = chained_workflow('projection', source_cfg, dict(target=gibbon.SequenceWrapper, container=self.sink),
+                             *nodes, fan_out=fan_out)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        return w.get_node_by_name('src').pushed_projection
+
+    def test_inferred(self):
+        rows = []
+
+        def capture(row):
+            rows.append(row)
+            return name_and_city(row)
+
+        csv_file = os.path.join(self.tmp.name, 'in.csv')
+        with open(csv_file, 'w') as f:
+            f.writelines(','.join(str(v) for v in row) + '\n' for row in data)
+        projection = self._run(dict(source=gibbon.CSVSourceFile, filename=csv_file), condition=col(0) != 'Brian')
+        self.assertListEqual(projection, [0, 2])
+        self.assertListEqual(self.sink, [('Joe', 'Paris'), ('Mary', 'Rome')])
+
+        w = chained_workflow('capture', dict(source=gibbon.CSVSourceFile, filename=csv_file),
+                             dict(target=gibbon.SequenceWrapper),
+                             ('exp', gibbon.Expression, dict(func=capture, uses=(0, 2))))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(rows, [(name, None, city, None) for name, _, city, _ in data])
+
+    def test_csv_tuple_maker(self):
+        csv_file = os.path.join(self.tmp.name, 'typed.csv')
+        with open(csv_file, 'w') as f:
+            f.writelines(f'{name},{age},{city}\n' for name, age, city, _ in data)
+
+        def typed(fields):
+            return fields[0], int(fields[1]), fields[2]
+
+        projection = self._run(dict(source=gibbon.CSVSourceFile, filename=csv_file, tuple_maker=typed))
+        self.assertListEqual(projection, [0, 2])
+        self.assertListEqual(self.sink, [(name, city) for name, _, city, _ in data])
+
+    def test_csv_row_widths(self):
+        csv_file = os.path.join(self.tmp.name, 'ragged.csv')
+        with open(csv_file, 'w') as f:
+            f.write('a,b,c,d\ne\n\nf,g,h\n')
+        loop = asyncio.new_event_loop()
+
+        async def read():
+            rows = []
+            async with gibbon.CSVSourceFile(csv_file, loop, projection=(2, 0)) as src:
+                async for row in src:
+                    rows.append(row)
+            return rows
+
+        try:
+            rows = loop.run_until_complete(read())
+        finally:
+            loop.close()
+        self.assertListEqual(rows, [('a', None, 'c', None), ('e',), (), ('f', None, 'h')])
+
+    def test_not_inferred(self):
+        self.assertIsNone(self._run(dict(source=gibbon.SequenceWrapper, iterable=data)))
+        source_cfg = dict(source=gibbon.SQLiteSource, database=':memory:', query="SELECT 'Ann', 31, 'Oslo', NULL")
+        self.assertIsNone(self._run(source_cfg, uses=None))
+        self.assertIsNone(self._run(source_cfg, fan_out=True))
+        self.assertIsNone(self._run(source_cfg, condition=lambda r: r[1] > 30))
+        self.assertListEqual(self.sink, [('Ann', 'Oslo')])
+
+    def test_sqlite(self):
+        database = os.path.join(self.tmp.name, 'projection.db')
+        with sqlite3.connect(database) as conn:
+            conn.execute('CREATE TABLE people (name TEXT, age INTEGER, city TEXT, email TEXT)')
+            conn.executemany('INSERT INTO people VALUES (?, ?, ?, ?)', data)
+        conn.close()
+
+        projection = self._run(dict(source=gibbon.SQLiteSource, database=database, query='SELECT * FROM people'),
+                               condition=col(3).not_null())
+        self.assertListEqual(projection, [0, 2, 3])
+        self.assertListEqual(self.sink, [('Brian', 'London'), ('Joe', 'Paris')])
+
+        source = gibbon.SQLiteSource(None, 'SELECT * FROM people', database=database, projection=(1,))
+        source._acquire()
+        try:
+            statement, _ = source._wrapped_query()
+        finally:
+            source._release()
+        self.assertEqual(statement, 'SELECT NULL, "age", NULL, NULL FROM (SELECT * FROM people)')
+
+    def test_columnar(self):
+        columnar_file = os.path.join(self.tmp.name, 'in.gbc')
+        w = chained_workflow('write', dict(source=gibbon.SequenceWrapper, iterable=data),
+                             dict(target=gibbon.ColumnarTargetFile, filename=columnar_file, row_group_size=2,
+                                  schema=(('name', 'str'), ('age', 'int'), ('city', 'str'), ('email', 'str'))))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+
+        projection = self._run(dict(source=gibbon.ColumnarSourceFile, filename=columnar_file),
+                               condition=col('age') < 40)
+        self.assertIsNone(projection)
+        self.assertListEqual(self.sink, [('Brian', 'London'), ('Joe', 'Paris')])
+
+        projection = self._run(dict(source=gibbon.ColumnarSourceFile, filename=columnar_file),
+                               condition=col(1) < 40)
+        self.assertListEqual(projection, [0, 1, 2])
+        self.assertListEqual(self.sink, [('Brian', 'London'), ('Joe', 'Paris')])
+
+        projection = self._run(dict(source=gibbon.ColumnarSourceFile, filename=columnar_file, projection=(0, 1)))
+        self.assertListEqual(projection, [0, 2])
+        self.assertListEqual(self.sink, [(name, None) for name, *_ in data])
+
+
+if __name__ == '__main__':
+    unittest.main()
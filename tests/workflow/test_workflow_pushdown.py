@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src import gibbon
+from src.gibbon import col
+from tests.samples import chained_workflow
+
+
+data = [
+    ('Brian', 23),
+    ('Joe', 35),
+    ('Mary', None),
+    ('Alice', 25),
+    ('Billy', 15),
+]
+
+
+class TestPredicate(unittest.TestCase):
+    def test_evaluate(self):
+        p = (col(1) >= 20) & ~col(0).is_in(('Joe', 'Alice'))
+        self.assertListEqual([r for r in data if p(r)], [('Brian', 23)])
+        self.assertListEqual([r for r in data if (~(col(1) < 20))(r)], [r for r in data if r[0] != 'Billy'])
+        self.assertListEqual([r for r in data if (col(1).is_null() | (col(1) == 15))(r)],
+                             [('Mary', None), ('Billy', 15)])
+
+    def test_sql(self):
+        params = []
+        p = (col(1) > 20) | col('name').is_in(('Joe',))
+        self.assertEqual(p.to_sql(['name', 'age'], params),
+                         '(("age" IS NOT NULL AND "age" > ?) OR ("name" IS NOT NULL AND "name" IN (?)))')
+        self.assertListEqual(params, [20, 'Joe'])
+        self.assertEqual(repr(p), "(col(1) > 20 | col('name').is_in(('Joe',)))")
+
+    def test_bind(self):
+        p = (col('age') > 20).bind(['name', 'age'])
+        self.assertTrue(p(('Joe', 35)))
+        with self.assertRaises(ValueError):
+            (col('age') > 20)(('Joe', 35))
+
+
+class TestPushDown(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _build(self, source_cfg, *conditions, fan_out=False):
+        self.sink = []
+        filters = [(f'filter{i}', gibbon.Filter, dict(condition=c)) for i, c in enumerate(conditions)]
+        return chained_workflow('pushdown', source_cfg, dict(target=gibbon.SequenceWrapper, container=self.sink),
+                                *filters, fan_out=fan_out)
+
+    def test_chain(self):
+        w = self._build(dict(source=gibbon.SequenceWrapper, iterable=data), col(1) > 20, ~(col(0) == 'Joe'),
+                        lambda r: r[1] < 25)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self.sink, [('Brian', 23)])
+        self.assertEqual(repr(w.get_node_by_name('src').pushed_predicate), "(col(1) > 20 & ~col(0) == 'Joe')")
+        self.assertTrue(w.get_node_by_name('filter0').pushed_down)
+        self.assertTrue(w.get_node_by_name('filter1').pushed_down)
+        self.assertFalse(w.get_node_by_name('filter2').pushed_down)
+
+    def test_not_pushed(self):
+        w = self._build(dict(source=gibbon.SequenceWrapper, iterable=data), col(1) > 20, fan_out=True)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self.sink, [('Brian', 23), ('Joe', 35), ('Alice', 25)])
+        self.assertIsNone(w.get_node_by_name('src').pushed_predicate)
+
+        w = self._build(dict(source=gibbon.SequenceWrapper, iterable=data), lambda r: r[1] == 15)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self.sink, [('Billy', 15)])
+        self.assertIsNone(w.get_node_by_name('src').pushed_predicate)
+
+    def test_sqlite(self):
+        database = os.path.join(self.tmp.name, 'pushdown.db')
+        with sqlite3.connect(database) as conn:
+            conn.execute('CREATE TABLE people (name TEXT, age INTEGER)')
+            conn.executemany('INSERT INTO people VALUES (?, ?)', data)
+        conn.close()
+
+        condition = ~(col(1) < 20) & (col(0) != 'Joe')
+        w = self._build(dict(source=gibbon.SQLiteSource, database=database,
+                             query='SELECT name, age FROM people WHERE name <> ?', parameters=('Brian',)), condition)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self.sink, [r for r in data if condition(r) and r[0] != 'Brian'])
+        self.assertListEqual(self.sink, [('Mary', None), ('Alice', 25)])
+
+    def test_files(self):
+        csv_file = os.path.join(self.tmp.name, 'in.csv')
+        with open(csv_file, 'w') as f:
+            f.writelines(f'{name},{age}\n' for name, age in data)
+        w = self._build(dict(source=gibbon.CSVSourceFile, filename=csv_file), col(0).is_in(('Joe', 'Mary')))
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self.sink, [('Joe', '35'), ('Mary', 'None')])
+
+        columnar_file = os.path.join(self.tmp.name, 'in.gbc')
+        w = gibbon.Workflow('write')
+        w.add_source('src')
+        w.add_target('tgt', source='src')
+        cfg = gibbon.Configuration()
+        cfg.add_configuration('src', source=gibbon.SequenceWrapper, iterable=data)
+        cfg.add_configuration('tgt', target=gibbon.ColumnarTargetFile, filename=columnar_file,
+                              schema=(('name', 'str'), ('age', 'int')), row_group_size=2)
+        w.prepare(cfg)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+
+        w = self._build(dict(source=gibbon.ColumnarSourceFile, filename=columnar_file, columns=('age', 'name')),
+                        col('age') > 20)
+        self.assertTrue(w.run(gibbon.get_async_executor(shutdown=True)))
+        self.assertListEqual(self.sink, [(23, 'Brian'), (35, 'Joe'), (25, 'Alice')])
+
+
+if __name__ == '__main__':
+    unittest.main()